@@ -0,0 +1,85 @@
+"""Measure per-operation latency of the ephemeral store backends.
+
+The Postgres backend needs a migrated database. Run from the project root:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.ephemeral_store
+
+Without a database URL only the memory backend is measured.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from bot.models import EphemeralEntry
+from bot.storage import EphemeralStore, MemoryEphemeralStore, PostgresEphemeralStore
+
+KEY_PREFIX = "bench:"
+TTL_SECONDS = 60.0
+OPERATIONS = ("set_if_absent", "get", "set", "incr", "delete")
+
+
+async def bench(store: EphemeralStore, operations: int) -> dict[str, tuple[float, float]]:
+    """Median and p95 latency in seconds for each operation."""
+    keys = [f"{KEY_PREFIX}{index}" for index in range(operations)]
+    calls = {
+        "set_if_absent": lambda key: store.set_if_absent(key, TTL_SECONDS),
+        "get": store.get,
+        "set": lambda key: store.set(key, "value", TTL_SECONDS),
+        "incr": lambda key: store.incr(key, TTL_SECONDS),
+        "delete": store.delete,
+    }
+    results: dict[str, tuple[float, float]] = {}
+    for name in OPERATIONS:
+        samples = []
+        for key in keys:
+            started = time.perf_counter()
+            await calls[name](key)
+            samples.append(time.perf_counter() - started)
+        samples.sort()
+        results[name] = (statistics.median(samples), samples[int(len(samples) * 0.95)])
+    return results
+
+
+async def run(database_url: str | None, operations: int) -> None:
+    results = {"memory": await bench(MemoryEphemeralStore(), operations)}
+    if database_url:
+        engine = create_async_engine(database_url)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            results["postgres"] = await bench(PostgresEphemeralStore(session_maker), operations)
+        finally:
+            async with session_maker() as session:
+                async with session.begin():
+                    await session.execute(
+                        delete(EphemeralEntry).where(EphemeralEntry.key.startswith(KEY_PREFIX))
+                    )
+            await engine.dispose()
+
+    print(f"operations={operations} (median / p95)")
+    print(f"{'backend':10} " + " ".join(f"{name:>22}" for name in OPERATIONS))
+    for backend, timings in results.items():
+        columns = " ".join(
+            f"{timings[name][0] * 1e6:9.1f} / {timings[name][1] * 1e6:7.1f} us"
+            for name in OPERATIONS
+        )
+        print(f"{backend:10} {columns}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--operations", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.operations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Compare the full-scan TTL cleanup with ExpiringCache at 100k keys.
+
+Run from the project root:
+
+    python -m benchmarks.expiring_cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from bot.utils.expiring_cache import ExpiringCache
+
+TTL_SECONDS = 10.0
+
+
+def _full_scan_should_notify(cache: dict[int, float], key: int, now: float) -> bool:
+    expired_keys = [item for item, ts in cache.items() if now - ts >= TTL_SECONDS]
+    for item in expired_keys:
+        cache.pop(item, None)
+    last_seen = cache.get(key)
+    if last_seen is not None and now - last_seen < TTL_SECONDS:
+        return False
+    cache[key] = now
+    return True
+
+
+def bench_full_scan(keys: int, operations: int) -> float:
+    cache = {key: 0.0 for key in range(keys)}
+    started = time.perf_counter()
+    for index in range(operations):
+        _full_scan_should_notify(cache, keys + index, 1.0)
+    return (time.perf_counter() - started) / operations
+
+
+def bench_expiring_cache(keys: int, operations: int) -> float:
+    now = 0.0
+
+    def clock() -> float:
+        return now
+
+    cache: ExpiringCache[int, bool] = ExpiringCache(keys, TTL_SECONDS, clock=clock)
+    for key in range(keys):
+        cache.set(key, True)
+    now = 1.0
+    started = time.perf_counter()
+    for index in range(operations):
+        cache.add(keys + index, True)
+    return (time.perf_counter() - started) / operations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--operations", type=int, default=200)
+    args = parser.parse_args()
+
+    full_scan = bench_full_scan(args.keys, args.operations)
+    expiring = bench_expiring_cache(args.keys, args.operations * 100)
+    print(f"keys={args.keys}")
+    print(f"full-scan dict cleanup: {full_scan * 1e6:10.1f} us/op")
+    print(f"ExpiringCache.add:      {expiring * 1e6:10.1f} us/op")
+    print(f"speedup:                {full_scan / expiring:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare get/set latency of PostgresStorage with aiogram's MemoryStorage.
+
+Needs a migrated database. Run from the project root:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.fsm_storage
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from bot.models import FsmState
+from bot.storage import PostgresStorage
+
+BENCH_BOT_ID = -1
+
+
+async def bench(storage: BaseStorage, operations: int) -> dict[str, float]:
+    keys = [
+        StorageKey(bot_id=BENCH_BOT_ID, chat_id=index, user_id=index)
+        for index in range(operations)
+    ]
+    timings: dict[str, float] = {}
+
+    started = time.perf_counter()
+    for key in keys:
+        await storage.set_state(key, "PostCreationStates:waiting_for_content")
+    timings["set_state"] = (time.perf_counter() - started) / operations
+
+    started = time.perf_counter()
+    for key in keys:
+        await storage.get_state(key)
+    timings["get_state"] = (time.perf_counter() - started) / operations
+
+    started = time.perf_counter()
+    for key in keys:
+        await storage.update_data(key, {"page": "faq"})
+    timings["update_data"] = (time.perf_counter() - started) / operations
+    return timings
+
+
+async def run(database_url: str, operations: int) -> None:
+    engine = create_async_engine(database_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        results = {
+            "MemoryStorage": await bench(MemoryStorage(), operations),
+            "PostgresStorage": await bench(PostgresStorage(session_maker), operations),
+            "PostgresStorage (no cache)": await bench(
+                PostgresStorage(session_maker, cache_ttl_seconds=0.0), operations
+            ),
+        }
+    finally:
+        async with session_maker() as session:
+            async with session.begin():
+                await session.execute(delete(FsmState).where(FsmState.bot_id == BENCH_BOT_ID))
+        await engine.dispose()
+
+    print(f"operations={operations}")
+    print(f"{'storage':28} {'set_state':>12} {'get_state':>12} {'update_data':>12}")
+    for name, timings in results.items():
+        columns = " ".join(
+            f"{timings[op] * 1e6:9.1f} us" for op in ("set_state", "get_state", "update_data")
+        )
+        print(f"{name:28} {columns}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--operations", type=int, default=1000)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    asyncio.run(run(args.database_url, args.operations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,548 @@
+"""Synthetic load test: simulated participants and admins fed through the dispatcher.
+
+Every update goes through ``setup_dispatcher()`` with the real middlewares,
+services and Postgres. Only the Bot API is replaced, by a fake session that
+answers after ``--api-latency-ms``. Participants arrive at ``--arrival-rate``
+per second, at most ``--concurrency`` of them are active at once, and each
+one walks the funnel: ``/start`` with a signed token, the subscription check,
+three menu buttons and a free-text message. Admins keep creating post drafts
+and editing pages.
+
+Needs a migrated scratch database that nobody else is using, and
+``--i-know-this-wipes`` to confirm it is one: the run writes users, posts,
+page drafts and FSM rows under reserved ``tg_id`` values. It refuses to start
+if any of those already exist, and at the end deletes only the rows it
+created. Needs ``openssl`` to sign the ``/start`` token. Run from the project
+root:
+
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.load_test \\
+        --i-know-this-wipes --participants 500 --concurrency 100 --arrival-rate 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import dataclasses
+import itertools
+import json
+import logging
+import os
+import random
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional, get_args
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import GetChatMember, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import (
+    Chat,
+    ChatMemberMember,
+    Message,
+    MessageId,
+    Update,
+    User,
+)
+from sqlalchemy import delete, exists, func, or_, select
+
+from bot.config import Settings
+from bot.container import AppContainer, build_container
+from bot.db.pool import POOL_CHECKED_OUT, POOL_CHECKOUT_TIMEOUTS, POOL_CHECKOUT_WAIT_SECONDS
+from bot.dispatcher import setup_dispatcher
+from bot.handlers.common import CONTACTS_BUTTON, FAQ_BUTTON, SCHEDULE_BUTTON
+from bot.keyboards.page_edit import PAGE_DRAFT_CANCEL_CALLBACK
+from bot.keyboards.post_confirm import POST_CANCEL_CALLBACK
+from bot.keyboards.subscription import CHECK_SUBSCRIPTION_CALLBACK
+from bot.middlewares.throttling import UPDATES_THROTTLED
+from bot.middlewares.timing import handler_name
+from bot.middlewares.unit_of_work import UPDATE_QUERIES
+from bot.models import FsmState, PageDraft, Post, User as UserRow
+from bot.storage.event_isolation import UPDATE_WAIT_SECONDS
+
+LOAD_BOT_TOKEN = "4242:LOADTEST"
+FIRST_PARTICIPANT_ID = 991_000_000
+FIRST_ADMIN_ID = 990_000_000
+REQUIRED_CHANNEL_ID = -1009999999999
+PAGE_COMMANDS = ("/edit_faq", "/edit_contacts", "/edit_schedule")
+LAG_PROBE_SECONDS = 0.01
+
+
+class FakeTelegramSession(BaseSession):
+    """Answers every Bot API call locally after a fixed delay."""
+
+    def __init__(self, latency_seconds: float) -> None:
+        super().__init__()
+        self._latency_seconds = latency_seconds
+        self._message_ids = itertools.count(1)
+        self.calls: dict[str, int] = defaultdict(int)
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: Optional[int] = None
+    ) -> TelegramType:
+        self.calls[method.__api_method__] += 1
+        if self._latency_seconds:
+            await asyncio.sleep(self._latency_seconds)
+        return self._result(method)
+
+    def _result(self, method: TelegramMethod[Any]) -> Any:
+        if isinstance(method, GetChatMember):
+            return ChatMemberMember(user=_user(method.user_id))
+        returning = method.__returning__
+        if returning is Message or Message in get_args(returning):
+            chat_id = getattr(method, "chat_id", 0)
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(timezone.utc),
+                chat=Chat(id=chat_id if isinstance(chat_id, int) else 0, type="private"),
+            )
+        if returning is MessageId:
+            return MessageId(message_id=next(self._message_ids))
+        if returning is User:
+            return User(id=bot_id(), is_bot=True, first_name="Load test")
+        return True
+
+    async def stream_content(self, *args: Any, **kwargs: Any):
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def bot_id() -> int:
+    return int(LOAD_BOT_TOKEN.split(":", 1)[0])
+
+
+def _user(tg_id: int) -> User:
+    return User(id=tg_id, is_bot=False, first_name="Load", username=f"load{tg_id}")
+
+
+class UpdateFactory:
+    def __init__(self) -> None:
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def message(self, tg_id: int, text: str | None = None, photo: bool = False) -> Update:
+        payload: dict[str, Any] = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": tg_id, "type": "private"},
+            "from": _user(tg_id).model_dump(exclude_none=True),
+        }
+        if photo:
+            payload["photo"] = [
+                {"file_id": "AgACAgIAAx0", "file_unique_id": "load", "width": 800, "height": 600}
+            ]
+            payload["caption"] = text
+        else:
+            payload["text"] = text
+            if text and text.startswith("/"):
+                command = text.split(maxsplit=1)[0]
+                payload["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        return Update.model_validate({"update_id": next(self._update_ids), "message": payload})
+
+    def callback(self, tg_id: int, data: str) -> Update:
+        payload = {
+            "id": str(next(self._update_ids)),
+            "from": _user(tg_id).model_dump(exclude_none=True),
+            "chat_instance": "load",
+            "data": data,
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": tg_id, "type": "private"},
+                "text": "…",
+            },
+        }
+        return Update.model_validate({"update_id": next(self._update_ids), "callback_query": payload})
+
+
+class Recorder:
+    """Raw latencies: per handler (inner middleware) and per funnel step (end to end)."""
+
+    def __init__(self) -> None:
+        self.handlers: dict[str, list[float]] = defaultdict(list)
+        self.steps: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.loop_lag: list[float] = []
+        self.peak_checked_out = 0.0
+
+    async def __call__(self, handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            self.handlers[handler_name(data.get("handler"))].append(time.perf_counter() - started)
+
+    async def monitor_loop(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_SECONDS)
+            self.loop_lag.append(time.perf_counter() - started - LAG_PROBE_SECONDS)
+            self.peak_checked_out = max(self.peak_checked_out, POOL_CHECKED_OUT.value())
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, container: AppContainer, token: str) -> None:
+        self._args = args
+        self._container = container
+        self._token = token
+        self._updates = UpdateFactory()
+        self.recorder = Recorder()
+        self.dispatcher: Dispatcher = setup_dispatcher(container)
+        for name, observer in self.dispatcher.observers.items():
+            if name not in {"update", "error"}:
+                observer.middleware(self.recorder)
+        self.updates_fed = 0
+
+    async def feed(self, step: str, update: Update) -> None:
+        started = time.perf_counter()
+        try:
+            await self.dispatcher.feed_update(self._container.bot, update)
+        except Exception:
+            self.recorder.errors[step] += 1
+        finally:
+            self.recorder.steps[step].append(time.perf_counter() - started)
+            self.updates_fed += 1
+        if self._args.think_time_ms:
+            await asyncio.sleep(random.expovariate(1000 / self._args.think_time_ms))
+
+    async def participant(self, tg_id: int) -> None:
+        updates = self._updates
+        await self.feed("start", updates.message(tg_id, f"/start {self._token}"))
+        await self.feed("check_subscription", updates.callback(tg_id, CHECK_SUBSCRIPTION_CALLBACK))
+        for button in (SCHEDULE_BUTTON, FAQ_BUTTON, CONTACTS_BUTTON):
+            await self.feed("menu_button", updates.message(tg_id, button))
+        await self.feed("free_text", updates.message(tg_id, "когда начало?"))
+
+    async def admin(self, tg_id: int, stop: asyncio.Event) -> None:
+        updates = self._updates
+        for round_number in itertools.count():
+            if stop.is_set():
+                return
+            await self.feed("admin_post", updates.message(tg_id, "/post"))
+            await self.feed("admin_post", updates.message(tg_id, f"Анонс #{round_number}"))
+            await self.feed("admin_post", updates.message(tg_id, "Фото дня", photo=True))
+            await self.feed("admin_post", updates.callback(tg_id, POST_CANCEL_CALLBACK))
+
+            command = PAGE_COMMANDS[(tg_id + round_number) % len(PAGE_COMMANDS)]
+            await self.feed("admin_page", updates.message(tg_id, command))
+            await self.feed("admin_page", updates.message(tg_id, f"Новый текст #{round_number}"))
+            await self.feed("admin_page", updates.callback(tg_id, PAGE_DRAFT_CANCEL_CALLBACK))
+
+    async def run(self) -> float:
+        args = self._args
+        slots = asyncio.Semaphore(args.concurrency)
+        stop = asyncio.Event()
+
+        async def arrive(tg_id: int) -> None:
+            try:
+                await self.participant(tg_id)
+            finally:
+                slots.release()
+
+        monitor = asyncio.create_task(self.recorder.monitor_loop(stop))
+        admins = [
+            asyncio.create_task(self.admin(FIRST_ADMIN_ID + index, stop))
+            for index in range(args.admins)
+        ]
+        participants = []
+        started = time.perf_counter()
+        for index in range(args.participants):
+            await slots.acquire()
+            participants.append(asyncio.create_task(arrive(FIRST_PARTICIPANT_ID + index)))
+            if args.arrival_rate:
+                await asyncio.sleep(random.expovariate(args.arrival_rate))
+        await asyncio.gather(*participants)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await asyncio.gather(monitor, *admins)
+        await self._container.post_draft_store.flush_all()
+        return elapsed
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def print_latencies(title: str, samples: dict[str, list[float]]) -> None:
+    print(f"\n{title:40} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, values in sorted(samples.items(), key=lambda item: -len(item[1])):
+        columns = " ".join(
+            f"{percentile(values, fraction) * 1000:9.1f}" for fraction in (0.5, 0.95, 0.99)
+        )
+        print(f"{name:40} {len(values):7d} {columns} {max(values) * 1000:9.1f}")
+
+
+def print_report(test: LoadTest, elapsed: float, session: FakeTelegramSession, before: dict) -> None:
+    recorder = test.recorder
+    args = test._args
+    print(
+        f"participants={args.participants} admins={args.admins} concurrency={args.concurrency} "
+        f"arrival_rate={args.arrival_rate or 'unlimited'}/s api_latency={args.api_latency_ms}ms"
+    )
+    print(
+        f"updates={test.updates_fed} elapsed={elapsed:.2f}s "
+        f"throughput={test.updates_fed / elapsed:.1f} updates/s "
+        f"participants/s={args.participants / elapsed:.1f}"
+    )
+    print_latencies("funnel step (end to end)", recorder.steps)
+    print_latencies("handler", recorder.handlers)
+
+    waits = POOL_CHECKOUT_WAIT_SECONDS.count() - before["pool_waits"]
+    wait_sum = POOL_CHECKOUT_WAIT_SECONDS.sum() - before["pool_wait_sum"]
+    queries = UPDATE_QUERIES.sum() - before["queries"]
+    counted_updates = UPDATE_QUERIES.count() - before["query_updates"]
+    throttled = sum(
+        UPDATES_THROTTLED.value(kind=kind) for kind in ("command", "callback", "message")
+    ) - before["throttled"]
+    print(
+        f"\ndb pool: checkouts={waits} mean_wait={wait_sum / max(waits, 1) * 1000:.2f}ms "
+        f"timeouts={int(POOL_CHECKOUT_TIMEOUTS.value() - before['pool_timeouts'])} "
+        f"peak_checked_out={int(recorder.peak_checked_out)} "
+        f"(pool_size={args.pool_size}, max_overflow={args.max_overflow})"
+    )
+    print(f"db queries per update: {queries / max(counted_updates, 1):.2f}")
+    slot_waits = UPDATE_WAIT_SECONDS.count() - before["slot_waits"]
+    slot_wait_sum = UPDATE_WAIT_SECONDS.sum() - before["slot_wait_sum"]
+    print(
+        f"wait for handler slot (MAX_CONCURRENT_UPDATES={args.max_concurrent_updates}): "
+        f"mean={slot_wait_sum / max(slot_waits, 1) * 1000:.1f}ms"
+    )
+    if recorder.loop_lag:
+        print(
+            f"event loop lag: p50={percentile(recorder.loop_lag, 0.5) * 1000:.1f}ms "
+            f"p99={percentile(recorder.loop_lag, 0.99) * 1000:.1f}ms "
+            f"max={max(recorder.loop_lag) * 1000:.1f}ms"
+        )
+    print(f"bot api calls: {dict(sorted(session.calls.items()))}")
+    print(f"throttled updates: {int(throttled)}")
+    if recorder.errors:
+        print(f"errors by step: {dict(recorder.errors)}")
+
+
+class TokenSigner:
+    """RS256 key pair and one signed ``/start`` token, made with the openssl CLI."""
+
+    def __init__(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        path = Path(self._tmp.name)
+        self._private_key = path / "private.pem"
+        self._public_key = path / "public.pem"
+        subprocess.run(
+            ["openssl", "genpkey", "-algorithm", "RSA", "-pkeyopt", "rsa_keygen_bits:2048",
+             "-out", str(self._private_key)],
+            check=True,
+            capture_output=True,
+        )
+        subprocess.run(
+            ["openssl", "rsa", "-pubout", "-in", str(self._private_key), "-out", str(self._public_key)],
+            check=True,
+            capture_output=True,
+        )
+
+    @property
+    def public_key_pem(self) -> str:
+        return self._public_key.read_text()
+
+    def token(self, valid_for_seconds: int) -> str:
+        now = int(time.time())
+        header = _b64url(json.dumps({"alg": "RS256", "typ": "JWT"}).encode())
+        payload = _b64url(
+            json.dumps(
+                {"sub": "load-test", "iat": now, "exp": now + valid_for_seconds, "aud": "curling-week-bot"}
+            ).encode()
+        )
+        signature = subprocess.run(
+            ["openssl", "dgst", "-sha256", "-sign", str(self._private_key)],
+            input=f"{header}.{payload}".encode(),
+            check=True,
+            capture_output=True,
+        ).stdout
+        return f"{header}.{payload}.{_b64url(signature)}"
+
+    def close(self) -> None:
+        self._tmp.cleanup()
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def build_settings(args: argparse.Namespace, public_key_pem: str) -> Settings:
+    return Settings(
+        _env_file=None,
+        bot_token=LOAD_BOT_TOKEN,
+        database_url=args.database_url,
+        jwt_public_key=public_key_pem,
+        admin_ids=[FIRST_ADMIN_ID + index for index in range(args.admins)],
+        REQUIRED_CHANNELS=[{"id": REQUIRED_CHANNEL_ID, "title": "Load", "url": "https://t.me/load"}],
+        DB_POOL_SIZE=args.pool_size,
+        DB_MAX_OVERFLOW=args.max_overflow,
+        DB_POOL_WARM_UP_CONNECTIONS=0,
+        MAX_CONCURRENT_UPDATES=args.max_concurrent_updates,
+        THROTTLE_ENABLED=not args.no_throttle,
+        USER_STATUS_CACHE_NOTIFY=False,
+        PAGE_CACHE_NOTIFY=False,
+    )
+
+
+@dataclass(frozen=True)
+class RunFootprint:
+    """The rows a run may create, so cleanup touches nothing else."""
+
+    participant_ids: list[int]
+    admin_ids: list[int]
+    # Highest ``posts.id`` before the run; admin drafts get larger ids.
+    last_post_id: int = 0
+
+    @property
+    def user_ids(self) -> list[int]:
+        return self.participant_ids + self.admin_ids
+
+
+class DatabaseInUseError(RuntimeError):
+    pass
+
+
+async def reserve(container: AppContainer, args: argparse.Namespace) -> RunFootprint:
+    """Check that the reserved ids are unused and remember where ``posts`` ends."""
+    footprint = RunFootprint(
+        participant_ids=[FIRST_PARTICIPANT_ID + index for index in range(args.participants)],
+        admin_ids=[FIRST_ADMIN_ID + index for index in range(args.admins)],
+    )
+    async with container.session_maker() as session:
+        in_use = await session.scalar(
+            select(
+                or_(
+                    exists().where(UserRow.tg_id.in_(footprint.user_ids)),
+                    exists().where(Post.created_by.in_(footprint.admin_ids)),
+                    exists().where(PageDraft.editor_tg_id.in_(footprint.admin_ids)),
+                    exists().where(
+                        FsmState.bot_id == bot_id(), FsmState.user_id.in_(footprint.user_ids)
+                    ),
+                )
+            )
+        )
+        if in_use:
+            raise DatabaseInUseError(
+                "The database already has rows for the load test's reserved tg_id values. "
+                "It is not a scratch database, or an earlier run was killed before its "
+                "cleanup; use a fresh database."
+            )
+        last_post_id = await session.scalar(select(func.coalesce(func.max(Post.id), 0)))
+    return dataclasses.replace(footprint, last_post_id=last_post_id)
+
+
+async def cleanup(container: AppContainer, footprint: RunFootprint) -> None:
+    async with container.session_maker() as session:
+        async with session.begin():
+            await session.execute(delete(UserRow).where(UserRow.tg_id.in_(footprint.user_ids)))
+            await session.execute(
+                delete(Post).where(
+                    Post.created_by.in_(footprint.admin_ids), Post.id > footprint.last_post_id
+                )
+            )
+            await session.execute(
+                delete(PageDraft).where(PageDraft.editor_tg_id.in_(footprint.admin_ids))
+            )
+            await session.execute(
+                delete(FsmState).where(
+                    FsmState.bot_id == bot_id(), FsmState.user_id.in_(footprint.user_ids)
+                )
+            )
+
+
+async def run(args: argparse.Namespace) -> None:
+    signer = TokenSigner()
+    try:
+        settings = build_settings(args, signer.public_key_pem)
+        token = signer.token(valid_for_seconds=3600)
+    finally:
+        signer.close()
+
+    session = FakeTelegramSession(args.api_latency_ms / 1000)
+    container = build_container(settings, bot_session=session)
+    try:
+        footprint = await reserve(container, args)
+    except BaseException:
+        await container.engine.dispose()
+        raise
+    try:
+        await container.page_service.warm_up()
+        test = LoadTest(args, container, token)
+        before = {
+            "pool_waits": POOL_CHECKOUT_WAIT_SECONDS.count(),
+            "pool_wait_sum": POOL_CHECKOUT_WAIT_SECONDS.sum(),
+            "pool_timeouts": POOL_CHECKOUT_TIMEOUTS.value(),
+            "slot_waits": UPDATE_WAIT_SECONDS.count(),
+            "slot_wait_sum": UPDATE_WAIT_SECONDS.sum(),
+            "queries": UPDATE_QUERIES.sum(),
+            "query_updates": UPDATE_QUERIES.count(),
+            "throttled": sum(
+                UPDATES_THROTTLED.value(kind=kind) for kind in ("command", "callback", "message")
+            ),
+        }
+        elapsed = await test.run()
+        print_report(test, elapsed, session, before)
+    finally:
+        await cleanup(container, footprint)
+        await container.engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument(
+        "--i-know-this-wipes",
+        action="store_true",
+        help="confirm that the database is a scratch one the run may write to and clean up",
+    )
+    parser.add_argument("--participants", type=int, default=200)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument(
+        "--concurrency", type=int, default=50, help="participants active at the same time"
+    )
+    parser.add_argument(
+        "--arrival-rate", type=float, default=0.0, help="new participants per second, 0 = no pacing"
+    )
+    parser.add_argument(
+        "--think-time-ms", type=float, default=0.0, help="mean pause between a participant's updates"
+    )
+    parser.add_argument("--api-latency-ms", type=float, default=50.0)
+    parser.add_argument("--pool-size", type=int, default=10)
+    parser.add_argument("--max-overflow", type=int, default=5)
+    parser.add_argument("--max-concurrent-updates", type=int, default=32)
+    parser.add_argument("--no-throttle", action="store_true", help="disable per-user throttling")
+    parser.add_argument(
+        "--log-level", default="ERROR", help="bot log level during the run, e.g. WARNING for slow queries"
+    )
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    if not args.i_know_this_wipes:
+        parser.error(
+            "the load test writes to and cleans up the database; run it on a scratch "
+            "database and pass --i-know-this-wipes"
+        )
+    logging.basicConfig(level=args.log_level)
+    try:
+        asyncio.run(run(args))
+    except DatabaseInUseError as exc:
+        parser.exit(1, f"{parser.prog}: {exc}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Compare the old deep-copied dict payload path with the parsed PostDraft model.
+
+One "preview" is what the handlers did per admin message: check that the
+draft is not empty, resolve the main part and the extra document, plus the
+load done while applying the message. Run from the project root:
+
+    python -m benchmarks.post_payload
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from copy import deepcopy
+from typing import Any
+
+from bot.storage import PostDraft
+from bot.utils import deserialize_entities
+
+ENTITIES = [
+    {"type": "bold", "offset": 0, "length": 10},
+    {"type": "text_link", "offset": 12, "length": 20, "url": "https://example.com"},
+    {"type": "italic", "offset": 40, "length": 15},
+]
+PAYLOAD: dict[str, Any] = {
+    "main_text": "Неделя кёрлинга: расписание матчей и ссылки на трансляции " * 4,
+    "main_entities": ENTITIES,
+    "main_media": {
+        "type": "photo",
+        "file_id": "AgACAgIAAxkBAAIBQ2Z" * 3,
+        "caption": None,
+        "caption_entities": None,
+    },
+    "extra_document": {
+        "file_id": "BQACAgIAAxkBAAIBRGZ" * 3,
+        "file_name": "schedule.pdf",
+        "caption": "Полное расписание",
+        "caption_entities": ENTITIES,
+    },
+}
+
+
+def _load_payload(entities: Any) -> dict[str, Any]:
+    payload = deepcopy(entities) if isinstance(entities, dict) else None
+    if not payload:
+        payload = {}
+    for key in ("main_text", "main_entities", "main_media", "extra_document"):
+        payload.setdefault(key, None)
+    return payload
+
+
+def _dict_preview(entities: Any) -> None:
+    _load_payload(entities)
+    payload = _load_payload(entities)
+    if not any(payload.get(key) for key in ("main_text", "main_media", "extra_document")):
+        return
+    payload = _load_payload(entities)
+    media = payload.get("main_media")
+    main_text = payload.get("main_text")
+    main_entities = deserialize_entities(payload.get("main_entities"))
+    caption = media.get("caption")
+    caption_entities = deserialize_entities(media.get("caption_entities"))
+    if not caption and main_text:
+        caption, caption_entities = main_text, main_entities
+    payload = _load_payload(entities)
+    document = payload.get("extra_document")
+    deserialize_entities(document.get("caption_entities"))
+
+
+def _typed_preview(draft: PostDraft) -> None:
+    if draft.is_empty():
+        return
+    media = draft.main_media
+    caption = media.caption
+    caption_entities = media.message_caption_entities
+    if not caption and draft.main_text:
+        caption, caption_entities = draft.main_text.text, draft.main_text.message_entities
+    document = draft.extra_document
+    document.message_caption_entities
+
+
+def bench_dict(operations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(operations):
+        _dict_preview(PAYLOAD)
+    return (time.perf_counter() - started) / operations
+
+
+def bench_typed_parse_per_preview(operations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(operations):
+        _typed_preview(PostDraft.from_payload(1, 1, PAYLOAD))
+    return (time.perf_counter() - started) / operations
+
+
+def bench_typed_in_memory(operations: int) -> float:
+    draft = PostDraft.from_payload(1, 1, PAYLOAD)
+    started = time.perf_counter()
+    for _ in range(operations):
+        _typed_preview(draft)
+    return (time.perf_counter() - started) / operations
+
+
+def bench_serialize(operations: int) -> float:
+    draft = PostDraft.from_payload(1, 1, PAYLOAD)
+    started = time.perf_counter()
+    for _ in range(operations):
+        draft.to_payload()
+    return (time.perf_counter() - started) / operations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    dict_path = bench_dict(args.operations)
+    parsed = bench_typed_parse_per_preview(args.operations)
+    in_memory = bench_typed_in_memory(args.operations * 10)
+    serialize = bench_serialize(args.operations * 10)
+    print(f"dict path (4x deepcopy + parse):   {dict_path * 1e6:8.2f} us/preview")
+    print(f"PostDraft parsed from JSONB once:  {parsed * 1e6:8.2f} us/preview")
+    print(f"PostDraft already in memory:       {in_memory * 1e6:8.2f} us/preview")
+    print(f"PostDraft.to_payload (per write):  {serialize * 1e6:8.2f} us")
+    print(f"speedup (parsed / in memory):      {dict_path / parsed:8.1f}x / {dict_path / in_memory:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
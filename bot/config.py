@@ -26,6 +26,46 @@ class Settings(BaseSettings):
         default_factory=list,
         validation_alias="REQUIRED_CHANNELS",
     )
+    db_pool_size: int = Field(
+        default=10,
+        validation_alias="DB_POOL_SIZE",
+    )
+    db_max_overflow: int = Field(
+        default=10,
+        validation_alias="DB_MAX_OVERFLOW",
+    )
+    db_pool_timeout_seconds: float = Field(
+        default=5.0,
+        validation_alias="DB_POOL_TIMEOUT_SECONDS",
+    )
+    db_pool_recycle_seconds: int = Field(
+        default=1800,
+        validation_alias="DB_POOL_RECYCLE_SECONDS",
+    )
+    db_pool_pre_ping: bool = Field(
+        default=True,
+        validation_alias="DB_POOL_PRE_PING",
+    )
+    db_pool_warm_up_connections: int = Field(
+        default=2,
+        validation_alias="DB_POOL_WARM_UP_CONNECTIONS",
+    )
+    db_statement_cache_size: int = Field(
+        default=100,
+        validation_alias="DB_STATEMENT_CACHE_SIZE",
+    )
+    db_command_timeout_seconds: float = Field(
+        default=30.0,
+        validation_alias="DB_COMMAND_TIMEOUT_SECONDS",
+    )
+    db_slow_query_ms: float = Field(
+        default=200.0,
+        validation_alias="DB_SLOW_QUERY_MS",
+    )
+    db_repeated_statement_limit: int = Field(
+        default=5,
+        validation_alias="DB_REPEATED_STATEMENT_LIMIT",
+    )
     broadcast_delay_seconds: float = Field(
         default=0.07,
         validation_alias="BROADCAST_DELAY_SECONDS",
@@ -34,6 +74,166 @@ class Settings(BaseSettings):
         default=50,
         validation_alias="BROADCAST_BATCH_LOG_EVERY",
     )
+    ephemeral_store_backend: str = Field(
+        default="memory",
+        validation_alias="EPHEMERAL_STORE_BACKEND",
+    )
+    ephemeral_store_memory_max_keys: int = Field(
+        default=100_000,
+        validation_alias="EPHEMERAL_STORE_MEMORY_MAX_KEYS",
+    )
+    ephemeral_store_cleanup_interval_seconds: float = Field(
+        default=60.0,
+        validation_alias="EPHEMERAL_STORE_CLEANUP_INTERVAL_SECONDS",
+    )
+    subscription_sweep_enabled: bool = Field(
+        default=False,
+        validation_alias="SUBSCRIPTION_SWEEP_ENABLED",
+    )
+    subscription_sweep_interval_seconds: float = Field(
+        default=21600.0,
+        validation_alias="SUBSCRIPTION_SWEEP_INTERVAL_SECONDS",
+    )
+    subscription_sweep_batch_size: int = Field(
+        default=200,
+        validation_alias="SUBSCRIPTION_SWEEP_BATCH_SIZE",
+    )
+    subscription_sweep_api_calls_per_second: float = Field(
+        default=5.0,
+        validation_alias="SUBSCRIPTION_SWEEP_API_CALLS_PER_SECOND",
+    )
+    user_status_cache_max_size: int = Field(
+        default=10_000,
+        validation_alias="USER_STATUS_CACHE_MAX_SIZE",
+    )
+    user_status_cache_ttl_seconds: float = Field(
+        default=300.0,
+        validation_alias="USER_STATUS_CACHE_TTL_SECONDS",
+    )
+    user_status_cache_notify: bool = Field(
+        default=False,
+        validation_alias="USER_STATUS_CACHE_NOTIFY",
+    )
+    page_cache_notify: bool = Field(
+        default=False,
+        validation_alias="PAGE_CACHE_NOTIFY",
+    )
+    post_draft_flush_delay_seconds: float = Field(
+        default=2.0,
+        validation_alias="POST_DRAFT_FLUSH_DELAY_SECONDS",
+    )
+    draft_preview_debounce_seconds: float = Field(
+        default=1.0,
+        validation_alias="DRAFT_PREVIEW_DEBOUNCE_SECONDS",
+    )
+    fsm_storage_cache_max_size: int = Field(
+        default=10_000,
+        validation_alias="FSM_STORAGE_CACHE_MAX_SIZE",
+    )
+    fsm_storage_cache_ttl_seconds: float = Field(
+        default=60.0,
+        validation_alias="FSM_STORAGE_CACHE_TTL_SECONDS",
+    )
+    fsm_state_ttl_seconds: float = Field(
+        default=604800.0,
+        validation_alias="FSM_STATE_TTL_SECONDS",
+    )
+    fsm_storage_cleanup_interval_seconds: float = Field(
+        default=3600.0,
+        validation_alias="FSM_STORAGE_CLEANUP_INTERVAL_SECONDS",
+    )
+    leader_lease_seconds: float = Field(
+        default=15.0,
+        validation_alias="LEADER_LEASE_SECONDS",
+    )
+    leader_renew_interval_seconds: float = Field(
+        default=5.0,
+        validation_alias="LEADER_RENEW_INTERVAL_SECONDS",
+    )
+    webhook_url: str | None = Field(
+        default=None,
+        validation_alias="WEBHOOK_URL",
+    )
+    webhook_path: str = Field(
+        default="/telegram/webhook",
+        validation_alias="WEBHOOK_PATH",
+    )
+    webhook_secret: str | None = Field(
+        default=None,
+        validation_alias="WEBHOOK_SECRET",
+    )
+    webhook_host: str = Field(
+        default="0.0.0.0",
+        validation_alias="WEBHOOK_HOST",
+    )
+    webhook_port: int = Field(
+        default=8080,
+        validation_alias="WEBHOOK_PORT",
+    )
+    webhook_queue_size: int = Field(
+        default=1000,
+        validation_alias="WEBHOOK_QUEUE_SIZE",
+    )
+    webhook_workers: int = Field(
+        default=8,
+        validation_alias="WEBHOOK_WORKERS",
+    )
+    webhook_max_connections: int = Field(
+        default=40,
+        validation_alias="WEBHOOK_MAX_CONNECTIONS",
+    )
+    metrics_enabled: bool = Field(
+        default=True,
+        validation_alias="METRICS_ENABLED",
+    )
+    metrics_host: str = Field(
+        default="127.0.0.1",
+        validation_alias="METRICS_HOST",
+    )
+    metrics_port: int = Field(
+        default=9100,
+        validation_alias="METRICS_PORT",
+    )
+    max_concurrent_updates: int = Field(
+        default=32,
+        validation_alias="MAX_CONCURRENT_UPDATES",
+    )
+    throttle_enabled: bool = Field(
+        default=True,
+        validation_alias="THROTTLE_ENABLED",
+    )
+    throttle_commands_per_minute: float = Field(
+        default=20,
+        validation_alias="THROTTLE_COMMANDS_PER_MINUTE",
+    )
+    throttle_command_burst: int = Field(
+        default=5,
+        validation_alias="THROTTLE_COMMAND_BURST",
+    )
+    throttle_callbacks_per_minute: float = Field(
+        default=60,
+        validation_alias="THROTTLE_CALLBACKS_PER_MINUTE",
+    )
+    throttle_callback_burst: int = Field(
+        default=10,
+        validation_alias="THROTTLE_CALLBACK_BURST",
+    )
+    throttle_messages_per_minute: float = Field(
+        default=30,
+        validation_alias="THROTTLE_MESSAGES_PER_MINUTE",
+    )
+    throttle_message_burst: int = Field(
+        default=10,
+        validation_alias="THROTTLE_MESSAGE_BURST",
+    )
+    throttle_max_users: int = Field(
+        default=10000,
+        validation_alias="THROTTLE_MAX_USERS",
+    )
+    throttle_notify: bool = Field(
+        default=True,
+        validation_alias="THROTTLE_NOTIFY",
+    )
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
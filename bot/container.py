@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from bot.config import Settings
+from bot.db.coordination import ClusterCoordinator
+from bot.db.session import create_sessionmaker
+from bot.db.unit_of_work import UpdateSessionMaker
+from bot.services.draft_preview import DraftPreviewer
+from bot.services.page_editing import PageEditingService
+from bot.services.pages import PageRenderCache, PageService
+from bot.services.post_service import PostService
+from bot.services.registration import RegistrationService
+from bot.services.subscription_channels import (
+    SubscriptionChannelsPresentation,
+    build_subscription_channels_presentation,
+    get_required_channel_ids_for_check,
+)
+from bot.services.subscription_checker import SubscriptionCheckerService
+from bot.services.token_verifier import get_token_verifier
+from bot.storage import (
+    EphemeralStore,
+    JobStateRepository,
+    PageDraftRepository,
+    PageRepository,
+    PostDraftStore,
+    PostgresStorage,
+    PostRepository,
+    UserRepository,
+    UserStatusCache,
+    create_ephemeral_store,
+)
+from bot.telegram_session import InstrumentedAiohttpSession
+
+
+@dataclass
+class AppContainer:
+    """Everything built once per process and shared by all updates.
+
+    The dispatcher passes it to middlewares and handlers as the ``container``
+    argument. Services here get an :class:`UpdateSessionMaker`, so inside a
+    handler they still use the update's shared session.
+    """
+
+    settings: Settings
+    bot: Bot
+    engine: AsyncEngine
+    session_maker: async_sessionmaker[AsyncSession]
+
+    admin_ids: frozenset[int]
+    required_channel_ids: list[int]
+    channels_presentation: SubscriptionChannelsPresentation
+
+    user_status_cache: UserStatusCache
+    page_render_cache: PageRenderCache
+    ephemeral_store: EphemeralStore
+    post_draft_store: PostDraftStore
+    draft_previewer: DraftPreviewer
+    fsm_storage: PostgresStorage
+    coordinator: ClusterCoordinator
+
+    user_repository: UserRepository
+    page_repository: PageRepository
+    post_repository: PostRepository
+    job_state_repository: JobStateRepository
+
+    page_service: PageService
+    page_editing_service: PageEditingService
+    post_service: PostService
+    registration_service: RegistrationService
+    subscription_checker: SubscriptionCheckerService
+
+
+def build_container(settings: Settings, bot_session: BaseSession | None = None) -> AppContainer:
+    """``bot_session`` replaces the real Bot API session (load tests use a fake one)."""
+    engine, session_maker = create_sessionmaker(settings)
+    update_session_maker = UpdateSessionMaker(session_maker)
+    bot = Bot(token=settings.bot_token, session=bot_session or InstrumentedAiohttpSession())
+
+    user_status_cache = UserStatusCache(
+        max_size=settings.user_status_cache_max_size,
+        ttl_seconds=settings.user_status_cache_ttl_seconds,
+        publish_invalidations=settings.user_status_cache_notify,
+    )
+    page_render_cache = PageRenderCache(publish_invalidations=settings.page_cache_notify)
+    ephemeral_store = create_ephemeral_store(
+        settings.ephemeral_store_backend,
+        session_maker,
+        memory_max_keys=settings.ephemeral_store_memory_max_keys,
+    )
+    user_repository = UserRepository(status_cache=user_status_cache)
+    page_repository = PageRepository()
+    post_repository = PostRepository()
+    job_state_repository = JobStateRepository()
+    post_draft_store = PostDraftStore(
+        session_maker,
+        post_repository,
+        flush_delay_seconds=settings.post_draft_flush_delay_seconds,
+    )
+    coordinator = ClusterCoordinator(engine, session_maker, job_state_repository)
+
+    return AppContainer(
+        settings=settings,
+        bot=bot,
+        engine=engine,
+        session_maker=session_maker,
+        admin_ids=frozenset(settings.admin_ids),
+        required_channel_ids=get_required_channel_ids_for_check(settings.required_channels),
+        channels_presentation=build_subscription_channels_presentation(
+            required_channels=settings.required_channels,
+        ),
+        user_status_cache=user_status_cache,
+        page_render_cache=page_render_cache,
+        ephemeral_store=ephemeral_store,
+        post_draft_store=post_draft_store,
+        draft_previewer=DraftPreviewer(settings.draft_preview_debounce_seconds, ephemeral_store),
+        fsm_storage=PostgresStorage(
+            session_maker,
+            cache_max_size=settings.fsm_storage_cache_max_size,
+            cache_ttl_seconds=settings.fsm_storage_cache_ttl_seconds,
+            state_ttl_seconds=settings.fsm_state_ttl_seconds,
+        ),
+        coordinator=coordinator,
+        user_repository=user_repository,
+        page_repository=page_repository,
+        post_repository=post_repository,
+        job_state_repository=job_state_repository,
+        page_service=PageService(
+            session_maker=update_session_maker,
+            page_repository=page_repository,
+            render_cache=page_render_cache,
+            draft_repository=PageDraftRepository(),
+        ),
+        page_editing_service=PageEditingService(
+            session_maker=update_session_maker,
+            user_repository=user_repository,
+        ),
+        post_service=PostService(
+            session_maker=update_session_maker,
+            post_repository=post_repository,
+            ephemeral_store=ephemeral_store,
+            draft_store=post_draft_store,
+            coordinator=coordinator,
+        ),
+        registration_service=RegistrationService(
+            session_maker=update_session_maker,
+            user_repository=user_repository,
+            token_verifier=get_token_verifier(settings.jwt_public_key),
+            admin_ids=settings.admin_ids,
+        ),
+        subscription_checker=SubscriptionCheckerService(
+            session_maker=update_session_maker,
+            user_repository=user_repository,
+            required_channels=settings.required_channels,
+            bot=bot,
+            ephemeral_store=ephemeral_store,
+        ),
+    )
@@ -0,0 +1,279 @@
+"""Coordination between bot replicas through Postgres advisory locks.
+
+Every replica runs the same code; these helpers make sure that work which must
+happen once actually happens once:
+
+* ``ClusterCoordinator.run_once`` - a decorator for startup tasks. Callers
+  queue on a transaction-level lock; the first one runs the task and records
+  it in ``job_state``, the rest see the record and skip.
+* ``ClusterCoordinator.exclusive`` - holds a session-level lock for the
+  duration of a long job (a broadcast) and raises ``LockBusyError`` when
+  another replica already runs it.
+* ``LeaderElector`` - one replica holds the lock and runs the singleton
+  background jobs. The lock is re-checked every renew interval; if that fails
+  or takes longer than the lease, the jobs are cancelled and the replica goes
+  back to campaigning. A job that crashes is restarted at the next renewal,
+  so it does not stay dead while its replica keeps the lease.
+
+Postgres drops a session-level lock only when it notices that the holder's
+connection is gone, so for a short while an old holder may still be running
+next to the new one. Every acquisition therefore advances a fencing token in
+``job_state``; jobs call ``FencingToken.validate`` in the transaction that
+commits their progress, and the write of a stale holder is rejected.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker
+
+from bot.storage import JobStateRepository
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_RUN_ONCE_VALID_FOR_SECONDS = 600.0
+DEFAULT_LEASE_SECONDS = 15.0
+DEFAULT_RENEW_INTERVAL_SECONDS = 5.0
+
+_LOCK_HELD_SQL = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_locks WHERE locktype = 'advisory' "
+    "AND pid = pg_backend_pid() AND granted AND objsubid = 1 "
+    "AND classid::bigint = :classid AND objid::bigint = :objid)"
+)
+
+
+class CoordinationError(RuntimeError):
+    pass
+
+
+class LockBusyError(CoordinationError):
+    """Another replica holds the lock of this job."""
+
+
+class StaleFencingTokenError(CoordinationError):
+    """The lock was taken over since this token was issued."""
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for ``pg_advisory_lock`` derived from ``name``."""
+    digest = hashlib.blake2b(name.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+@dataclass(frozen=True)
+class FencingToken:
+    name: str
+    value: int
+    _repository: JobStateRepository = field(repr=False, compare=False)
+
+    async def validate(self, session: AsyncSession) -> None:
+        """Raise ``StaleFencingTokenError`` unless this token is still the latest.
+
+        Call it inside the transaction that commits the job's progress: the
+        row stays share-locked until commit, so a takeover cannot slip in
+        between the check and the write.
+        """
+        current = await self._repository.get_fencing_token(session, self.name)
+        if current != self.value:
+            raise StaleFencingTokenError(
+                f"{self.name}: token {self.value} is stale, current is {current}"
+            )
+
+
+def _seconds_since(moment: datetime) -> float:
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return (datetime.utcnow() - moment).total_seconds()
+
+
+async def _lock_is_held(connection: AsyncConnection, key: int) -> bool:
+    unsigned = key & 0xFFFF_FFFF_FFFF_FFFF
+    result = await connection.execute(
+        _LOCK_HELD_SQL, {"classid": unsigned >> 32, "objid": unsigned & 0xFFFF_FFFF}
+    )
+    return bool(result.scalar_one())
+
+
+class ClusterCoordinator:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        session_maker: async_sessionmaker[AsyncSession],
+        job_state_repository: JobStateRepository,
+    ) -> None:
+        self._engine = engine
+        self._session_maker = session_maker
+        self._job_state_repository = job_state_repository
+
+    async def next_fencing_token(self, name: str) -> FencingToken:
+        async with self._session_maker() as session:
+            async with session.begin():
+                value = await self._job_state_repository.advance_fencing_token(session, name)
+        return FencingToken(name, value, self._job_state_repository)
+
+    def run_once(
+        self,
+        name: str,
+        *,
+        fingerprint: str = "",
+        valid_for_seconds: float = DEFAULT_RUN_ONCE_VALID_FOR_SECONDS,
+    ) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T | None]]]:
+        """Run the decorated coroutine on one replica only.
+
+        A run is skipped if another replica completed it with the same
+        ``fingerprint`` less than ``valid_for_seconds`` ago; the skipped call
+        returns ``None``. Replicas that start together wait for the first run
+        to finish and then skip; a later deploy runs the task again.
+        """
+        job_name = f"once:{name}"
+        lock_key = advisory_lock_key(job_name)
+
+        def decorator(function: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T | None]]:
+            @functools.wraps(function)
+            async def wrapper(*args: Any, **kwargs: Any) -> T | None:
+                async with self._session_maker() as session:
+                    async with session.begin():
+                        await session.execute(select(func.pg_advisory_xact_lock(lock_key)))
+                        done = await self._job_state_repository.get(session, job_name)
+                        if (
+                            done is not None
+                            and done.fingerprint == fingerprint
+                            and _seconds_since(done.updated_at) < valid_for_seconds
+                        ):
+                            logger.info("Skipping %s: already done by a replica", name)
+                            return None
+                        result = await function(*args, **kwargs)
+                        await self._job_state_repository.save(
+                            session, job_name, cursor=None, fingerprint=fingerprint
+                        )
+                        return result
+
+            return wrapper
+
+        return decorator
+
+    @asynccontextmanager
+    async def exclusive(self, name: str) -> AsyncIterator[FencingToken]:
+        """Hold the cluster-wide lock ``name`` while the block runs.
+
+        Raises ``LockBusyError`` at once if another replica holds it.
+        """
+        job_name = f"exclusive:{name}"
+        async with self.locked_connection(advisory_lock_key(job_name)) as connection:
+            if connection is None:
+                raise LockBusyError(f"{name} is already running on another replica")
+            yield await self.next_fencing_token(job_name)
+
+    @asynccontextmanager
+    async def locked_connection(self, key: int) -> AsyncIterator[AsyncConnection | None]:
+        """Yield a connection holding session lock ``key``, or ``None`` if it is taken."""
+        async with self._engine.connect() as connection:
+            # Autocommit keeps the connection out of "idle in transaction"
+            # while it holds the lock.
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            acquired = await connection.scalar(select(func.pg_try_advisory_lock(key)))
+            if not acquired:
+                yield None
+                return
+            try:
+                yield connection
+            finally:
+                try:
+                    await connection.scalar(select(func.pg_advisory_unlock(key)))
+                except Exception:
+                    # Never hand a connection that may still hold the lock
+                    # back to the pool.
+                    logger.warning("Failed to release advisory lock %s", key, exc_info=True)
+                    await connection.invalidate()
+
+
+class LeaderElector:
+    """Runs ``jobs`` on whichever replica holds the ``name`` lock.
+
+    Each job is called with the fencing token of the current term and is
+    cancelled when the term ends. A job that raises is logged at once and
+    started again with the same token at the next renewal.
+    """
+
+    def __init__(
+        self,
+        coordinator: ClusterCoordinator,
+        name: str,
+        jobs: list[Callable[[FencingToken], Awaitable[Any]]],
+        *,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        renew_interval_seconds: float = DEFAULT_RENEW_INTERVAL_SECONDS,
+    ) -> None:
+        if renew_interval_seconds >= lease_seconds:
+            raise ValueError("renew_interval_seconds must be shorter than lease_seconds")
+        self._coordinator = coordinator
+        self._name = name
+        self._job_name = f"leader:{name}"
+        self._key = advisory_lock_key(self._job_name)
+        self._jobs = jobs
+        self._lease_seconds = lease_seconds
+        self._renew_interval_seconds = renew_interval_seconds
+        self.token: FencingToken | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.token is not None
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self._campaign()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Leadership of %s lost", self._name, exc_info=True)
+            await asyncio.sleep(self._renew_interval_seconds)
+
+    async def _campaign(self) -> None:
+        async with self._coordinator.locked_connection(self._key) as connection:
+            if connection is not None:
+                await self._lead(connection)
+
+    async def _lead(self, connection: AsyncConnection) -> None:
+        self.token = await self._coordinator.next_fencing_token(self._job_name)
+        logger.info("Became leader of %s with token=%s", self._name, self.token.value)
+        tasks = [asyncio.create_task(job(self.token)) for job in self._jobs]
+        try:
+            while True:
+                await asyncio.sleep(self._renew_interval_seconds)
+                held = await asyncio.wait_for(
+                    _lock_is_held(connection, self._key), timeout=self._lease_seconds
+                )
+                if not held:
+                    raise CoordinationError(f"advisory lock of {self._name} is gone")
+                self._restart_failed(tasks)
+        finally:
+            self.token = None
+            for task in tasks:
+                task.cancel()
+            for result in await asyncio.gather(*tasks, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error("Leader job of %s failed", self._name, exc_info=result)
+
+    def _restart_failed(self, tasks: list[asyncio.Task]) -> None:
+        for index, task in enumerate(tasks):
+            if not task.done() or task.cancelled() or task.exception() is None:
+                continue
+            logger.error(
+                "Leader job %s of %s failed, restarting it",
+                index,
+                self._name,
+                exc_info=task.exception(),
+            )
+            tasks[index] = asyncio.create_task(self._jobs[index](self.token))
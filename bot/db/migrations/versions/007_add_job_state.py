@@ -0,0 +1,30 @@
+"""add job state table
+
+Revision ID: 007_add_job_state
+Revises: 006_add_extra_document_to_pages
+Create Date: 2026-10-19 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "007_add_job_state"
+down_revision = "006_add_extra_document_to_pages"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_state",
+        sa.Column("name", sa.String(length=100), primary_key=True),
+        sa.Column("cursor", sa.BigInteger(), nullable=True),
+        sa.Column("fingerprint", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_state")
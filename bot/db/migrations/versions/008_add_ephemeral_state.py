@@ -0,0 +1,33 @@
+"""add unlogged ephemeral state table
+
+Revision ID: 008_add_ephemeral_state
+Revises: 007_add_job_state
+Create Date: 2026-10-19 00:00:01.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "008_add_ephemeral_state"
+down_revision = "007_add_job_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ephemeral_state",
+        sa.Column("key", sa.Text(), primary_key=True),
+        sa.Column("value", sa.Text(), nullable=False, server_default=sa.text("''")),
+        sa.Column("counter", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        prefixes=["UNLOGGED"],
+    )
+    op.create_index("ix_ephemeral_state_expires_at", "ephemeral_state", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ephemeral_state_expires_at", table_name="ephemeral_state")
+    op.drop_table("ephemeral_state")
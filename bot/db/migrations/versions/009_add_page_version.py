@@ -0,0 +1,27 @@
+"""add version to pages
+
+Revision ID: 009_add_page_version
+Revises: 008_add_ephemeral_state
+Create Date: 2026-10-19 00:00:02.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "009_add_page_version"
+down_revision = "008_add_ephemeral_state"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "pages",
+        sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("pages", "version")
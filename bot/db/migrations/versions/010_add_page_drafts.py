@@ -0,0 +1,41 @@
+"""add page drafts staging table
+
+Revision ID: 010_add_page_drafts
+Revises: 009_add_page_version
+Create Date: 2026-10-19 00:00:03.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "010_add_page_drafts"
+down_revision = "009_add_page_version"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "page_drafts",
+        sa.Column("key", sa.String(length=100), primary_key=True),
+        sa.Column("base_version", sa.Integer(), nullable=False),
+        sa.Column("editor_tg_id", sa.BigInteger(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("content_type", sa.String(length=20), nullable=False),
+        sa.Column("text", sa.Text(), nullable=True),
+        sa.Column("entities", postgresql.JSONB(), nullable=True),
+        sa.Column("file_id", sa.Text(), nullable=True),
+        sa.Column("caption", sa.Text(), nullable=True),
+        sa.Column("caption_entities", postgresql.JSONB(), nullable=True),
+        sa.Column("extra_document_file_id", sa.Text(), nullable=True),
+        sa.Column("extra_document_caption", sa.Text(), nullable=True),
+        sa.Column("extra_document_caption_entities", postgresql.JSONB(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("page_drafts")
@@ -0,0 +1,36 @@
+"""add indexes for active drafts and confirmed users
+
+Revision ID: 011_add_hot_query_indexes
+Revises: 010_add_page_drafts
+Create Date: 2026-10-19 00:00:04.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "011_add_hot_query_indexes"
+down_revision = "010_add_page_drafts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_users_confirmed_tg_id",
+        "users",
+        ["tg_id"],
+        postgresql_where=sa.text("status = 'CONFIRMED'"),
+    )
+    op.create_index(
+        "ix_posts_active_draft",
+        "posts",
+        ["created_by", "created_at"],
+        postgresql_where=sa.text("status = 'draft'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_active_draft", table_name="posts")
+    op.drop_index("ix_users_confirmed_tg_id", table_name="users")
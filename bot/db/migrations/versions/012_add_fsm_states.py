@@ -0,0 +1,52 @@
+"""add fsm states table
+
+Revision ID: 012_add_fsm_states
+Revises: 011_add_hot_query_indexes
+Create Date: 2026-10-19 00:00:05.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "012_add_fsm_states"
+down_revision = "011_add_hot_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "fsm_states",
+        sa.Column("bot_id", sa.BigInteger(), nullable=False),
+        sa.Column("chat_id", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("thread_id", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("business_connection_id", sa.Text(), nullable=False, server_default=sa.text("''")),
+        sa.Column("destiny", sa.Text(), nullable=False, server_default=sa.text("'default'")),
+        sa.Column("state", sa.Text(), nullable=True),
+        sa.Column(
+            "data",
+            postgresql.JSONB(),
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb"),
+        ),
+        sa.Column("version", sa.Integer(), nullable=False, server_default=sa.text("1")),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.PrimaryKeyConstraint(
+            "bot_id", "chat_id", "user_id", "thread_id", "business_connection_id", "destiny"
+        ),
+    )
+    op.create_index("ix_fsm_states_updated_at", "fsm_states", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_fsm_states_updated_at", table_name="fsm_states")
+    op.drop_table("fsm_states")
@@ -0,0 +1,34 @@
+"""key page drafts by page and editor
+
+Revision ID: 013_key_page_drafts_by_editor
+Revises: 012_add_fsm_states
+Create Date: 2026-10-19 00:00:06.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "013_key_page_drafts_by_editor"
+down_revision = "012_add_fsm_states"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_constraint("page_drafts_pkey", "page_drafts", type_="primary")
+    op.create_primary_key("page_drafts_pkey", "page_drafts", ["key", "editor_tg_id"])
+
+
+def downgrade() -> None:
+    # Only one draft per page fits the old key; keep the most recent one.
+    op.execute(
+        """
+        DELETE FROM page_drafts AS older
+        USING page_drafts AS newer
+        WHERE older.key = newer.key
+          AND (older.updated_at, older.editor_tg_id) < (newer.updated_at, newer.editor_tg_id)
+        """
+    )
+    op.drop_constraint("page_drafts_pkey", "page_drafts", type_="primary")
+    op.create_primary_key("page_drafts_pkey", "page_drafts", ["key"])
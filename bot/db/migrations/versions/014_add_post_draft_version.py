@@ -0,0 +1,27 @@
+"""add draft version to posts
+
+Revision ID: 014_add_post_draft_version
+Revises: 013_key_page_drafts_by_editor
+Create Date: 2026-10-19 00:00:07.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "014_add_post_draft_version"
+down_revision = "013_key_page_drafts_by_editor"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "posts",
+        sa.Column("draft_version", sa.Integer(), nullable=False, server_default=sa.text("0")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("posts", "draft_version")
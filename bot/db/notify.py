@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+_RECONNECT_DELAY_SECONDS = 5.0
+_HEALTH_CHECK_INTERVAL_SECONDS = 30.0
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """Turn a SQLAlchemy ``postgresql+asyncpg://`` URL into a plain asyncpg DSN."""
+    url = make_url(database_url).set(drivername="postgresql")
+    return url.render_as_string(hide_password=False)
+
+
+class PgNotificationListener:
+    """Keeps a dedicated connection subscribed to one ``LISTEN`` channel.
+
+    Notifications sent while the connection is down are lost, so
+    ``on_connect`` runs after every (re)connect to let the caller resync.
+    Both callbacks may be plain functions or coroutine functions; coroutines
+    returned by ``on_notify`` run as separate tasks so a slow reload never
+    delays the next notification.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str,
+        on_notify: Callable[[str], Awaitable[Any] | Any],
+        on_connect: Callable[[], Awaitable[Any] | Any] | None = None,
+    ) -> None:
+        self._dsn = dsn
+        self._channel = channel
+        self._on_notify = on_notify
+        self._on_connect = on_connect
+        self._pending: set[asyncio.Task] = set()
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await self._listen()
+                logger.warning(
+                    "LISTEN %s connection closed, reconnecting in %s s",
+                    self._channel,
+                    _RECONNECT_DELAY_SECONDS,
+                )
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+                logger.warning(
+                    "LISTEN %s connection lost: %s, reconnecting in %s s",
+                    self._channel,
+                    exc,
+                    _RECONNECT_DELAY_SECONDS,
+                )
+            await asyncio.sleep(_RECONNECT_DELAY_SECONDS)
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(self._dsn)
+        try:
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _connection: lost.set())
+            await connection.add_listener(self._channel, self._handle)
+            logger.info("Listening for notifications on %s", self._channel)
+            if self._on_connect is not None:
+                try:
+                    result = self._on_connect()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    logger.exception("Resync after connecting to %s failed", self._channel)
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), timeout=_HEALTH_CHECK_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    await connection.execute("SELECT 1")
+        finally:
+            if not connection.is_closed():
+                await connection.close()
+
+    def _handle(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            result = self._on_notify(payload)
+        except Exception:
+            logger.exception("Failed to handle notification on %s", channel)
+            return
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            self._pending.add(task)
+            task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(
+                "Failed to handle notification on %s",
+                self._channel,
+                exc_info=task.exception(),
+            )
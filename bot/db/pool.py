@@ -0,0 +1,108 @@
+"""Connection pool with checkout metrics.
+
+``InstrumentedQueuePool`` is SQLAlchemy's asyncio queue pool that also times
+every checkout. Opening a new connection is timed on its own, in
+``bot_db_pool_connect_seconds``, and left out of the checkout wait. A long
+``bot_db_pool_checkout_wait_seconds`` tail next to ``bot_db_pool_checked_out``
+sitting at size + overflow means handlers are queueing for connections: raise
+``DB_POOL_SIZE``/``DB_MAX_OVERFLOW`` or find what holds connections for so
+long. A slow connect points at the database host or network instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from bot.utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = Gauge("bot_db_pool_size", "Connections the pool keeps open.")
+POOL_CHECKED_OUT = Gauge("bot_db_pool_checked_out", "Connections currently in use.")
+POOL_OVERFLOW = Gauge(
+    "bot_db_pool_overflow", "Connections opened above the pool size (negative while filling)."
+)
+POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    "bot_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection, not counting opening a new one.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CONNECT_SECONDS = Histogram(
+    "bot_db_pool_connect_seconds",
+    "Time spent opening a new database connection for the pool.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "bot_db_pool_checkout_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT_SECONDS."
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        POOL_SIZE.set_function(self.size)
+        POOL_CHECKED_OUT.set_function(self.checkedout)
+        POOL_OVERFLOW.set_function(self.overflow)
+        # How long each freshly opened record took to connect, until the
+        # checkout that opened it subtracts it from its wait.
+        self._connect_seconds: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc()
+            POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - started)
+            raise
+        connect_seconds = self._connect_seconds.pop(record, 0.0)
+        POOL_CHECKOUT_WAIT_SECONDS.observe(time.perf_counter() - started - connect_seconds)
+        return record
+
+    def _create_connection(self):
+        started = time.perf_counter()
+        record = super()._create_connection()
+        elapsed = time.perf_counter() - started
+        POOL_CONNECT_SECONDS.observe(elapsed)
+        self._connect_seconds[record] = elapsed
+        return record
+
+
+async def warm_up_pool(engine: AsyncEngine, connections: int) -> None:
+    """Open ``connections`` connections at once so the first updates don't pay for it."""
+    connections = min(connections, engine.pool.size())
+    if connections <= 0:
+        return
+
+    opened = asyncio.Event()
+    ready = 0
+
+    async def hold() -> None:
+        nonlocal ready
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+                ready += 1
+                if ready == connections:
+                    opened.set()
+                # Keep this connection checked out until all are open,
+                # otherwise the next task would just reuse it.
+                await opened.wait()
+        except Exception:
+            opened.set()
+            raise
+
+    started = time.perf_counter()
+    await asyncio.gather(*(hold() for _ in range(connections)))
+    logger.info(
+        "Opened %s database connections in %.1f ms",
+        connections,
+        (time.perf_counter() - started) * 1000,
+    )
@@ -0,0 +1,127 @@
+"""Slow-query log, repeated-statement (N+1) detector and query budgets for tests.
+
+Statements are compared in normalised form: bind parameters and literals
+become ``?`` and ``IN`` lists collapse to ``(...)``, so the same repository
+call with different arguments counts as one statement. Logged parameters are
+reduced to their types; values never reach the log.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import re
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Iterator
+
+from bot.utils.metrics import Counter
+
+if TYPE_CHECKING:
+    from bot.db.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES = Counter(
+    "bot_db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS."
+)
+REPEATED_STATEMENTS = Counter(
+    "bot_db_repeated_statements_total",
+    "Updates that ran one statement more than DB_REPEATED_STATEMENT_LIMIT times.",
+)
+
+_recorded_statements: contextvars.ContextVar[list[str] | None] = contextvars.ContextVar(
+    "recorded_statements", default=None
+)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND_PARAMETER = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?|%\(\w+\)s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def normalize_statement(statement: str) -> str:
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _BIND_PARAMETER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return _VALUE_LIST.sub("(...)", statement)
+
+
+def describe_parameters(parameters: Any, executemany: bool = False) -> str:
+    """Parameter shape for logs: types only, never values."""
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        types = ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items())
+        return "{" + types + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return "<redacted>"
+
+
+class QueryLog:
+    """Logs slow statements and statements repeated within one update.
+
+    ``slow_query_seconds`` and ``repeated_statement_limit`` of ``0`` turn the
+    respective check off. A repeated statement is reported once per update,
+    when it first exceeds the limit, so a loop of a hundred lookups produces
+    one warning rather than a hundred.
+    """
+
+    def __init__(self, slow_query_seconds: float, repeated_statement_limit: int) -> None:
+        self.slow_query_seconds = slow_query_seconds
+        self.repeated_statement_limit = repeated_statement_limit
+
+    def observe(
+        self,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        elapsed: float,
+        unit_of_work: UnitOfWork | None,
+    ) -> None:
+        if self.slow_query_seconds and elapsed >= self.slow_query_seconds:
+            SLOW_QUERIES.inc()
+            logger.warning(
+                "Slow query %.1f ms: %s params=%s",
+                elapsed * 1000,
+                normalize_statement(statement),
+                describe_parameters(parameters, executemany),
+            )
+        if not self.repeated_statement_limit or unit_of_work is None:
+            return
+        normalized = normalize_statement(statement)
+        counts = unit_of_work.statement_counts
+        counts[normalized] = counts.get(normalized, 0) + 1
+        if counts[normalized] == self.repeated_statement_limit + 1:
+            REPEATED_STATEMENTS.inc()
+            logger.warning(
+                "Statement ran more than %s times in one update (possible N+1): %s",
+                self.repeated_statement_limit,
+                normalized,
+            )
+
+
+def record_statement(statement: str) -> None:
+    recorded = _recorded_statements.get()
+    if recorded is not None:
+        recorded.append(normalize_statement(statement))
+
+
+@contextmanager
+def expect_queries(count: int) -> Iterator[list[str]]:
+    """Fail unless exactly ``count`` statements run inside the block.
+
+    For tests: the engine needs :func:`install_query_counter`. Statements
+    from tasks started inside the block are counted as well.
+    """
+    statements: list[str] = []
+    token = _recorded_statements.set(statements)
+    try:
+        yield statements
+    finally:
+        _recorded_statements.reset(token)
+    if len(statements) != count:
+        listing = "\n".join(f"  {statement}" for statement in statements)
+        raise AssertionError(f"expected {count} queries, got {len(statements)}:\n{listing}")
@@ -1,13 +1,39 @@
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from bot.config import Settings
+from bot.db.pool import InstrumentedQueuePool
+from bot.db.query_log import QueryLog
+from bot.db.unit_of_work import install_query_counter
 
 
 def create_engine(settings: Settings):
-    return create_async_engine(settings.database_url, echo=False)
+    return create_async_engine(
+        settings.database_url,
+        echo=False,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            # asyncpg's own cache and SQLAlchemy's prepared statement cache;
+            # both must be 0 behind pgbouncer in transaction mode.
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+            "command_timeout": settings.db_command_timeout_seconds,
+        },
+    )
 
 
 def create_sessionmaker(settings: Settings):
     engine = create_engine(settings)
+    install_query_counter(
+        engine,
+        QueryLog(
+            slow_query_seconds=settings.db_slow_query_ms / 1000,
+            repeated_statement_limit=settings.db_repeated_statement_limit,
+        ),
+    )
     session_maker = async_sessionmaker(engine, expire_on_commit=False)
     return engine, session_maker
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from bot.db.query_log import QueryLog, record_statement
+from bot.storage import CachedUserStatus, UserRepository
+from bot.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+QUERY_SECONDS = Histogram(
+    "bot_db_query_seconds",
+    "Time from sending a statement to getting its cursor back.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+)
+
+_current_unit_of_work: contextvars.ContextVar[UnitOfWork | None] = contextvars.ContextVar(
+    "current_unit_of_work", default=None
+)
+
+
+class UnitOfWork:
+    """One lazily opened session per update plus the sender's status.
+
+    Services receive :meth:`session_maker` in place of the real session maker.
+    Each ``async with`` block gets the same session. When the outermost block
+    exits, any transaction still open from plain reads is rolled back, so the
+    connection goes back to the pool between blocks, just as it did when
+    every block used its own session.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        user_repository: UserRepository,
+        tg_id: int | None,
+    ) -> None:
+        self._session_maker = session_maker
+        self._user_repository = user_repository
+        self._tg_id = tg_id
+        self._session: AsyncSession | None = None
+        self._depth = 0
+        self._user_status: CachedUserStatus | None = None
+        self._user_status_loaded = False
+        self.sessions_opened = 0
+        self.query_count = 0
+        self.query_seconds = 0.0
+        self.statement_counts: dict[str, int] = {}
+        self.closed = False
+
+    def session_maker(self) -> _SharedSessionContext:
+        return _SharedSessionContext(self)
+
+    async def get_user_status(self) -> CachedUserStatus | None:
+        """Return the sender's status and editing page, loading them at most once per update.
+
+        A hit in the shared status cache needs no query. The value is a
+        snapshot taken on first access and is not refreshed by writes made
+        later in the update.
+        """
+        if self._user_status_loaded or self._tg_id is None:
+            return self._user_status
+        hit, cached = self._user_repository.get_cached_status(self._tg_id)
+        if hit:
+            self._user_status = cached
+        else:
+            async with self.session_maker() as session:
+                self._user_status = await self._user_repository.get_status(session, self._tg_id)
+        self._user_status_loaded = True
+        return self._user_status
+
+    async def close(self) -> None:
+        self.closed = True
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def bind(self) -> contextvars.Token:
+        return _current_unit_of_work.set(self)
+
+    @staticmethod
+    def unbind(token: contextvars.Token) -> None:
+        _current_unit_of_work.reset(token)
+
+    async def _enter(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_maker()
+            self.sessions_opened += 1
+        self._depth += 1
+        return self._session
+
+    async def _exit(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and self._session is not None and self._session.in_transaction():
+            await self._session.rollback()
+
+
+class _SharedSessionContext:
+    def __init__(self, unit_of_work: UnitOfWork) -> None:
+        self._unit_of_work = unit_of_work
+
+    async def __aenter__(self) -> AsyncSession:
+        return await self._unit_of_work._enter()
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        await self._unit_of_work._exit()
+        return False
+
+
+class UpdateSessionMaker:
+    """Session maker for services that are built once at startup.
+
+    While an update is being handled it hands out that update's shared
+    session, exactly like :meth:`UnitOfWork.session_maker`; outside of an
+    update (startup, background jobs, tasks outliving their update) it opens
+    a session of its own.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]) -> None:
+        self._session_maker = session_maker
+
+    def __call__(self) -> _SharedSessionContext | AsyncSession:
+        unit_of_work = _current_unit_of_work.get()
+        if unit_of_work is not None and not unit_of_work.closed:
+            return unit_of_work.session_maker()
+        return self._session_maker()
+
+
+def install_query_counter(engine: AsyncEngine, query_log: QueryLog | None = None) -> None:
+    """Count and time statements sent by ``engine`` against the current update's unit of work.
+
+    With ``query_log`` every statement is also checked for being slow or
+    repeated within the update.
+    """
+
+    def time_query(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.get("query_started_at")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        QUERY_SECONDS.observe(elapsed)
+        unit_of_work = _current_unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.query_seconds += elapsed
+        if query_log is not None:
+            query_log.observe(statement, parameters, executemany, elapsed, unit_of_work)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count_query)
+    event.listen(engine.sync_engine, "after_cursor_execute", time_query)
+    event.listen(engine.sync_engine, "handle_error", _forget_failed_query)
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+    record_statement(statement)
+    unit_of_work = _current_unit_of_work.get()
+    if unit_of_work is not None:
+        unit_of_work.query_count += 1
+
+
+def _forget_failed_query(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None and not connection.invalidated:
+        started = connection.info.get("query_started_at")
+        if started:
+            started.pop()
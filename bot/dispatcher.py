@@ -1,11 +1,38 @@
 from aiogram import Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
+from bot.container import AppContainer
 from bot.handlers import admin, common, user
+from bot.middlewares import (
+    HandlerTimingMiddleware,
+    UnitOfWorkMiddleware,
+    create_throttling_middleware,
+)
+from bot.storage import UpdateOrderingIsolation
 
 
-def setup_dispatcher() -> Dispatcher:
-    dispatcher = Dispatcher(storage=MemoryStorage())
+def setup_dispatcher(container: AppContainer | None = None) -> Dispatcher:
+    """Build the dispatcher; ``container`` becomes the ``container`` handler argument.
+
+    Without a container (tests that only inspect routing) FSM state lives
+    in memory.
+    """
+    if container is None:
+        dispatcher = Dispatcher(storage=MemoryStorage())
+    else:
+        dispatcher = Dispatcher(
+            storage=container.fsm_storage,
+            events_isolation=UpdateOrderingIsolation(container.settings.max_concurrent_updates),
+        )
+        dispatcher["container"] = container
+        throttling = create_throttling_middleware(container.settings)
+        if throttling is not None:
+            dispatcher.update.outer_middleware(throttling)
+    dispatcher.update.outer_middleware(UnitOfWorkMiddleware())
+    timing = HandlerTimingMiddleware()
+    for name, observer in dispatcher.observers.items():
+        if name not in {"update", "error"}:
+            observer.middleware(timing)
     dispatcher.include_router(common.router)
     dispatcher.include_router(user.router)
     dispatcher.include_router(admin.router)
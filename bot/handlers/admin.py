@@ -1,5 +1,4 @@
 import logging
-from datetime import datetime
 
 from aiogram import F, Router
 from aiogram.filters import StateFilter
@@ -7,6 +6,9 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, Message
 
+from bot.container import AppContainer
+from bot.db.coordination import LockBusyError
+from bot.db.unit_of_work import UnitOfWork
 from bot.filters import Command
 
 from bot.keyboards.page_edit import (
@@ -27,35 +29,34 @@ from bot.keyboards.post_confirm import (
     post_cancel_keyboard,
     post_confirm_keyboard,
 )
-from bot.services.page_editing import PageEditingService
+from bot.services.draft_preview import PreviewContent
 from bot.services.pages import (
     DEFAULT_PAGE_MESSAGE,
     PAGE_KEY_CONTACTS,
     PAGE_KEY_FAQ,
     PAGE_KEY_PHOTO,
     PAGE_KEY_SCHEDULE,
-    PageService,
+    DraftPublishResult,
+    PageRender,
 )
-from bot.services.post_service import DraftApplyResult, PostService, UnsupportedPostContentError
-from bot.storage import PageRepository, PostRepository, UserRepository
-from bot.utils import serialize_entities, should_notify_album, should_notify_document_update
+from bot.services.post_service import DraftApplyResult, UnsupportedPostContentError
+from bot.utils import serialize_entities, should_notify_album
 from bot.utils.admin import is_admin_event
 
 
 router = Router()
 PAGE_KEYS = {PAGE_KEY_FAQ, PAGE_KEY_CONTACTS, PAGE_KEY_SCHEDULE, PAGE_KEY_PHOTO}
+POST_PREVIEW_SCOPE = "post"
+PAGE_PREVIEW_SCOPE = "page"
+DRAFT_UPDATED_TEXT = "Черновик обновлён."
 logger = logging.getLogger(__name__)
 
-def _should_send_album_warning(message: Message) -> bool:
+async def _should_send_album_warning(message: Message, container: AppContainer) -> bool:
     if not message.media_group_id:
         return False
-    return should_notify_album(message.chat.id, message.media_group_id)
-
-
-def _is_document_notice_allowed(message: Message) -> bool:
-    if message.from_user is None:
-        return False
-    return should_notify_document_update(chat_id=message.chat.id, user_id=message.from_user.id)
+    return await should_notify_album(
+        container.ephemeral_store, message.chat.id, message.media_group_id
+    )
 
 
 class PostCreationStates(StatesGroup):
@@ -67,24 +68,24 @@ class PageEditingStates(StatesGroup):
 
 
 @router.message(Command("admin"))
-async def admin_menu(message: Message) -> None:
-    settings = message.bot.settings
-    if message.from_user is None or message.from_user.id not in settings.admin_ids:
+async def admin_menu(message: Message, container: AppContainer) -> None:
+    if message.from_user is None or message.from_user.id not in container.admin_ids:
         await message.answer("Access denied")
         return
     await message.answer("Admin menu is under construction")
 
 
-def _is_admin(message: Message | CallbackQuery) -> bool:
-    return is_admin_event(message)
+def _is_admin(event: Message | CallbackQuery, container: AppContainer) -> bool:
+    return is_admin_event(event, container.admin_ids)
 
 
-async def _send_page_with_edit_button(message: Message, key: str) -> None:
-    service = PageService(
-        session_maker=message.bot.session_maker,
-        page_repository=PageRepository(),
-    )
-    render = await service.render_page(key)
+async def _get_editing_key(uow: UnitOfWork) -> str | None:
+    user_status = await uow.get_user_status()
+    return user_status.editing_page_key if user_status is not None else None
+
+
+async def _send_page_with_edit_button(message: Message, key: str, container: AppContainer) -> None:
+    render = await container.page_service.render_page(key)
     reply_markup = page_edit_keyboard(key)
     if render.main_content_type == "photo" and render.main_photo_file_id:
         await message.answer_photo(
@@ -126,6 +127,7 @@ async def _send_page_with_edit_button(message: Message, key: str) -> None:
 async def _start_page_editing(
     message: Message,
     state: FSMContext,
+    container: AppContainer,
     page_key: str,
     user_id: int | None = None,
     username: str | None = None,
@@ -135,62 +137,27 @@ async def _start_page_editing(
         return
 
     if user_id is None:
-        if not _is_admin(message) or message.from_user is None:
+        if not _is_admin(message, container) or message.from_user is None:
             await message.answer("Недостаточно прав")
             return
         actor_user_id = message.from_user.id
         actor_username = message.from_user.username
     else:
-        if user_id not in message.bot.settings.admin_ids:
+        if user_id not in container.admin_ids:
             await message.answer("Недостаточно прав")
             return
         actor_user_id = user_id
         actor_username = username
 
-    service = PageEditingService(
-        session_maker=message.bot.session_maker,
-        user_repository=UserRepository(),
-    )
-    await service.start_editing(
+    await container.page_editing_service.start_editing(
         tg_id=actor_user_id,
         username=actor_username,
         key=page_key,
     )
-    page_service = PageService(
-        session_maker=message.bot.session_maker,
-        page_repository=PageRepository(),
-    )
-    render = await page_service.render_page(page_key)
-    draft = {"key": page_key}
-    if render.main_content_type == "photo" and render.main_photo_file_id:
-        draft.update(
-            {
-                "main_content_type": "photo",
-                "main_photo_file_id": render.main_photo_file_id,
-                "main_photo_caption": render.main_photo_caption or "",
-                "main_photo_caption_entities": render.main_photo_caption_entities,
-            }
-        )
-    else:
-        draft.update(
-            {
-                "main_content_type": "text",
-                "main_text": render.main_text or "",
-                "main_entities": render.main_entities,
-            }
-        )
-
-    if render.extra_document_file_id:
-        draft.update(
-            {
-                "extra_document_file_id": render.extra_document_file_id,
-                "extra_document_caption": render.extra_document_caption or "",
-                "extra_document_caption_entities": render.extra_document_caption_entities,
-            }
-        )
+    await container.page_service.start_draft(page_key, actor_user_id)
+    await _forget_preview(message, container, PAGE_PREVIEW_SCOPE)
 
     await state.set_state(PageEditingStates.waiting_for_content)
-    await state.update_data(page_draft=draft, page_original_draft=dict(draft))
     await message.answer(
         f"Редактирование страницы {page_key}. Пришли текст, фото или документ.\n"
         "После каждого обновления я автоматически покажу превью.\n"
@@ -202,8 +169,10 @@ async def _start_page_editing(
 
 
 @router.callback_query(F.data.startswith(EDIT_PAGE_CALLBACK_PREFIX))
-async def edit_page_callback(callback: CallbackQuery, state: FSMContext) -> None:
-    is_admin = _is_admin(callback)
+async def edit_page_callback(
+    callback: CallbackQuery, state: FSMContext, container: AppContainer
+) -> None:
+    is_admin = _is_admin(callback, container)
     user_id = callback.from_user.id if callback.from_user else None
     logger.info("PAGE_EDIT_CLICK user_id=%s is_admin=%s", user_id, is_admin)
     if not is_admin:
@@ -220,6 +189,7 @@ async def edit_page_callback(callback: CallbackQuery, state: FSMContext) -> None
         await _start_page_editing(
             callback.message,
             state,
+            container,
             page_key,
             user_id=user_id,
             username=callback.from_user.username if callback.from_user else None,
@@ -227,35 +197,35 @@ async def edit_page_callback(callback: CallbackQuery, state: FSMContext) -> None
 
 
 @router.message(Command("edit_faq"))
-async def edit_faq_command(message: Message, state: FSMContext) -> None:
-    await _start_page_editing(message, state, PAGE_KEY_FAQ)
+async def edit_faq_command(message: Message, state: FSMContext, container: AppContainer) -> None:
+    await _start_page_editing(message, state, container, PAGE_KEY_FAQ)
 
 
 @router.message(Command("edit_contacts"))
-async def edit_contacts_command(message: Message, state: FSMContext) -> None:
-    await _start_page_editing(message, state, PAGE_KEY_CONTACTS)
+async def edit_contacts_command(message: Message, state: FSMContext, container: AppContainer) -> None:
+    await _start_page_editing(message, state, container, PAGE_KEY_CONTACTS)
 
 
 @router.message(Command("edit_schedule"))
-async def edit_schedule_command(message: Message, state: FSMContext) -> None:
-    await _start_page_editing(message, state, PAGE_KEY_SCHEDULE)
+async def edit_schedule_command(message: Message, state: FSMContext, container: AppContainer) -> None:
+    await _start_page_editing(message, state, container, PAGE_KEY_SCHEDULE)
 
 
 @router.message(Command("edit_photo"))
-async def edit_photo_command(message: Message, state: FSMContext) -> None:
-    await _start_page_editing(message, state, PAGE_KEY_PHOTO)
+async def edit_photo_command(message: Message, state: FSMContext, container: AppContainer) -> None:
+    await _start_page_editing(message, state, container, PAGE_KEY_PHOTO)
 
 
 @router.message(Command("post"))
-async def start_post_creation(message: Message, state: FSMContext) -> None:
-    if not _is_admin(message):
+async def start_post_creation(
+    message: Message, state: FSMContext, container: AppContainer
+) -> None:
+    if not _is_admin(message, container):
         await message.answer("Недостаточно прав")
         return
-    service = PostService(
-        session_maker=message.bot.session_maker,
-        post_repository=PostRepository(),
-    )
+    service = container.post_service
     await service.ensure_draft(message.from_user.id)
+    await _forget_preview(message, container, POST_PREVIEW_SCOPE)
     await state.set_state(PostCreationStates.waiting_for_content)
     await message.answer(
         "Создаём анонс для участников 👇\n"
@@ -271,8 +241,8 @@ async def start_post_creation(message: Message, state: FSMContext) -> None:
     )
 
 
-async def _handle_post_content(message: Message) -> None:
-    if not _is_admin(message) or message.from_user is None:
+async def _handle_post_content(message: Message, container: AppContainer) -> None:
+    if not _is_admin(message, container) or message.from_user is None:
         return
     content_type = (
         "text"
@@ -289,15 +259,12 @@ async def _handle_post_content(message: Message) -> None:
     )
     logger.info("Post content received type=%s admin_id=%s", content_type, message.from_user.id)
 
-    service = PostService(
-        session_maker=message.bot.session_maker,
-        post_repository=PostRepository(),
-    )
+    service = container.post_service
     try:
         result = await service.apply_message_to_draft(message.from_user.id, message)
     except UnsupportedPostContentError as exc:
         if str(exc) == "album":
-            if _should_send_album_warning(message):
+            if await _should_send_album_warning(message, container):
                 await message.answer(
                     "Альбомы не поддерживаются. Пришли одно фото/видео/гиф одним сообщением.",
                     reply_markup=post_cancel_keyboard(),
@@ -309,26 +276,26 @@ async def _handle_post_content(message: Message) -> None:
         )
         return
 
-    await _send_post_draft_feedback(message=message, service=service, result=result)
+    await _send_post_draft_feedback(message, container, result)
 
 
 async def _send_post_draft_feedback(
     message: Message,
-    service: PostService,
+    container: AppContainer,
     result: DraftApplyResult,
 ) -> None:
-    await service.send_preview(message.bot, message.chat.id, result.post)
-    if result.notice:
-        await message.answer(result.notice)
-    await message.answer("Черновик обновлён.", reply_markup=post_confirm_keyboard())
+    slots = container.post_service.preview_slots(result.draft)
+    status = f"{result.notice}\n{DRAFT_UPDATED_TEXT}" if result.notice else DRAFT_UPDATED_TEXT
+    slots["status"] = PreviewContent("text", text=status, reply_markup=post_confirm_keyboard())
+    container.draft_previewer.schedule(message.bot, message.chat.id, POST_PREVIEW_SCOPE, slots)
 
 
 @router.message(
     StateFilter(PostCreationStates.waiting_for_content),
     F.text,
 )
-async def post_text_handler(message: Message) -> None:
-    if not _is_admin(message):
+async def post_text_handler(message: Message, container: AppContainer) -> None:
+    if not _is_admin(message, container):
         return
     admin_id = message.from_user.id if message.from_user else None
     text_prefix = (message.text or "")[:30]
@@ -339,25 +306,25 @@ async def post_text_handler(message: Message) -> None:
             reply_markup=post_cancel_keyboard(),
         )
         return
-    await _handle_post_content(message)
+    await _handle_post_content(message, container)
 
 
 @router.message(
     StateFilter(PostCreationStates.waiting_for_content),
     F.photo | F.video | F.animation | F.document,
 )
-async def post_media_handler(message: Message) -> None:
-    if not _is_admin(message):
+async def post_media_handler(message: Message, container: AppContainer) -> None:
+    if not _is_admin(message, container):
         return
-    await _handle_post_content(message)
+    await _handle_post_content(message, container)
 
 
 @router.message(StateFilter(PostCreationStates.waiting_for_content))
-async def post_unsupported_handler(message: Message) -> None:
-    if not _is_admin(message):
+async def post_unsupported_handler(message: Message, container: AppContainer) -> None:
+    if not _is_admin(message, container):
         return
     if message.media_group_id:
-        if _should_send_album_warning(message):
+        if await _should_send_album_warning(message, container):
             await message.answer(
                 "Альбомы не поддерживаются. Пришли одно фото/видео/гиф одним сообщением.",
                 reply_markup=post_cancel_keyboard(),
@@ -370,28 +337,28 @@ async def post_unsupported_handler(message: Message) -> None:
 
 
 @router.message(Command("cancel"))
-async def cancel_editing(message: Message, state: FSMContext) -> None:
-    if not _is_admin(message):
+async def cancel_editing(
+    message: Message, state: FSMContext, uow: UnitOfWork, container: AppContainer
+) -> None:
+    if not _is_admin(message, container):
         await message.answer("Недостаточно прав")
         return
     await state.clear()
-    service = PageEditingService(
-        session_maker=message.bot.session_maker,
-        user_repository=UserRepository(),
-    )
-    await service.cancel_editing(message.from_user.id)
+    editing_key = await _get_editing_key(uow)
+    if editing_key is not None:
+        await container.page_service.discard_draft(editing_key, message.from_user.id)
+    await _forget_preview(message, container, PAGE_PREVIEW_SCOPE)
+    await _forget_preview(message, container, POST_PREVIEW_SCOPE)
+    await container.page_editing_service.cancel_editing(message.from_user.id)
     await message.answer("Отменено")
 
 
 @router.callback_query(F.data == POST_PREVIEW_CALLBACK)
-async def preview_post_callback(callback: CallbackQuery) -> None:
-    if not _is_admin(callback) or callback.from_user is None:
+async def preview_post_callback(callback: CallbackQuery, container: AppContainer) -> None:
+    if not _is_admin(callback, container) or callback.from_user is None:
         await callback.answer("Недостаточно прав")
         return
-    post_service = PostService(
-        session_maker=callback.bot.session_maker,
-        post_repository=PostRepository(),
-    )
+    post_service = container.post_service
     draft = await post_service.get_active_draft(callback.from_user.id)
     if not draft or post_service.is_draft_empty(draft):
         await callback.answer("Черновик пуст", show_alert=True)
@@ -403,30 +370,28 @@ async def preview_post_callback(callback: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == POST_CLEAR_CALLBACK)
-async def clear_post_callback(callback: CallbackQuery) -> None:
-    if not _is_admin(callback) or callback.from_user is None:
+async def clear_post_callback(callback: CallbackQuery, container: AppContainer) -> None:
+    if not _is_admin(callback, container) or callback.from_user is None:
         await callback.answer("Недостаточно прав")
         return
-    post_service = PostService(
-        session_maker=callback.bot.session_maker,
-        post_repository=PostRepository(),
-    )
+    post_service = container.post_service
     await post_service.cancel_draft(callback.from_user.id)
+    await _forget_preview(callback, container, POST_PREVIEW_SCOPE)
     await callback.answer()
     if callback.message:
         await callback.message.answer("Создание анонса отменено.")
 
 
 @router.callback_query(F.data == POST_CANCEL_CALLBACK)
-async def cancel_post_callback(callback: CallbackQuery, state: FSMContext) -> None:
-    if not _is_admin(callback) or callback.from_user is None:
+async def cancel_post_callback(
+    callback: CallbackQuery, state: FSMContext, container: AppContainer
+) -> None:
+    if not _is_admin(callback, container) or callback.from_user is None:
         await callback.answer("Недостаточно прав")
         return
-    post_service = PostService(
-        session_maker=callback.bot.session_maker,
-        post_repository=PostRepository(),
-    )
+    post_service = container.post_service
     await post_service.cancel_draft(callback.from_user.id)
+    await _forget_preview(callback, container, POST_PREVIEW_SCOPE)
     await state.clear()
     await callback.answer()
     if callback.message:
@@ -434,17 +399,16 @@ async def cancel_post_callback(callback: CallbackQuery, state: FSMContext) -> No
 
 
 @router.callback_query(F.data == POST_SEND_CALLBACK)
-async def send_post_callback(callback: CallbackQuery, state: FSMContext) -> None:
-    if not _is_admin(callback) or callback.from_user is None:
+async def send_post_callback(
+    callback: CallbackQuery, state: FSMContext, container: AppContainer
+) -> None:
+    if not _is_admin(callback, container) or callback.from_user is None:
         await callback.answer("Недостаточно прав")
         return
 
-    settings = callback.bot.settings
-    post_service = PostService(
-        session_maker=callback.bot.session_maker,
-        post_repository=PostRepository(),
-    )
-    draft = await post_service.get_active_draft(callback.from_user.id)
+    settings = container.settings
+    post_service = container.post_service
+    draft = await post_service.flush_draft(callback.from_user.id)
     if not draft or post_service.is_draft_empty(draft):
         await callback.answer()
         if callback.message:
@@ -452,69 +416,106 @@ async def send_post_callback(callback: CallbackQuery, state: FSMContext) -> None
                 "Нечего отправлять: черновик пустой. Создание анонса отменено."
             )
         await post_service.cancel_draft(callback.from_user.id)
+        await _forget_preview(callback, container, POST_PREVIEW_SCOPE)
         await state.clear()
         return
 
-    await callback.answer()
-    if callback.message:
-        await callback.message.answer("Начинаю рассылку…")
+    chat_id = callback.message.chat.id if callback.message else callback.from_user.id
+    bot = callback.bot
+
+    async def report(success_count: int, fail_count: int) -> None:
+        await bot.send_message(chat_id, "✅ Отправлено всем участникам.")
+        await bot.send_message(chat_id, f"Готово. Успешно: {success_count}, Ошибок: {fail_count}")
+
+    async def report_failure(error: Exception) -> None:
+        if isinstance(error, LockBusyError):
+            await bot.send_message(chat_id, "Рассылка этого анонса уже идёт.")
+            return
+        await bot.send_message(
+            chat_id,
+            "⚠️ Рассылка прервалась из-за ошибки. Часть участников могла уже получить анонс. "
+            "Чтобы отправить его снова, создайте анонс заново через /post.",
+        )
 
-    success_count, fail_count = await post_service.broadcast_draft(
-        callback.bot,
+    started = await post_service.start_broadcast(
+        bot,
         draft,
-        user_repository=UserRepository(),
+        user_repository=container.user_repository,
         send_delay_seconds=settings.broadcast_delay_seconds,
         batch_log_every=settings.broadcast_batch_log_every,
+        on_finished=report,
+        on_failed=report_failure,
     )
+    await callback.answer()
+    if not started:
+        if callback.message:
+            await callback.message.answer("Рассылка этого анонса уже идёт.")
+        return
+    await _forget_preview(callback, container, POST_PREVIEW_SCOPE)
     await state.clear()
     if callback.message:
-        await callback.message.answer("✅ Отправлено всем участникам.")
-        await callback.message.answer(
-            f"Готово. Успешно: {success_count}, Ошибок: {fail_count}"
-        )
+        await callback.message.answer("Начинаю рассылку… Итог пришлю, когда она закончится.")
 
 
-async def _send_page_draft_preview(message: Message, page_key: str, draft: dict) -> None:
+def _schedule_page_draft_preview(
+    message: Message,
+    container: AppContainer,
+    page_key: str,
+    render: PageRender,
+    status: str = DRAFT_UPDATED_TEXT,
+) -> None:
     reply_markup = page_edit_keyboard(page_key)
-
-    if draft.get("main_content_type") == "photo" and draft.get("main_photo_file_id"):
-        await message.answer_photo(
-            draft["main_photo_file_id"],
-            caption=draft.get("main_photo_caption") or "",
-            caption_entities=draft.get("main_photo_caption_entities"),
+    if render.main_content_type == "photo" and render.main_photo_file_id:
+        main = PreviewContent(
+            "photo",
+            text=render.main_photo_caption or "",
+            entities=render.main_photo_caption_entities,
+            file_id=render.main_photo_file_id,
             reply_markup=reply_markup,
         )
+    elif render.main_text:
+        main = PreviewContent(
+            "text", text=render.main_text, entities=render.main_entities, reply_markup=reply_markup
+        )
+    elif render.extra_document_file_id:
+        main = PreviewContent("text", text="Основной контент пока не задан.", reply_markup=reply_markup)
     else:
-        text = (draft.get("main_text") or "").strip()
-        if text:
-            await message.answer(
-                text,
-                entities=draft.get("main_entities"),
-                reply_markup=reply_markup,
-            )
-        elif draft.get("extra_document_file_id"):
-            await message.answer(
-                "Основной контент пока не задан.",
-                reply_markup=reply_markup,
-            )
-        else:
-            await message.answer(DEFAULT_PAGE_MESSAGE, reply_markup=reply_markup)
+        main = PreviewContent("text", text=DEFAULT_PAGE_MESSAGE, reply_markup=reply_markup)
 
-    if draft.get("extra_document_file_id"):
-        await message.answer_document(
-            draft["extra_document_file_id"],
-            caption=draft.get("extra_document_caption") or "",
-            caption_entities=draft.get("extra_document_caption_entities"),
+    document = None
+    if render.extra_document_file_id:
+        document = PreviewContent(
+            "document",
+            text=render.extra_document_caption or "",
+            entities=render.extra_document_caption_entities,
+            file_id=render.extra_document_file_id,
             reply_markup=page_draft_delete_document_keyboard(),
         )
 
+    slots = {
+        "main": main,
+        "document": document,
+        "status": PreviewContent("text", text=status, reply_markup=page_confirm_keyboard()),
+    }
+    container.draft_previewer.schedule(message.bot, message.chat.id, PAGE_PREVIEW_SCOPE, slots)
+
+
+async def _forget_preview(
+    event: Message | CallbackQuery, container: AppContainer, scope: str
+) -> None:
+    message = event.message if isinstance(event, CallbackQuery) else event
+    if message is not None:
+        await container.draft_previewer.forget(message.chat.id, scope)
+
 
 @router.message(
     StateFilter(PageEditingStates.waiting_for_content),
     F.text & ~F.text.startswith("/"),
 )
-async def handle_page_editing_text(message: Message, state: FSMContext) -> None:
-    if not _is_admin(message) or message.from_user is None:
+async def handle_page_editing_text(
+    message: Message, state: FSMContext, uow: UnitOfWork, container: AppContainer
+) -> None:
+    if not _is_admin(message, container) or message.from_user is None:
         return
 
     current_state = await state.get_state()
@@ -525,94 +526,76 @@ async def handle_page_editing_text(message: Message, state: FSMContext) -> None:
         (message.text or "")[:30],
     )
 
-    service = PageEditingService(
-        session_maker=message.bot.session_maker,
-        user_repository=UserRepository(),
-    )
-    editing_key = await service.get_editing_key(message.from_user.id)
+    editing_key = await _get_editing_key(uow)
     if editing_key is None:
         return
 
-    data = await state.get_data()
-    draft = dict(data.get("page_draft") or {})
-    draft.update(
-        {
-            "key": editing_key,
-            "main_content_type": "text",
-            "main_text": message.text,
-            "main_entities": message.entities,
-        }
+    render = await container.page_service.update_draft_text(
+        editing_key,
+        message.from_user.id,
+        text=message.text,
+        entities=serialize_entities(message.entities),
     )
+    if render is None:
+        await message.answer("Черновик не найден, начни редактирование заново.")
+        return
 
-    await state.update_data(page_draft=draft)
-    await _restore_page_from_draft(message.bot, editing_key, draft)
-    await _send_page_draft_preview(message, editing_key, draft)
-    await message.answer("Черновик обновлён.", reply_markup=page_confirm_keyboard())
+    _schedule_page_draft_preview(message, container, editing_key, render)
 
 
 @router.message(
     StateFilter(PageEditingStates.waiting_for_content),
     F.photo | F.document,
 )
-async def handle_page_editing_media(message: Message, state: FSMContext) -> None:
-    if not _is_admin(message) or message.from_user is None:
+async def handle_page_editing_media(
+    message: Message, state: FSMContext, uow: UnitOfWork, container: AppContainer
+) -> None:
+    if not _is_admin(message, container) or message.from_user is None:
         return
 
-    service = PageEditingService(
-        session_maker=message.bot.session_maker,
-        user_repository=UserRepository(),
-    )
-    editing_key = await service.get_editing_key(message.from_user.id)
+    editing_key = await _get_editing_key(uow)
     if editing_key is None:
         return
 
-    data = await state.get_data()
-    draft = dict(data.get("page_draft") or {})
-    draft["key"] = editing_key
-
     if message.media_group_id:
-        if _should_send_album_warning(message):
+        if await _should_send_album_warning(message, container):
             await message.answer(
                 "Альбомы не поддерживаются. Пришли одно фото/видео/гиф одним сообщением.",
                 reply_markup=page_draft_cancel_keyboard(),
             )
         return
 
-    should_respond = True
+    page_service = container.page_service
     if message.photo:
-        draft.update(
-            {
-                "main_content_type": "photo",
-                "main_photo_file_id": message.photo[-1].file_id,
-                "main_photo_caption": message.caption or "",
-                "main_photo_caption_entities": message.caption_entities,
-            }
+        render = await page_service.update_draft_photo(
+            editing_key,
+            message.from_user.id,
+            file_id=message.photo[-1].file_id,
+            caption=message.caption,
+            caption_entities=serialize_entities(message.caption_entities),
         )
-    elif message.document:
-        draft.update(
-            {
-                "extra_document_file_id": message.document.file_id,
-                "extra_document_caption": message.caption or "",
-                "extra_document_caption_entities": message.caption_entities,
-            }
+    else:
+        render = await page_service.update_draft_document(
+            editing_key,
+            message.from_user.id,
+            file_id=message.document.file_id,
+            caption=message.caption,
+            caption_entities=serialize_entities(message.caption_entities),
         )
-        should_respond = _is_document_notice_allowed(message)
 
-    await state.update_data(page_draft=draft)
-    await _restore_page_from_draft(message.bot, editing_key, draft)
-    if not should_respond:
+    if render is None:
+        await message.answer("Черновик не найден, начни редактирование заново.")
         return
 
-    await _send_page_draft_preview(message, editing_key, draft)
-    await message.answer("Черновик обновлён.", reply_markup=page_confirm_keyboard())
+    _schedule_page_draft_preview(message, container, editing_key, render)
 
 
 @router.message(StateFilter(PageEditingStates.waiting_for_content))
-async def handle_page_editing_unsupported(message: Message) -> None:
-    if not _is_admin(message):
+async def handle_page_editing_unsupported(message: Message, container: AppContainer) -> None:
+    if not _is_admin(message, container):
         return
     if message.media_group_id:
-        if _should_send_album_warning(message):
+        if await _should_send_album_warning(message, container):
             await message.answer(
                 "Альбомы не поддерживаются. Пришли одно фото/видео/гиф одним сообщением.",
                 reply_markup=page_draft_cancel_keyboard(),
@@ -621,111 +604,82 @@ async def handle_page_editing_unsupported(message: Message) -> None:
     await message.answer("Пока поддерживаются: текст, фото, документ.")
 
 
-async def _restore_page_from_draft(bot, page_key: str, draft: dict) -> None:
-    page_service = PageService(
-        session_maker=bot.session_maker,
-        page_repository=PageRepository(),
-    )
-    if draft.get("main_content_type") == "photo" and draft.get("main_photo_file_id"):
-        await page_service.update_page_photo(
-            page_key,
-            file_id=draft["main_photo_file_id"],
-            caption=draft.get("main_photo_caption"),
-            caption_entities=serialize_entities(draft.get("main_photo_caption_entities")),
-        )
-    else:
-        await page_service.update_page_text(
-            page_key,
-            text=draft.get("main_text") or "",
-            entities=serialize_entities(draft.get("main_entities")),
-        )
-
-    if draft.get("extra_document_file_id"):
-        await page_service.update_page_document(
-            page_key,
-            file_id=draft["extra_document_file_id"],
-            caption=draft.get("extra_document_caption"),
-            caption_entities=serialize_entities(draft.get("extra_document_caption_entities")),
-        )
-
-
-
-
-async def _clear_page_extra_document(bot, page_key: str) -> None:
-    page_repository = PageRepository()
-    async with bot.session_maker() as session:
-        async with session.begin():
-            page = await page_repository.get_by_key(session, page_key)
-            if page is None:
-                return
-            page.extra_document_file_id = None
-            page.extra_document_caption = None
-            page.extra_document_caption_entities = None
-            page.updated_at = datetime.utcnow()
-            session.add(page)
-
 @router.callback_query(
     StateFilter(PageEditingStates.waiting_for_content),
     F.data == PAGE_DRAFT_DELETE_DOC_CALLBACK,
 )
-async def delete_page_draft_document_callback(callback: CallbackQuery, state: FSMContext) -> None:
-    if not _is_admin(callback) or callback.from_user is None:
+async def delete_page_draft_document_callback(
+    callback: CallbackQuery, state: FSMContext, uow: UnitOfWork, container: AppContainer
+) -> None:
+    if not _is_admin(callback, container) or callback.from_user is None:
         await callback.answer("Недостаточно прав")
         return
 
-    data = await state.get_data()
-    draft = dict(data.get("page_draft") or {})
-    page_key = draft.get("key")
+    page_key = await _get_editing_key(uow)
     if not page_key:
         await callback.answer()
         return
 
-    draft["extra_document_file_id"] = None
-    draft["extra_document_caption"] = None
-    draft["extra_document_caption_entities"] = None
-
-    await state.update_data(page_draft=draft)
-    await _clear_page_extra_document(callback.bot, page_key)
-    await callback.answer()
+    render = await container.page_service.clear_draft_document(
+        page_key, callback.from_user.id
+    )
+    if render is None:
+        await callback.answer("Черновик не найден")
+        return
+    await callback.answer("Файл удалён из страницы.")
     if callback.message:
-        await callback.message.edit_reply_markup(reply_markup=None)
-        await callback.message.answer("Файл удалён из страницы.")
-        await callback.message.answer("Черновик обновлён.", reply_markup=page_confirm_keyboard())
+        _schedule_page_draft_preview(
+            callback.message,
+            container,
+            page_key,
+            render,
+            status=f"Файл удалён из страницы.\n{DRAFT_UPDATED_TEXT}",
+        )
 
 @router.callback_query(F.data == PAGE_DRAFT_SAVE_CALLBACK)
-async def save_page_draft_callback(callback: CallbackQuery, state: FSMContext) -> None:
-    if not _is_admin(callback) or callback.from_user is None:
+async def save_page_draft_callback(
+    callback: CallbackQuery, state: FSMContext, uow: UnitOfWork, container: AppContainer
+) -> None:
+    if not _is_admin(callback, container) or callback.from_user is None:
         await callback.answer("Недостаточно прав")
         return
 
-    service = PageEditingService(
-        session_maker=callback.bot.session_maker,
-        user_repository=UserRepository(),
-    )
-    await service.cancel_editing(callback.from_user.id)
+    editing_key = await _get_editing_key(uow)
+    result = DraftPublishResult(published=False)
+    if editing_key is not None:
+        result = await container.page_service.publish_draft(editing_key, callback.from_user.id)
+    await _forget_preview(callback, container, PAGE_PREVIEW_SCOPE)
+
+    await container.page_editing_service.cancel_editing(callback.from_user.id)
     await state.clear()
     await callback.answer()
     if callback.message:
-        await callback.message.answer("Сохранено")
+        if not result.published:
+            text = "Черновик не найден, изменений нет"
+        elif result.overwritten_version is not None:
+            text = (
+                "Сохранено. Пока ты редактировал, страницу сохранил другой администратор — "
+                "его изменения заменены твоими."
+            )
+        else:
+            text = "Сохранено"
+        await callback.message.answer(text)
 
 
 @router.callback_query(F.data == PAGE_DRAFT_CANCEL_CALLBACK)
-async def cancel_page_draft_callback(callback: CallbackQuery, state: FSMContext) -> None:
-    if not _is_admin(callback) or callback.from_user is None:
+async def cancel_page_draft_callback(
+    callback: CallbackQuery, state: FSMContext, uow: UnitOfWork, container: AppContainer
+) -> None:
+    if not _is_admin(callback, container) or callback.from_user is None:
         await callback.answer("Недостаточно прав")
         return
 
-    service = PageEditingService(
-        session_maker=callback.bot.session_maker,
-        user_repository=UserRepository(),
-    )
-    editing_key = await service.get_editing_key(callback.from_user.id)
-    data = await state.get_data()
-    original_draft = dict(data.get("page_original_draft") or {})
-    if editing_key and original_draft:
-        await _restore_page_from_draft(callback.bot, editing_key, original_draft)
+    editing_key = await _get_editing_key(uow)
+    if editing_key is not None:
+        await container.page_service.discard_draft(editing_key, callback.from_user.id)
+    await _forget_preview(callback, container, PAGE_PREVIEW_SCOPE)
 
-    await service.cancel_editing(callback.from_user.id)
+    await container.page_editing_service.cancel_editing(callback.from_user.id)
     await state.clear()
     await callback.answer()
     if callback.message:
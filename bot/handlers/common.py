@@ -4,6 +4,7 @@ from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import Message, ReplyKeyboardMarkup
 
+from bot.container import AppContainer
 from bot.keyboards import (
     CONTACTS_BUTTON,
     FAQ_BUTTON,
@@ -18,29 +19,19 @@ from bot.services.pages import (
     PAGE_KEY_FAQ,
     PAGE_KEY_PHOTO,
     PAGE_KEY_SCHEDULE,
-    PageService,
 )
-from bot.storage import PageRepository
 from bot.utils.admin import is_admin_event
 
 router = Router()
 logger = logging.getLogger(__name__)
 
 
-def _is_admin(message: Message) -> bool:
-    return is_admin_event(message)
-
-
-async def _send_page(message: Message, key: str) -> None:
+async def _send_page(message: Message, key: str, container: AppContainer) -> None:
     user_id = message.from_user.id if message.from_user else None
-    is_admin = _is_admin(message)
+    is_admin = is_admin_event(message, container.admin_ids)
     logger.info("PAGE_VIEW_HANDLER hit page=%s user_id=%s is_admin=%s", key, user_id, is_admin)
 
-    service = PageService(
-        session_maker=message.bot.session_maker,
-        page_repository=PageRepository(),
-    )
-    render = await service.render_page(key)
+    render = await container.page_service.render_page(key)
 
     admin_markup: ReplyKeyboardMarkup | None = page_edit_keyboard(key) if is_admin else None
     user_markup: ReplyKeyboardMarkup | None = None if is_admin else back_keyboard()
@@ -98,40 +89,40 @@ async def _send_page(message: Message, key: str) -> None:
 
 
 @router.message(Command("faq"))
-async def faq_handler(message: Message) -> None:
-    await _send_page(message, PAGE_KEY_FAQ)
+async def faq_handler(message: Message, container: AppContainer) -> None:
+    await _send_page(message, PAGE_KEY_FAQ, container)
 
 
 @router.message(Command("contacts"))
-async def contacts_handler(message: Message) -> None:
-    await _send_page(message, PAGE_KEY_CONTACTS)
+async def contacts_handler(message: Message, container: AppContainer) -> None:
+    await _send_page(message, PAGE_KEY_CONTACTS, container)
 
 
 @router.message(Command("schedule"))
-async def schedule_handler(message: Message) -> None:
-    await _send_page(message, PAGE_KEY_SCHEDULE)
+async def schedule_handler(message: Message, container: AppContainer) -> None:
+    await _send_page(message, PAGE_KEY_SCHEDULE, container)
 
 
 @router.message(Command("photo"))
-async def photo_handler(message: Message) -> None:
-    await _send_page(message, PAGE_KEY_PHOTO)
+async def photo_handler(message: Message, container: AppContainer) -> None:
+    await _send_page(message, PAGE_KEY_PHOTO, container)
 
 
 @router.message(F.text == FAQ_BUTTON)
-async def faq_button_handler(message: Message) -> None:
-    await _send_page(message, PAGE_KEY_FAQ)
+async def faq_button_handler(message: Message, container: AppContainer) -> None:
+    await _send_page(message, PAGE_KEY_FAQ, container)
 
 
 @router.message(F.text == CONTACTS_BUTTON)
-async def contacts_button_handler(message: Message) -> None:
-    await _send_page(message, PAGE_KEY_CONTACTS)
+async def contacts_button_handler(message: Message, container: AppContainer) -> None:
+    await _send_page(message, PAGE_KEY_CONTACTS, container)
 
 
 @router.message(F.text == SCHEDULE_BUTTON)
-async def schedule_button_handler(message: Message) -> None:
-    await _send_page(message, PAGE_KEY_SCHEDULE)
+async def schedule_button_handler(message: Message, container: AppContainer) -> None:
+    await _send_page(message, PAGE_KEY_SCHEDULE, container)
 
 
 @router.message(F.text == PHOTO_BUTTON)
-async def photo_button_handler(message: Message) -> None:
-    await _send_page(message, PAGE_KEY_PHOTO)
+async def photo_button_handler(message: Message, container: AppContainer) -> None:
+    await _send_page(message, PAGE_KEY_PHOTO, container)
@@ -3,8 +3,16 @@ import logging
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import CommandObject, CommandStart, StateFilter
-from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiogram.types import (
+    CallbackQuery,
+    ChatJoinRequest,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+)
 
+from bot.container import AppContainer
+from bot.db.unit_of_work import UnitOfWork
 from bot.keyboards import (
     BACK_BUTTON,
     CONTACTS_BUTTON,
@@ -19,25 +27,31 @@ from bot.keyboards.subscription import (
     subscription_links_keyboard,
 )
 from bot.models import RegistrationStatus
-from bot.services.registration import RegistrationService
-from bot.services.subscription_channels import (
-    build_subscription_channels_presentation,
-    get_required_channel_ids_for_check,
-)
-from bot.services.subscription_checker import SubscriptionCheckerService
-from bot.services.token_verifier import get_token_verifier
-from bot.services.user_status import UserStatusService
-from bot.services.page_editing import PageEditingService
-from bot.storage import UserRepository
 from bot.handlers.admin import PageEditingStates, PostCreationStates
 from bot.utils.deep_link import extract_start_token
 
 router = Router()
 logger = logging.getLogger(__name__)
 
+CONFIRMED_WELCOME_TEXT = """🥌 Ты в деле — добро пожаловать в бот «Неделя кёрлинга» в Москве!
+Регистрация есть ✅
+Подписка на канал Федерации тоже ✅
+
+➡️ Дальше всё просто: этот бот — твой «штаб» на время проекта.
+
+Зачем он нужен?
+Чтобы не искать информацию по чатам и постам — мы будем присылать сюда:
+— быстрые апдейты (если что-то поменялось по времени/площадке)
+— фотки и лучшие моменты дня 📸
+— короткие подсказки для новичков (чтобы на льду чувствовать себя уверенно)
+
+Оставайся с нами — будет движ и кёрлинг ❤️"""
+
 
 @router.message(CommandStart())
-async def start_handler(message: Message, command: CommandObject) -> None:
+async def start_handler(
+    message: Message, command: CommandObject, container: AppContainer
+) -> None:
     logger.info("DEBUG: start_handler triggered")
     token = extract_start_token(message.text, command.args)
 
@@ -50,13 +64,9 @@ async def start_handler(message: Message, command: CommandObject) -> None:
         len(token) if token else 0,
     )
 
-    service = RegistrationService(
-        session_maker=message.bot.session_maker,
-        user_repository=UserRepository(),
-        token_verifier=get_token_verifier(message.bot.settings.jwt_public_key),
-        admin_ids=message.bot.settings.admin_ids,
+    result = await container.registration_service.handle_start(
+        tg_id=tg_id, username=username, token=token
     )
-    result = await service.handle_start(tg_id=tg_id, username=username, token=token)
 
     if not result.token_provided:
         await message.answer(
@@ -76,18 +86,13 @@ async def start_handler(message: Message, command: CommandObject) -> None:
         return
 
     if result.token_valid:
-        required_channel_ids = get_required_channel_ids_for_check(
-            message.bot.settings.required_channels
-        )
-        if not required_channel_ids:
+        if not container.required_channel_ids:
             logger.error("required_channels is empty after normalization")
             await message.answer(
                 "Проверка временно недоступна. Попробуй позже."
             )
             return
-        channels_presentation = build_subscription_channels_presentation(
-            required_channels=message.bot.settings.required_channels,
-        )
+        channels_presentation = container.channels_presentation
         reply_markup = None
         if channels_presentation.has_links:
             reply_markup = subscription_links_keyboard(channels_presentation.links)
@@ -105,18 +110,14 @@ async def start_handler(message: Message, command: CommandObject) -> None:
 
 
 @router.callback_query(F.data == CHECK_SUBSCRIPTION_CALLBACK)
-async def check_subscription_handler(callback: CallbackQuery) -> None:
+async def check_subscription_handler(callback: CallbackQuery, container: AppContainer) -> None:
     tg_id = callback.from_user.id if callback.from_user else 0
     username = callback.from_user.username if callback.from_user else None
     logger.info("Subscription check callback for tg_id=%s", tg_id)
 
-    service = SubscriptionCheckerService(
-        session_maker=callback.bot.session_maker,
-        user_repository=UserRepository(),
-        required_channels=callback.bot.settings.required_channels,
-        bot=callback.bot,
+    result = await container.subscription_checker.check_subscription(
+        tg_id=tg_id, username=username
     )
-    result = await service.check_subscription(tg_id=tg_id, username=username)
     await callback.answer()
 
     if result.rate_limited:
@@ -138,19 +139,7 @@ async def check_subscription_handler(callback: CallbackQuery) -> None:
         if result.confirmed_now:
             reply_markup = confirmed_menu_keyboard()
         await callback.message.answer(
-            """🥌 Ты в деле — добро пожаловать в бот «Неделя кёрлинга» в Москве!
-Регистрация есть ✅
-Подписка на канал Федерации тоже ✅
-
-➡️ Дальше всё просто: этот бот — твой «штаб» на время проекта.
-
-Зачем он нужен?
-Чтобы не искать информацию по чатам и постам — мы будем присылать сюда:
-— быстрые апдейты (если что-то поменялось по времени/площадке)
-— фотки и лучшие моменты дня 📸
-— короткие подсказки для новичков (чтобы на льду чувствовать себя уверенно)
-
-Оставайся с нами — будет движ и кёрлинг ❤️""",
+            CONFIRMED_WELCOME_TEXT,
             reply_markup=reply_markup
         )
         return
@@ -160,6 +149,27 @@ async def check_subscription_handler(callback: CallbackQuery) -> None:
     )
 
 
+@router.chat_join_request()
+async def chat_join_request_handler(
+    join_request: ChatJoinRequest, container: AppContainer
+) -> None:
+    tg_id = join_request.from_user.id
+    logger.info("Chat join request tg_id=%s chat_id=%s", tg_id, join_request.chat.id)
+
+    result = await container.subscription_checker.handle_join_request(
+        tg_id=tg_id,
+        username=join_request.from_user.username,
+        chat_id=join_request.chat.id,
+    )
+    if not result.confirmed_now:
+        return
+
+    await join_request.bot.send_message(
+        chat_id=join_request.user_chat_id,
+        text=CONFIRMED_WELCOME_TEXT,
+        reply_markup=confirmed_menu_keyboard(),
+    )
+
 
 
 @router.message(F.text == BACK_BUTTON)
@@ -181,7 +191,7 @@ async def back_button_handler(message: Message, state: FSMContext) -> None:
     & ~F.text.startswith("/")
     & ~F.text.in_({SCHEDULE_BUTTON, FAQ_BUTTON, CONTACTS_BUTTON, PHOTO_BUTTON, BACK_BUTTON})
 )
-async def confirmed_user_fallback(message: Message, state: FSMContext) -> None:
+async def confirmed_user_fallback(message: Message, state: FSMContext, uow: UnitOfWork) -> None:
     if message.from_user is None:
         return
     current_state = await state.get_state()
@@ -192,18 +202,9 @@ async def confirmed_user_fallback(message: Message, state: FSMContext) -> None:
         admin_id,
         (message.text or "")[:30],
     )
-    editing_service = PageEditingService(
-        session_maker=message.bot.session_maker,
-        user_repository=UserRepository(),
-    )
-    editing_key = await editing_service.get_editing_key(message.from_user.id)
-    if editing_key is not None:
+    user_status = await uow.get_user_status()
+    if user_status is None or user_status.editing_page_key is not None:
         return
-    service = UserStatusService(
-        session_maker=message.bot.session_maker,
-        user_repository=UserRepository(),
-    )
-    status = await service.get_status(message.from_user.id)
-    if status != RegistrationStatus.CONFIRMED:
+    if user_status.status != RegistrationStatus.CONFIRMED:
         return
     await message.answer("Выберите пункт меню", reply_markup=confirmed_menu_keyboard())
@@ -1,29 +1,118 @@
+import argparse
 import asyncio
 import logging
 
-from aiogram import Bot
-
 from bot.config import load_settings
-from bot.db.session import create_sessionmaker
+from bot.container import build_container
+from bot.db.coordination import LeaderElector
+from bot.db.notify import PgNotificationListener, asyncpg_dsn
+from bot.db.pool import warm_up_pool
 from bot.dispatcher import setup_dispatcher
+from bot.metrics_server import start_metrics_server
+from bot.services.subscription_sweeper import SubscriptionSweeper
+from bot.storage import PostgresEphemeralStore
+from bot.storage.page_repository import PAGE_CHANGED_CHANNEL
+from bot.storage.user_status_cache import USER_STATUS_CHANNEL
 from bot.utils.bot_commands import setup_bot_commands
+from bot.webhook import run_webhook
 
 
-async def main() -> None:
+async def main(mode: str = "polling") -> None:
     logging.basicConfig(level=logging.INFO)
     settings = load_settings()
 
-    engine, session_maker = create_sessionmaker(settings)
+    container = build_container(settings)
+    bot = container.bot
+    await warm_up_pool(container.engine, settings.db_pool_warm_up_connections)
+    page_service = container.page_service
+    await page_service.warm_up()
+    admin_fingerprint = ",".join(str(admin_id) for admin_id in sorted(settings.admin_ids))
+    await container.coordinator.run_once("setup_bot_commands", fingerprint=admin_fingerprint)(
+        setup_bot_commands
+    )(bot, settings)
+
+    background_tasks: list[asyncio.Task] = []
+    # Periodic jobs run on the elected leader replica only; the LISTEN
+    # subscriptions keep the caches of every replica fresh.
+    singleton_jobs = []
+    ephemeral_store = container.ephemeral_store
+    if isinstance(ephemeral_store, PostgresEphemeralStore):
+        singleton_jobs.append(
+            lambda _token: ephemeral_store.run_cleanup_forever(
+                settings.ephemeral_store_cleanup_interval_seconds
+            )
+        )
+    if settings.user_status_cache_notify:
+        listener = PgNotificationListener(
+            dsn=asyncpg_dsn(settings.database_url),
+            channel=USER_STATUS_CHANNEL,
+            on_notify=container.user_status_cache.handle_notification,
+            on_connect=container.user_status_cache.clear,
+        )
+        background_tasks.append(asyncio.create_task(listener.run_forever()))
+    if settings.page_cache_notify:
+        listener = PgNotificationListener(
+            dsn=asyncpg_dsn(settings.database_url),
+            channel=PAGE_CHANGED_CHANNEL,
+            on_notify=page_service.handle_change_notification,
+            on_connect=page_service.resync,
+        )
+        background_tasks.append(asyncio.create_task(listener.run_forever()))
+    if settings.subscription_sweep_enabled:
+        sweeper = SubscriptionSweeper(
+            session_maker=container.session_maker,
+            user_repository=container.user_repository,
+            job_state_repository=container.job_state_repository,
+            required_channels=settings.required_channels,
+            bot=bot,
+            interval_seconds=settings.subscription_sweep_interval_seconds,
+            batch_size=settings.subscription_sweep_batch_size,
+            api_calls_per_second=settings.subscription_sweep_api_calls_per_second,
+        )
+        singleton_jobs.append(sweeper.run_forever)
+
+    singleton_jobs.append(
+        lambda _token: container.fsm_storage.run_cleanup_forever(
+            settings.fsm_storage_cleanup_interval_seconds
+        )
+    )
+    elector = LeaderElector(
+        container.coordinator,
+        "singleton_jobs",
+        singleton_jobs,
+        lease_seconds=settings.leader_lease_seconds,
+        renew_interval_seconds=settings.leader_renew_interval_seconds,
+    )
+    background_tasks.append(asyncio.create_task(elector.run_forever()))
+
+    dispatcher = setup_dispatcher(container)
+    metrics_server = None
+    if settings.metrics_enabled:
+        metrics_server = await start_metrics_server(settings.metrics_host, settings.metrics_port)
+    try:
+        if mode == "webhook":
+            await run_webhook(dispatcher, bot, settings)
+        else:
+            await dispatcher.start_polling(bot)
+    finally:
+        await container.post_service.stop_broadcasts()
+        await container.post_draft_store.flush_all()
+        if metrics_server is not None:
+            await metrics_server.cleanup()
+        for task in background_tasks:
+            task.cancel()
 
-    bot = Bot(token=settings.bot_token)
-    bot.settings = settings
-    bot.engine = engine
-    bot.session_maker = session_maker
-    await setup_bot_commands(bot, settings)
 
-    dispatcher = setup_dispatcher()
-    await dispatcher.start_polling(bot)
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Curling week bot")
+    parser.add_argument(
+        "--mode",
+        choices=("polling", "webhook"),
+        default="polling",
+        help="polling for development, webhook behind a public HTTPS endpoint",
+    )
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(main(parse_args().mode))
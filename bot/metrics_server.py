@@ -0,0 +1,38 @@
+"""Prometheus ``GET /metrics`` over aiohttp.
+
+:func:`start_metrics_server` opens a server of its own on
+``METRICS_HOST:METRICS_PORT`` in both run modes. In webhook mode it is kept
+off the public webhook listener, which anyone who can reach the bot's URL
+can talk to.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from aiohttp import web
+
+from bot.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = "/metrics"
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=REGISTRY.render(), content_type="text/plain")
+
+
+def add_metrics_route(app: web.Application) -> None:
+    app.router.add_get(METRICS_PATH, handle_metrics)
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve ``/metrics`` on ``host:port``; call ``cleanup()`` on the result to stop."""
+    app = web.Application()
+    add_metrics_route(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Metrics available on http://%s:%s%s", host, port, METRICS_PATH)
+    return runner
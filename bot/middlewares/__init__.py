@@ -0,0 +1,10 @@
+from bot.middlewares.timing import HandlerTimingMiddleware
+from bot.middlewares.throttling import ThrottlingMiddleware, create_throttling_middleware
+from bot.middlewares.unit_of_work import UnitOfWorkMiddleware
+
+__all__ = [
+    "HandlerTimingMiddleware",
+    "ThrottlingMiddleware",
+    "UnitOfWorkMiddleware",
+    "create_throttling_middleware",
+]
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable, Collection
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update
+
+from bot.config import Settings
+from bot.utils.metrics import Counter
+from bot.utils.throttling import TokenBucketLimiter
+
+logger = logging.getLogger(__name__)
+
+UPDATES_THROTTLED = Counter(
+    "bot_updates_throttled_total", "Updates dropped by the per-user flood limit, by kind."
+)
+
+KIND_COMMAND = "command"
+KIND_CALLBACK = "callback"
+KIND_MESSAGE = "message"
+
+THROTTLED_MESSAGE_TEXT = "Слишком много сообщений подряд. Подожди немного и попробуй снова."
+THROTTLED_CALLBACK_TEXT = "Слишком часто. Подожди немного."
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Drops updates from users who exceed their token bucket.
+
+    Commands, button presses and other messages have separate budgets
+    (``limiters`` is keyed by kind; a missing kind is not limited). The
+    first rejected update of a burst gets a short answer when ``notify`` is
+    set; the rest are dropped silently. Admins are never throttled.
+
+    Registered in front of all routers and of the unit of work, so dropped
+    updates cost no database work.
+    """
+
+    def __init__(
+        self,
+        limiters: dict[str, TokenBucketLimiter],
+        *,
+        admin_ids: Collection[int],
+        notify: bool = True,
+    ) -> None:
+        self._limiters = limiters
+        self._admin_ids = admin_ids
+        self._notify = notify
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        kind, source = _classify(event)
+        limiter = self._limiters.get(kind) if kind is not None else None
+        if limiter is None or user is None or user.id in self._admin_ids:
+            return await handler(event, data)
+
+        key = user.id
+        if limiter.acquire(key):
+            return await handler(event, data)
+
+        UPDATES_THROTTLED.inc(kind=kind)
+        if self._notify and limiter.should_notify(key):
+            logger.info("Throttling tg_id=%s kind=%s", key, kind)
+            if isinstance(source, CallbackQuery):
+                await source.answer(THROTTLED_CALLBACK_TEXT)
+            else:
+                await source.answer(THROTTLED_MESSAGE_TEXT)
+        elif isinstance(source, CallbackQuery):
+            # Stop the button's loading spinner without saying anything.
+            await source.answer()
+        return None
+
+
+def create_throttling_middleware(settings: Settings) -> ThrottlingMiddleware | None:
+    """Build the middleware from ``THROTTLE_*`` settings; a rate of ``0`` disables that kind."""
+    if not settings.throttle_enabled:
+        return None
+    budgets = {
+        KIND_COMMAND: (settings.throttle_commands_per_minute, settings.throttle_command_burst),
+        KIND_CALLBACK: (settings.throttle_callbacks_per_minute, settings.throttle_callback_burst),
+        KIND_MESSAGE: (settings.throttle_messages_per_minute, settings.throttle_message_burst),
+    }
+    limiters = {
+        kind: TokenBucketLimiter(
+            per_minute / 60, burst, max_keys=settings.throttle_max_users
+        )
+        for kind, (per_minute, burst) in budgets.items()
+        if per_minute > 0
+    }
+    return ThrottlingMiddleware(
+        limiters,
+        admin_ids=frozenset(settings.admin_ids),
+        notify=settings.throttle_notify,
+    )
+
+
+def _classify(event: TelegramObject) -> tuple[str | None, Message | CallbackQuery | None]:
+    if not isinstance(event, Update):
+        return None, None
+    if event.callback_query is not None:
+        return KIND_CALLBACK, event.callback_query
+    message = event.message
+    if message is None:
+        return None, None
+    if (message.text or "").startswith("/"):
+        return KIND_COMMAND, message
+    return KIND_MESSAGE, message
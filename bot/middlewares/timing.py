@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject
+
+from bot.utils.metrics import Counter, Histogram
+
+HANDLER_SECONDS = Histogram("bot_handler_seconds", "Time spent inside a handler, by handler.")
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total", "Handlers that raised, by handler and exception class."
+)
+
+
+class HandlerTimingMiddleware(BaseMiddleware):
+    """Times every handler call; register it as an inner middleware on the dispatcher.
+
+    Inner middlewares of the dispatcher wrap the handlers of all included
+    routers, and only run once a handler has matched, so ``data["handler"]``
+    names the function that actually handled the update.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        name = handler_name(data.get("handler"))
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as exc:
+            HANDLER_ERRORS.inc(handler=name, error=type(exc).__name__)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, handler=name)
+
+
+def handler_name(handler: HandlerObject | None) -> str:
+    if handler is None:
+        return "unknown"
+    callback = handler.callback
+    module = getattr(callback, "__module__", "").removeprefix("bot.handlers.")
+    name = getattr(callback, "__qualname__", type(callback).__name__)
+    return f"{module}.{name}" if module else name
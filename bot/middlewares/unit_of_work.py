@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User as TelegramUser
+
+from bot.db.unit_of_work import UnitOfWork
+from bot.utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+UPDATE_QUERIES = Histogram(
+    "bot_update_db_queries",
+    "SQL statements sent while handling one update.",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50),
+)
+UPDATE_QUERY_SECONDS = Histogram(
+    "bot_update_db_seconds",
+    "Total time one update spent waiting for SQL statements.",
+)
+
+
+class UnitOfWorkMiddleware(BaseMiddleware):
+    """Gives every update a :class:`UnitOfWork` as the ``uow`` handler argument."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        from_user: TelegramUser | None = data.get("event_from_user")
+        container = data["container"]
+        unit_of_work = UnitOfWork(
+            session_maker=container.session_maker,
+            user_repository=container.user_repository,
+            tg_id=from_user.id if from_user else None,
+        )
+        data["uow"] = unit_of_work
+        token = unit_of_work.bind()
+        try:
+            return await handler(event, data)
+        finally:
+            UnitOfWork.unbind(token)
+            await unit_of_work.close()
+            UPDATE_QUERIES.observe(unit_of_work.query_count)
+            UPDATE_QUERY_SECONDS.observe(unit_of_work.query_seconds)
+            logger.debug(
+                "Update finished sessions=%s queries=%s db_time=%.1fms",
+                unit_of_work.sessions_opened,
+                unit_of_work.query_count,
+                unit_of_work.query_seconds * 1000,
+            )
@@ -1,5 +1,18 @@
+from bot.models.ephemeral_entry import EphemeralEntry
+from bot.models.fsm_state import FsmState
+from bot.models.job_state import JobState
 from bot.models.page import Page
+from bot.models.page_draft import PageDraft
 from bot.models.post import Post
 from bot.models.user import RegistrationStatus, User
 
-__all__ = ["Page", "Post", "RegistrationStatus", "User"]
+__all__ = [
+    "EphemeralEntry",
+    "FsmState",
+    "JobState",
+    "Page",
+    "PageDraft",
+    "Post",
+    "RegistrationStatus",
+    "User",
+]
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from bot.db.base import Base
+
+
+class PageDraft(Base):
+    """Unpublished edit of a page by one admin; mirrors the content columns of ``pages``."""
+
+    __tablename__ = "page_drafts"
+
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    editor_tg_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    base_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    content_type: Mapped[str] = mapped_column(String(20), nullable=False, default="text")
+    text: Mapped[str | None] = mapped_column(Text, nullable=True)
+    entities: Mapped[list[dict] | None] = mapped_column(JSONB, nullable=True)
+    file_id: Mapped[str | None] = mapped_column(Text, nullable=True)
+    caption: Mapped[str | None] = mapped_column(Text, nullable=True)
+    caption_entities: Mapped[list[dict] | None] = mapped_column(JSONB, nullable=True)
+    extra_document_file_id: Mapped[str | None] = mapped_column(Text, nullable=True)
+    extra_document_caption: Mapped[str | None] = mapped_column(Text, nullable=True)
+    extra_document_caption_entities: Mapped[list[dict] | None] = mapped_column(JSONB, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, Integer, String, Text
+from sqlalchemy import BigInteger, DateTime, Index, Integer, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -9,6 +9,16 @@ from bot.db.base import Base
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index(
+            "ix_posts_active_draft",
+            "created_by",
+            "created_at",
+            postgresql_where=text("status = 'draft'"),
+        ),
+        Index("ix_posts_created_at", "created_at"),
+        Index("ix_posts_status", "status"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     created_at: Mapped[datetime] = mapped_column(
@@ -25,3 +35,6 @@ class Post(Base):
     sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     sent_count_success: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     sent_count_failed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    draft_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
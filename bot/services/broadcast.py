@@ -14,7 +14,7 @@ from aiogram.exceptions import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from bot.storage import PostRepository, UserRepository
+from bot.storage import PostDraft, PostRepository, UserRepository
 from bot.models import Post
 from bot.services.post_service import PostService
 
@@ -47,6 +47,7 @@ class BroadcastService:
             if post.status != "draft":
                 raise ValueError("post already processed")
             user_ids = await self._user_repository.list_confirmed_user_ids(session)
+        draft = self._post_service.as_draft(post)
 
         total = len(user_ids)
         success_count = 0
@@ -55,7 +56,7 @@ class BroadcastService:
 
         for index, tg_id in enumerate(user_ids, start=1):
             try:
-                await self._send_with_retry(bot, tg_id, post)
+                await self._send_with_retry(bot, tg_id, draft)
                 success_count += 1
             except (TelegramForbiddenError, TelegramNotFound) as exc:
                 fail_count += 1
@@ -97,7 +98,7 @@ class BroadcastService:
         )
         return success_count, fail_count
 
-    async def _send_with_retry(self, bot: Bot, tg_id: int, post: Post) -> None:
+    async def _send_with_retry(self, bot: Bot, tg_id: int, post: Post | PostDraft) -> None:
         attempts = 0
         while True:
             try:
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import (
+    InputMediaAnimation,
+    InputMediaDocument,
+    InputMediaPhoto,
+    InputMediaVideo,
+    Message,
+)
+
+from bot.storage import EphemeralStore, MemoryEphemeralStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DRAFT_PREVIEW_DEBOUNCE_SECONDS = 1.0
+# After a day without changes the preview is sent anew instead of edited.
+_SENT_PREVIEW_TTL_SECONDS = 86400.0
+
+_INPUT_MEDIA = {
+    "photo": InputMediaPhoto,
+    "video": InputMediaVideo,
+    "animation": InputMediaAnimation,
+    "document": InputMediaDocument,
+}
+
+
+@dataclass(frozen=True)
+class PreviewContent:
+    """One message of a draft preview.
+
+    ``kind`` is ``text`` or one of the media types in ``_INPUT_MEDIA``;
+    ``text``/``entities`` hold the caption for media. ``fallback`` is sent
+    instead when Telegram rejects the media itself.
+    """
+
+    kind: str
+    text: str | None = None
+    entities: list | None = None
+    file_id: str | None = None
+    reply_markup: Any = None
+    fallback: PreviewContent | None = None
+
+
+@dataclass
+class _SentPreview:
+    message_id: int
+    kind: str
+    file_id: str | None
+    digest: str
+
+    @classmethod
+    def of(cls, message_id: int, content: PreviewContent) -> _SentPreview:
+        return cls(message_id, content.kind, content.file_id, _digest(content))
+
+
+def _digest(content: PreviewContent) -> str:
+    return hashlib.sha1(repr(content).encode()).hexdigest()
+
+
+class DraftPreviewer:
+    """Coalesces draft previews per chat and updates them in place.
+
+    A preview is an ordered set of named slots (e.g. main content, attached
+    document, status line). ``schedule`` only remembers the latest slots;
+    once the chat has been quiet for ``debounce_seconds`` the preview is
+    published: unchanged slots cost nothing, changed ones are edited through
+    ``editMessageText``/``editMessageMedia``/``editMessageCaption``. A slot is
+    re-sent only when it switches between text and media, when its old
+    message cannot be edited, or when an earlier slot was re-sent (so the
+    order in the chat stays the same).
+
+    Which messages make up the current preview is kept in ``store``, so with
+    the Postgres backend the next update of the same draft edits them even
+    when another replica handles it. Debouncing stays per process.
+    """
+
+    def __init__(
+        self,
+        debounce_seconds: float = DEFAULT_DRAFT_PREVIEW_DEBOUNCE_SECONDS,
+        store: EphemeralStore | None = None,
+    ) -> None:
+        self._debounce_seconds = debounce_seconds
+        self._store = store if store is not None else MemoryEphemeralStore()
+        self._pending: dict[tuple[int, str], tuple[Bot, dict[str, PreviewContent | None]]] = {}
+        self._tasks: dict[tuple[int, str], asyncio.Task] = {}
+        self._locks: dict[tuple[int, str], asyncio.Lock] = {}
+        self.api_calls = 0
+
+    def schedule(
+        self,
+        bot: Bot,
+        chat_id: int,
+        scope: str,
+        slots: dict[str, PreviewContent | None],
+    ) -> None:
+        key = (chat_id, scope)
+        self._pending[key] = (bot, slots)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        self._tasks[key] = asyncio.create_task(self._publish_later(key))
+
+    async def flush(self, chat_id: int, scope: str) -> None:
+        key = (chat_id, scope)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        await self._publish(key)
+
+    async def forget(self, chat_id: int, scope: str) -> None:
+        """Drop pending and sent state; the next preview starts with new messages."""
+        key = (chat_id, scope)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+        self._pending.pop(key, None)
+        await self._store.delete(_store_key(key))
+
+    async def _publish_later(self, key: tuple[int, str]) -> None:
+        await asyncio.sleep(self._debounce_seconds)
+        self._tasks.pop(key, None)
+        try:
+            await self._publish(key)
+        except Exception:
+            logger.exception("Failed to publish draft preview chat_id=%s scope=%s", *key)
+
+    async def _publish(self, key: tuple[int, str]) -> None:
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            pending = self._pending.pop(key, None)
+            if pending is None:
+                return
+            bot, slots = pending
+            chat_id = key[0]
+            sent = await self._load_sent(key)
+            try:
+                await self._apply(bot, chat_id, sent, slots)
+            finally:
+                await self._save_sent(key, sent)
+
+    async def _apply(
+        self,
+        bot: Bot,
+        chat_id: int,
+        sent: dict[str, _SentPreview],
+        slots: dict[str, PreviewContent | None],
+    ) -> None:
+        resend = False
+        for name in list(sent):
+            if slots.get(name) is None:
+                await self._delete(bot, chat_id, sent.pop(name))
+        for name, content in slots.items():
+            if content is None:
+                continue
+            previous = sent.get(name)
+            if previous is not None and not resend:
+                if previous.digest == _digest(content):
+                    continue
+                if (previous.kind == "text") == (content.kind == "text"):
+                    if await self._edit(bot, chat_id, previous, content):
+                        sent[name] = _SentPreview.of(previous.message_id, content)
+                        continue
+            resend = True
+            if previous is not None:
+                await self._delete(bot, chat_id, previous)
+            message = await self._send(bot, chat_id, content)
+            sent[name] = _SentPreview.of(message.message_id, content)
+
+    async def _load_sent(self, key: tuple[int, str]) -> dict[str, _SentPreview]:
+        raw = await self._store.get(_store_key(key))
+        if not raw:
+            return {}
+        return {name: _SentPreview(*fields) for name, fields in json.loads(raw).items()}
+
+    async def _save_sent(self, key: tuple[int, str], sent: dict[str, _SentPreview]) -> None:
+        raw = json.dumps(
+            {
+                name: [preview.message_id, preview.kind, preview.file_id, preview.digest]
+                for name, preview in sent.items()
+            }
+        )
+        await self._store.set(_store_key(key), raw, _SENT_PREVIEW_TTL_SECONDS)
+
+    async def _send(self, bot: Bot, chat_id: int, content: PreviewContent) -> Message:
+        self.api_calls += 1
+        try:
+            if content.kind == "text":
+                return await bot.send_message(
+                    chat_id=chat_id,
+                    text=content.text or "",
+                    entities=content.entities,
+                    reply_markup=content.reply_markup,
+                )
+            # send_photo(photo=...), send_video(video=...) and so on.
+            method = getattr(bot, f"send_{content.kind}")
+            return await method(
+                chat_id=chat_id,
+                caption=content.text,
+                caption_entities=content.entities,
+                reply_markup=content.reply_markup,
+                **{content.kind: content.file_id},
+            )
+        except TelegramBadRequest:
+            if content.fallback is None:
+                raise
+            return await self._send(bot, chat_id, content.fallback)
+
+    async def _edit(
+        self, bot: Bot, chat_id: int, previous: _SentPreview, content: PreviewContent
+    ) -> bool:
+        self.api_calls += 1
+        try:
+            if content.kind == "text":
+                await bot.edit_message_text(
+                    text=content.text or "",
+                    chat_id=chat_id,
+                    message_id=previous.message_id,
+                    entities=content.entities,
+                    reply_markup=content.reply_markup,
+                )
+            elif previous.kind == content.kind and previous.file_id == content.file_id:
+                await bot.edit_message_caption(
+                    chat_id=chat_id,
+                    message_id=previous.message_id,
+                    caption=content.text,
+                    caption_entities=content.entities,
+                    reply_markup=content.reply_markup,
+                )
+            else:
+                await bot.edit_message_media(
+                    media=_INPUT_MEDIA[content.kind](
+                        media=content.file_id,
+                        caption=content.text,
+                        caption_entities=content.entities,
+                    ),
+                    chat_id=chat_id,
+                    message_id=previous.message_id,
+                    reply_markup=content.reply_markup,
+                )
+        except TelegramBadRequest as exc:
+            if "message is not modified" in str(exc):
+                return True
+            logger.info(
+                "Draft preview message_id=%s cannot be edited, sending a new one: %s",
+                previous.message_id,
+                exc,
+            )
+            return False
+        return True
+
+    async def _delete(self, bot: Bot, chat_id: int, previous: _SentPreview) -> None:
+        self.api_calls += 1
+        try:
+            await bot.delete_message(chat_id=chat_id, message_id=previous.message_id)
+        except TelegramBadRequest as exc:
+            logger.info("Draft preview message_id=%s not deleted: %s", previous.message_id, exc)
+
+
+def _store_key(key: tuple[int, str]) -> str:
+    return "draft_preview:%s:%s" % key
@@ -1,18 +1,25 @@
 from __future__ import annotations
 
+import logging
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Iterable
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from bot.storage import PageRepository
+from bot.models import Page, PageDraft
+from bot.storage import PageDraftRepository, PageRepository
 from bot.utils import deserialize_entities
 
+logger = logging.getLogger(__name__)
+
 PAGE_KEY_FAQ = "faq"
 PAGE_KEY_CONTACTS = "contacts"
 PAGE_KEY_SCHEDULE = "schedule"
 PAGE_KEY_PHOTO = "photo"
 
+PAGE_KEYS = (PAGE_KEY_FAQ, PAGE_KEY_CONTACTS, PAGE_KEY_SCHEDULE, PAGE_KEY_PHOTO)
+
 DEFAULT_PAGE_MESSAGE = "Эта страница пока не настроена."
 
 
@@ -22,6 +29,14 @@ class PageResult:
     content: str | None
 
 
+@dataclass(frozen=True)
+class DraftPublishResult:
+    published: bool
+    # Set when someone else published the page after this draft was started;
+    # their changes were overwritten.
+    overwritten_version: int | None = None
+
+
 @dataclass(frozen=True)
 class PageRender:
     main_content_type: str
@@ -33,6 +48,39 @@ class PageRender:
     extra_document_file_id: str | None = None
     extra_document_caption: str | None = None
     extra_document_caption_entities: list | None = None
+    version: int = 0
+
+
+class PageRenderCache:
+    """Fully built ``PageRender`` objects per page key, shared by the process.
+
+    Every key carries a generation number that ``invalidate`` bumps. A
+    render loaded before an edit committed is only stored if the generation
+    is still the one seen before the load, so a slow reader cannot put stale
+    content back after the invalidation.
+    """
+
+    def __init__(self, *, publish_invalidations: bool = False) -> None:
+        self._renders: dict[str, PageRender] = {}
+        self._generations: dict[str, int] = {}
+        self.publish_invalidations = publish_invalidations
+
+    def keys(self) -> list[str]:
+        return list(self._renders)
+
+    def get(self, key: str) -> PageRender | None:
+        return self._renders.get(key)
+
+    def generation(self, key: str) -> int:
+        return self._generations.get(key, 0)
+
+    def store(self, key: str, render: PageRender, generation: int) -> None:
+        if self.generation(key) == generation:
+            self._renders[key] = render
+
+    def invalidate(self, key: str) -> None:
+        self._generations[key] = self.generation(key) + 1
+        self._renders.pop(key, None)
 
 
 class PageService:
@@ -40,9 +88,13 @@ class PageService:
         self,
         session_maker: async_sessionmaker[AsyncSession],
         page_repository: PageRepository,
+        render_cache: PageRenderCache | None = None,
+        draft_repository: PageDraftRepository | None = None,
     ) -> None:
         self._session_maker = session_maker
         self._page_repository = page_repository
+        self._render_cache = render_cache
+        self._draft_repository = draft_repository or PageDraftRepository()
 
     async def get_page(self, key: str) -> PageResult:
         async with self._session_maker() as session:
@@ -57,43 +109,66 @@ class PageService:
             return PageResult(key=key, content=page.content)
 
     async def render_page(self, key: str) -> PageRender:
+        if self._render_cache is None:
+            async with self._session_maker() as session:
+                page = await self._page_repository.get_by_key(session, key)
+                return _build_render(page, page.version if page is not None else 0)
+
+        render = self._render_cache.get(key)
+        if render is not None:
+            return render
+        generation = self._render_cache.generation(key)
         async with self._session_maker() as session:
             page = await self._page_repository.get_by_key(session, key)
-            if page is None:
-                return PageRender(main_content_type="text", main_text=None)
-
-            extra_document_file_id = page.extra_document_file_id
-            extra_document_caption = page.extra_document_caption or ""
-            extra_document_caption_entities = deserialize_entities(page.extra_document_caption_entities)
-
-            if page.content_type == "photo" and page.file_id:
-                return PageRender(
-                    main_content_type="photo",
-                    main_photo_file_id=page.file_id,
-                    main_photo_caption=page.caption or "",
-                    main_photo_caption_entities=deserialize_entities(page.caption_entities),
-                    extra_document_file_id=extra_document_file_id,
-                    extra_document_caption=extra_document_caption,
-                    extra_document_caption_entities=extra_document_caption_entities,
-                )
+            render = _build_render(page, page.version if page is not None else 0)
+        self._render_cache.store(key, render, generation)
+        return render
+
+    async def warm_up(self, keys: Iterable[str] = PAGE_KEYS) -> None:
+        """Load the given pages into the render cache with a single query."""
+        if self._render_cache is None:
+            return
+        keys = list(keys)
+        generations = {key: self._render_cache.generation(key) for key in keys}
+        async with self._session_maker() as session:
+            pages = await self._page_repository.list_by_keys(session, keys)
+            pages_by_key = {page.key: page for page in pages}
+            renders = {}
+            for key in keys:
+                page = pages_by_key.get(key)
+                renders[key] = _build_render(page, page.version if page is not None else 0)
+        for key, render in renders.items():
+            self._render_cache.store(key, render, generations[key])
 
-            if page.content_type == "document" and page.file_id and not extra_document_file_id:
-                extra_document_file_id = page.file_id
-                extra_document_caption = page.caption or ""
-                extra_document_caption_entities = deserialize_entities(page.caption_entities)
-
-            text = page.text if page.text is not None else page.content
-            text = text.strip()
-            if not text:
-                text = None
-            return PageRender(
-                main_content_type="text",
-                main_text=text,
-                main_entities=deserialize_entities(page.entities),
-                extra_document_file_id=extra_document_file_id,
-                extra_document_caption=extra_document_caption,
-                extra_document_caption_entities=extra_document_caption_entities,
-            )
+    async def reload_page(self, key: str) -> PageRender:
+        self._invalidate(key)
+        return await self.render_page(key)
+
+    async def handle_change_notification(self, payload: str) -> None:
+        """Reload one page after another instance announced ``key:version``."""
+        if self._render_cache is None:
+            return
+        key, _, raw_version = payload.rpartition(":")
+        try:
+            version = int(raw_version)
+        except ValueError:
+            logger.warning("Malformed page change payload=%r, resyncing", payload)
+            await self.resync()
+            return
+        cached = self._render_cache.get(key)
+        if cached is not None and cached.version >= version:
+            return
+        logger.info("Reloading page key=%s version=%s", key, version)
+        await self.reload_page(key)
+
+    async def resync(self) -> None:
+        """Drop and reload every page, for when change notifications may have been missed."""
+        if self._render_cache is None:
+            return
+        keys = sorted(set(PAGE_KEYS) | set(self._render_cache.keys()))
+        for key in keys:
+            self._invalidate(key)
+        await self.warm_up(keys)
 
     async def update_page(self, key: str, content: str) -> PageResult:
         async with self._session_maker() as session:
@@ -105,7 +180,9 @@ class PageService:
                     entities=None,
                 )
                 page.updated_at = datetime.utcnow()
-            return PageResult(key=key, content=content)
+                await self._publish(session, page)
+        self._invalidate(key)
+        return PageResult(key=key, content=content)
 
     async def update_page_text(self, key: str, text: str, entities: list[dict] | None) -> None:
         async with self._session_maker() as session:
@@ -117,6 +194,8 @@ class PageService:
                     entities=entities,
                 )
                 page.updated_at = datetime.utcnow()
+                await self._publish(session, page)
+        self._invalidate(key)
 
     async def update_page_photo(
         self,
@@ -135,6 +214,8 @@ class PageService:
                     caption_entities=caption_entities,
                 )
                 page.updated_at = datetime.utcnow()
+                await self._publish(session, page)
+        self._invalidate(key)
 
     async def update_page_document(
         self,
@@ -153,3 +234,172 @@ class PageService:
                     caption_entities=caption_entities,
                 )
                 page.updated_at = datetime.utcnow()
+                await self._publish(session, page)
+        self._invalidate(key)
+
+    async def start_draft(self, key: str, editor_tg_id: int) -> None:
+        """Stage a copy of the live page; later edits touch only the copy."""
+        async with self._session_maker() as session:
+            async with session.begin():
+                page = await self._page_repository.get_by_key(session, key)
+                await self._draft_repository.start_from_page(session, key, page, editor_tg_id)
+
+    async def update_draft_text(
+        self, key: str, editor_tg_id: int, text: str, entities: list[dict] | None
+    ) -> PageRender | None:
+        return await self._update_draft(
+            key,
+            editor_tg_id,
+            content_type="text",
+            content=text,
+            text=text,
+            entities=entities,
+            file_id=None,
+            caption=None,
+            caption_entities=None,
+        )
+
+    async def update_draft_photo(
+        self,
+        key: str,
+        editor_tg_id: int,
+        file_id: str,
+        caption: str | None,
+        caption_entities: list[dict] | None,
+    ) -> PageRender | None:
+        safe_caption = caption or ""
+        return await self._update_draft(
+            key,
+            editor_tg_id,
+            content_type="photo",
+            content=safe_caption,
+            text=None,
+            entities=None,
+            file_id=file_id,
+            caption=safe_caption,
+            caption_entities=caption_entities,
+        )
+
+    async def update_draft_document(
+        self,
+        key: str,
+        editor_tg_id: int,
+        file_id: str,
+        caption: str | None,
+        caption_entities: list[dict] | None,
+    ) -> PageRender | None:
+        return await self._update_draft(
+            key,
+            editor_tg_id,
+            extra_document_file_id=file_id,
+            extra_document_caption=caption or "",
+            extra_document_caption_entities=caption_entities,
+        )
+
+    async def clear_draft_document(self, key: str, editor_tg_id: int) -> PageRender | None:
+        return await self._update_draft(
+            key,
+            editor_tg_id,
+            extra_document_file_id=None,
+            extra_document_caption=None,
+            extra_document_caption_entities=None,
+        )
+
+    async def publish_draft(self, key: str, editor_tg_id: int) -> DraftPublishResult:
+        """Swap the editor's draft into ``pages`` in one transaction and bump the version.
+
+        If another admin published the page after this draft was started,
+        their version is overwritten and reported in the result.
+        """
+        overwritten_version = None
+        async with self._session_maker() as session:
+            async with session.begin():
+                draft = await self._draft_repository.get(
+                    session, key, editor_tg_id, for_update=True
+                )
+                if draft is None:
+                    return DraftPublishResult(published=False)
+                page = await self._page_repository.get_by_key(session, key, for_update=True)
+                if page is None:
+                    page = Page(key=key, version=0)
+                elif page.version != draft.base_version:
+                    overwritten_version = page.version
+                    logger.warning(
+                        "Page key=%s changed while drafting base_version=%s version=%s "
+                        "editor_tg_id=%s, overwriting",
+                        key,
+                        draft.base_version,
+                        page.version,
+                        editor_tg_id,
+                    )
+                self._draft_repository.apply_to_page(draft, page)
+                page.version += 1
+                page.updated_at = datetime.utcnow()
+                session.add(page)
+                await self._draft_repository.delete(session, key, editor_tg_id)
+                await self._publish(session, page)
+        self._invalidate(key)
+        return DraftPublishResult(published=True, overwritten_version=overwritten_version)
+
+    async def discard_draft(self, key: str, editor_tg_id: int) -> None:
+        async with self._session_maker() as session:
+            async with session.begin():
+                await self._draft_repository.delete(session, key, editor_tg_id)
+
+    async def _update_draft(self, key: str, editor_tg_id: int, **values) -> PageRender | None:
+        async with self._session_maker() as session:
+            async with session.begin():
+                draft = await self._draft_repository.update(
+                    session, key, editor_tg_id, **values
+                )
+                if draft is None:
+                    return None
+                return _build_render(draft, draft.base_version)
+
+    async def _publish(self, session: AsyncSession, page: Page) -> None:
+        if self._render_cache is not None and self._render_cache.publish_invalidations:
+            await self._page_repository.notify_changed(session, page)
+
+    def _invalidate(self, key: str) -> None:
+        if self._render_cache is not None:
+            self._render_cache.invalidate(key)
+
+
+def _build_render(page: Page | PageDraft | None, version: int) -> PageRender:
+    if page is None:
+        return PageRender(main_content_type="text", main_text=None)
+
+    extra_document_file_id = page.extra_document_file_id
+    extra_document_caption = page.extra_document_caption or ""
+    extra_document_caption_entities = deserialize_entities(page.extra_document_caption_entities)
+
+    if page.content_type == "photo" and page.file_id:
+        return PageRender(
+            main_content_type="photo",
+            main_photo_file_id=page.file_id,
+            main_photo_caption=page.caption or "",
+            main_photo_caption_entities=deserialize_entities(page.caption_entities),
+            extra_document_file_id=extra_document_file_id,
+            extra_document_caption=extra_document_caption,
+            extra_document_caption_entities=extra_document_caption_entities,
+            version=version,
+        )
+
+    if page.content_type == "document" and page.file_id and not extra_document_file_id:
+        extra_document_file_id = page.file_id
+        extra_document_caption = page.caption or ""
+        extra_document_caption_entities = deserialize_entities(page.caption_entities)
+
+    text = page.text if page.text is not None else page.content
+    text = text.strip()
+    if not text:
+        text = None
+    return PageRender(
+        main_content_type="text",
+        main_text=text,
+        main_entities=deserialize_entities(page.entities),
+        extra_document_file_id=extra_document_file_id,
+        extra_document_caption=extra_document_caption,
+        extra_document_caption_entities=extra_document_caption_entities,
+        version=version,
+    )
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
 import logging
-from copy import deepcopy
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 from aiogram import Bot
 from aiogram.exceptions import (
@@ -18,9 +18,20 @@ from aiogram.exceptions import (
 from aiogram.types import Message
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from bot.db.coordination import ClusterCoordinator, FencingToken, LockBusyError
 from bot.models import Post
-from bot.storage import PostRepository, UserRepository
-from bot.utils import deserialize_entities, serialize_entities, should_notify_document_update
+from bot.services.draft_preview import PreviewContent
+from bot.storage import (
+    EphemeralStore,
+    PostDocument,
+    PostDraft,
+    PostDraftStore,
+    PostMedia,
+    PostRepository,
+    PostText,
+    UserRepository,
+)
+from bot.utils import serialize_entities, should_notify_document_update
 
 
 class UnsupportedPostContentError(ValueError):
@@ -39,7 +50,7 @@ class PostRender:
 
 @dataclass
 class DraftApplyResult:
-    post: Post
+    draft: PostDraft
     notice: str | None = None
 
 
@@ -51,66 +62,35 @@ class PostService:
         self,
         session_maker: async_sessionmaker[AsyncSession],
         post_repository: PostRepository,
+        ephemeral_store: EphemeralStore | None = None,
+        draft_store: PostDraftStore | None = None,
+        coordinator: ClusterCoordinator | None = None,
     ) -> None:
         self._session_maker = session_maker
         self._post_repository = post_repository
+        self._ephemeral_store = ephemeral_store
+        self._draft_store = draft_store
+        self._coordinator = coordinator
+        self._broadcast_tasks: set[asyncio.Task] = set()
 
-    def _empty_payload(self) -> dict[str, Any]:
-        return {
-            "main_text": None,
-            "main_entities": None,
-            "main_media": None,
-            "extra_document": None,
-        }
-
-    def _load_payload(self, post: Post) -> dict[str, Any]:
-        payload = deepcopy(post.entities) if isinstance(post.entities, dict) else None
-        if not payload:
-            payload = self._empty_payload()
-        for key in ("main_text", "main_entities", "main_media", "extra_document"):
-            payload.setdefault(key, None)
-        return payload
-
-    def _payload_flags(self, payload: dict[str, Any]) -> tuple[bool, bool, bool]:
-        return (
-            bool(payload.get("main_text")),
-            bool(payload.get("main_media")),
-            bool(payload.get("extra_document")),
-        )
-
-    async def _get_or_create_draft(self, admin_id: int) -> Post:
-        async with self._session_maker() as session:
-            async with session.begin():
-                draft = await self._post_repository.get_active_draft_by_admin(session, admin_id)
-                if draft:
-                    return draft
-                draft = await self._post_repository.create_draft(
-                    session,
-                    created_by=admin_id,
-                    content_type="draft_v2",
-                    text=None,
-                    entities=self._empty_payload(),
-                    file_id=None,
-                    caption=None,
-                    caption_entities=None,
-                )
-                await session.flush()
-                return draft
+    def as_draft(self, post: Post | PostDraft) -> PostDraft:
+        """Parse a loaded ``posts`` row once; drafts from the store pass through."""
+        if isinstance(post, PostDraft):
+            return post
+        return PostDraft.from_payload(post.id, post.created_by, post.entities)
 
-    async def ensure_draft(self, admin_id: int) -> Post:
-        return await self._get_or_create_draft(admin_id)
+    async def ensure_draft(self, admin_id: int) -> PostDraft:
+        return await self._draft_store.get_or_create(admin_id)
 
     async def clear_draft(self, admin_id: int) -> None:
-        async with self._session_maker() as session:
-            async with session.begin():
-                draft = await self._post_repository.get_active_draft_by_admin(session, admin_id)
-                if not draft:
-                    return
-                draft.entities = self._empty_payload()
-                draft.content_type = "draft_v2"
-                session.add(draft)
+        draft = await self._draft_store.get(admin_id)
+        if draft is None:
+            return
+        draft.clear()
+        self._draft_store.mark_dirty(draft)
 
     async def cancel_draft(self, admin_id: int) -> None:
+        self._draft_store.discard(admin_id)
         async with self._session_maker() as session:
             async with session.begin():
                 draft = await self._post_repository.get_active_draft_by_admin(session, admin_id)
@@ -119,150 +99,143 @@ class PostService:
                 await self._post_repository.mark_canceled(session, draft.id)
 
     async def apply_message_to_draft(self, admin_id: int, message: Message) -> DraftApplyResult:
+        """Apply ``message`` to the in-memory draft; the ``posts`` row is written behind."""
         if message.media_group_id:
             raise UnsupportedPostContentError("album")
 
         notice: str | None = None
-        saved_post: Post | None = None
-        async with self._session_maker() as session:
-            async with session.begin():
-                draft = await self._post_repository.get_active_draft_by_admin(session, admin_id)
-                if not draft:
-                    draft = await self._post_repository.create_draft(
-                        session,
-                        created_by=admin_id,
-                        content_type="draft_v2",
-                        text=None,
-                        entities=self._empty_payload(),
-                        file_id=None,
-                        caption=None,
-                        caption_entities=None,
-                    )
-                    await session.flush()
-
-                payload = self._load_payload(draft)
-
-                if message.text:
-                    payload["main_text"] = message.text
-                    payload["main_entities"] = serialize_entities(message.entities)
-                    update_type = "text"
-                elif message.photo or message.video or message.animation:
-                    media_type = "photo"
-                    file_id = ""
-                    if message.photo:
-                        file_id = message.photo[-1].file_id
-                    elif message.video:
-                        media_type = "video"
-                        file_id = message.video.file_id
-                    elif message.animation:
-                        media_type = "animation"
-                        file_id = message.animation.file_id
-                    payload["main_media"] = {
-                        "type": media_type,
-                        "file_id": file_id,
-                        "caption": message.caption,
-                        "caption_entities": serialize_entities(message.caption_entities),
-                    }
-                    notice = "Медиа обновлено." if payload.get("main_media") else None
-                    update_type = f"media:{media_type}"
-                elif message.document:
-                    payload["extra_document"] = {
-                        "file_id": message.document.file_id,
-                        "file_name": message.document.file_name,
-                        "caption": message.caption,
-                        "caption_entities": serialize_entities(message.caption_entities),
-                    }
-                    if message.chat and message.from_user and should_notify_document_update(
-                        chat_id=message.chat.id,
-                        user_id=message.from_user.id,
-                    ):
-                        notice = "Файл заменён. Он будет отправлен отдельным сообщением."
-                    update_type = "document"
-                else:
-                    raise UnsupportedPostContentError("unsupported")
-
-                draft.entities = payload
-                draft.content_type = "draft_v2"
-                session.add(draft)
-                await session.flush()
-                has_text, has_media, has_doc = self._payload_flags(payload)
-                logger.info(
-                    "Post draft updated admin_id=%s type=%s has_text=%s has_media=%s has_doc=%s",
-                    admin_id,
-                    update_type,
-                    has_text,
-                    has_media,
-                    has_doc,
-                )
-                saved_post = draft
-
-        read_back = await self.get_active_draft(admin_id)
-        if read_back:
-            read_payload = self._load_payload(read_back)
-            has_text, has_media, has_doc = self._payload_flags(read_payload)
-            logger.info(
-                "Post draft write-read check admin_id=%s has_text=%s has_media=%s has_doc=%s",
-                admin_id,
-                has_text,
-                has_media,
-                has_doc,
+        if message.text:
+            update_type = "text"
+        elif message.photo or message.video or message.animation:
+            update_type = "media"
+        elif message.document:
+            update_type = "document"
+        else:
+            raise UnsupportedPostContentError("unsupported")
+
+        draft = await self._draft_store.get_or_create(admin_id)
+        if update_type == "text":
+            draft.main_text = PostText(
+                message.text, serialize_entities(message.entities), message.entities
             )
+        elif update_type == "media":
+            if message.photo:
+                media_type, file_id = "photo", message.photo[-1].file_id
+            elif message.video:
+                media_type, file_id = "video", message.video.file_id
+            else:
+                media_type, file_id = "animation", message.animation.file_id
+            draft.main_media = PostMedia(
+                type=media_type,
+                file_id=file_id,
+                caption=message.caption,
+                caption_entities=serialize_entities(message.caption_entities),
+                message_caption_entities=message.caption_entities,
+            )
+            notice = "Медиа обновлено."
+            update_type = f"media:{media_type}"
         else:
-            logger.warning("Post draft write-read check failed admin_id=%s draft_not_found", admin_id)
-        return DraftApplyResult(post=read_back or saved_post, notice=notice)
+            draft.extra_document = PostDocument(
+                file_id=message.document.file_id,
+                file_name=message.document.file_name,
+                caption=message.caption,
+                caption_entities=serialize_entities(message.caption_entities),
+                message_caption_entities=message.caption_entities,
+            )
+            if await self._should_notify_document_update(message):
+                notice = "Файл заменён. Он будет отправлен отдельным сообщением."
 
-    async def get_active_draft(self, admin_id: int) -> Post | None:
-        async with self._session_maker() as session:
-            draft = await self._post_repository.get_active_draft_by_admin(session, admin_id)
-            logger.info("Post draft fetched admin_id=%s found=%s", admin_id, bool(draft))
-            return draft
-
-    def _resolve_main(self, post: Post) -> dict[str, Any]:
-        payload = self._load_payload(post)
-        media = payload.get("main_media")
-        main_text = payload.get("main_text")
-        main_entities = deserialize_entities(payload.get("main_entities"))
+        self._draft_store.mark_dirty(draft)
+        logger.info(
+            "Post draft updated admin_id=%s type=%s has_text=%s has_media=%s has_doc=%s",
+            admin_id,
+            update_type,
+            bool(draft.main_text),
+            bool(draft.main_media),
+            bool(draft.extra_document),
+        )
+        return DraftApplyResult(draft=draft, notice=notice)
+
+    async def _should_notify_document_update(self, message: Message) -> bool:
+        if message.chat is None or message.from_user is None:
+            return False
+        if self._ephemeral_store is None:
+            return True
+        return await should_notify_document_update(
+            self._ephemeral_store,
+            chat_id=message.chat.id,
+            user_id=message.from_user.id,
+        )
+
+    async def get_active_draft(self, admin_id: int) -> PostDraft | None:
+        return await self._draft_store.get(admin_id)
+
+    async def flush_draft(self, admin_id: int) -> PostDraft | None:
+        """Persist pending edits before the draft leaves the process (e.g. is broadcast)."""
+        if await self._draft_store.get(admin_id) is None:
+            return None
+        return await self._draft_store.flush(admin_id)
+
+    def _resolve_main(self, draft: PostDraft) -> dict[str, Any]:
+        media = draft.main_media
+        main_text = draft.main_text
         if media:
-            caption = media.get("caption")
-            caption_entities = deserialize_entities(media.get("caption_entities"))
+            caption = media.caption
+            caption_entities = media.message_caption_entities
             if not caption and main_text:
-                caption = main_text
-                caption_entities = main_entities
+                caption = main_text.text
+                caption_entities = main_text.message_entities
             return {
-                "type": media.get("type"),
-                "file_id": media.get("file_id"),
+                "type": media.type,
+                "file_id": media.file_id,
                 "caption": caption,
                 "caption_entities": caption_entities,
             }
         if main_text:
             return {
                 "type": "text",
-                "text": main_text,
-                "entities": main_entities,
+                "text": main_text.text,
+                "entities": main_text.message_entities,
             }
         return {"type": None}
 
-    def _resolve_document(self, post: Post) -> dict[str, Any] | None:
-        payload = self._load_payload(post)
-        document = payload.get("extra_document")
-        if not document:
-            return None
-        return {
-            "file_id": document.get("file_id"),
-            "file_name": document.get("file_name"),
-            "caption": document.get("caption"),
-            "caption_entities": deserialize_entities(document.get("caption_entities")),
-        }
-
-    def is_draft_empty(self, post: Post) -> bool:
-        payload = self._load_payload(post)
-        return not any(
-            [payload.get("main_text"), payload.get("main_media"), payload.get("extra_document")]
-        )
+    def is_draft_empty(self, post: Post | PostDraft) -> bool:
+        return self.as_draft(post).is_empty()
+
+    def preview_slots(self, post: Post | PostDraft) -> dict[str, PreviewContent | None]:
+        """Main content and extra document as slots for ``DraftPreviewer``."""
+        draft = self.as_draft(post)
+        main = self._resolve_main(draft)
+        main_content = None
+        if main.get("type") == "text":
+            main_content = PreviewContent("text", text=main.get("text"), entities=main.get("entities"))
+        elif main.get("type") is not None:
+            main_content = PreviewContent(
+                main["type"],
+                text=main.get("caption"),
+                entities=main.get("caption_entities"),
+                file_id=main["file_id"],
+            )
+
+        document = draft.extra_document
+        document_content = None
+        if document:
+            name = document.file_name or "без названия"
+            document_content = PreviewContent(
+                "document",
+                text=document.caption,
+                entities=document.message_caption_entities,
+                file_id=document.file_id,
+                fallback=PreviewContent(
+                    "text", text=f"📎 Файл будет отправлен отдельным сообщением: {name}"
+                ),
+            )
+        return {"main": main_content, "document": document_content}
 
-    async def send_preview(self, bot: Bot, chat_id: int, post: Post) -> None:
-        main = self._resolve_main(post)
-        document = self._resolve_document(post)
+    async def send_preview(self, bot: Bot, chat_id: int, post: Post | PostDraft) -> None:
+        draft = self.as_draft(post)
+        main = self._resolve_main(draft)
+        document = draft.extra_document
         if main.get("type") == "photo":
             await bot.send_photo(
                 chat_id=chat_id,
@@ -295,20 +268,21 @@ class PostService:
             try:
                 await bot.send_document(
                     chat_id=chat_id,
-                    document=document["file_id"],
-                    caption=document.get("caption"),
-                    caption_entities=document.get("caption_entities"),
+                    document=document.file_id,
+                    caption=document.caption,
+                    caption_entities=document.message_caption_entities,
                 )
             except TelegramBadRequest:
-                name = document.get("file_name") or "без названия"
+                name = document.file_name or "без названия"
                 await bot.send_message(
                     chat_id=chat_id,
                     text=f"📎 Файл будет отправлен отдельным сообщением: {name}",
                 )
 
-    async def send_post_to_chat(self, bot: Bot, chat_id: int, post: Post) -> None:
-        main = self._resolve_main(post)
-        document = self._resolve_document(post)
+    async def send_post_to_chat(self, bot: Bot, chat_id: int, post: Post | PostDraft) -> None:
+        draft = self.as_draft(post)
+        main = self._resolve_main(draft)
+        document = draft.extra_document
         if main.get("type") == "photo":
             await bot.send_photo(
                 chat_id=chat_id,
@@ -340,19 +314,138 @@ class PostService:
         if document:
             await bot.send_document(
                 chat_id=chat_id,
-                document=document["file_id"],
-                caption=document.get("caption"),
-                caption_entities=document.get("caption_entities"),
+                document=document.file_id,
+                caption=document.caption,
+                caption_entities=document.message_caption_entities,
+            )
+
+    async def start_broadcast(
+        self,
+        bot: Bot,
+        draft: PostDraft,
+        *,
+        user_repository: UserRepository,
+        send_delay_seconds: float,
+        batch_log_every: int,
+        on_finished: Callable[[int, int], Awaitable[None]],
+        on_failed: Callable[[Exception], Awaitable[None]],
+    ) -> bool:
+        """Take ``draft`` out of editing and broadcast it in a background task.
+
+        A broadcast takes as long as the recipient list times the send delay;
+        running it inside the "send" update would keep the admin's updates
+        and a dispatcher worker waiting all that time. ``on_finished`` gets
+        the success and failure counts. If the broadcast breaks off, the post
+        is marked ``failed`` and ``on_failed`` gets the error. Returns False
+        when the post is no longer a draft, e.g. because its broadcast has
+        already started.
+        """
+        async with self._session_maker() as session:
+            async with session.begin():
+                if not await self._post_repository.mark_sending(session, draft.id):
+                    return False
+        self._draft_store.discard(draft.created_by)
+        # A fresh context: the task must not pick up the update's unit of
+        # work, whose session the handler is still using.
+        task = asyncio.create_task(
+            self._run_broadcast(
+                bot,
+                draft,
+                user_repository,
+                send_delay_seconds,
+                batch_log_every,
+                on_finished,
+                on_failed,
+            ),
+            name=f"broadcast-{draft.id}",
+            context=contextvars.Context(),
+        )
+        self._broadcast_tasks.add(task)
+        task.add_done_callback(self._broadcast_tasks.discard)
+        return True
+
+    async def stop_broadcasts(self) -> None:
+        """Cancel running broadcasts; their posts stay in the ``sending`` status."""
+        for task in self._broadcast_tasks:
+            logger.warning("Broadcast interrupted by shutdown: %s", task.get_name())
+            task.cancel()
+        await asyncio.gather(*self._broadcast_tasks, return_exceptions=True)
+
+    async def _run_broadcast(
+        self,
+        bot: Bot,
+        draft: PostDraft,
+        user_repository: UserRepository,
+        send_delay_seconds: float,
+        batch_log_every: int,
+        on_finished: Callable[[int, int], Awaitable[None]],
+        on_failed: Callable[[Exception], Awaitable[None]],
+    ) -> None:
+        try:
+            success_count, fail_count = await self.broadcast_draft(
+                bot,
+                draft,
+                user_repository=user_repository,
+                send_delay_seconds=send_delay_seconds,
+                batch_log_every=batch_log_every,
             )
+        except LockBusyError as exc:
+            # The replica holding the lock finishes the post and marks it sent.
+            logger.warning("Broadcast of post_id=%s is already running elsewhere", draft.id)
+            await self._report(on_failed(exc), draft)
+            return
+        except Exception as exc:
+            logger.exception("Broadcast failed: post_id=%s", draft.id)
+            try:
+                async with self._session_maker() as session:
+                    async with session.begin():
+                        await self._post_repository.mark_failed(session, draft.id)
+            except Exception:
+                logger.exception("Failed to mark post_id=%s as failed", draft.id)
+            await self._report(on_failed(exc), draft)
+            return
+        await self._report(on_finished(success_count, fail_count), draft)
+
+    @staticmethod
+    async def _report(notification: Awaitable[None], draft: PostDraft) -> None:
+        try:
+            await notification
+        except Exception:
+            logger.exception("Failed to report broadcast result: post_id=%s", draft.id)
 
     async def broadcast_draft(
         self,
         bot: Bot,
-        post: Post,
+        post: Post | PostDraft,
         *,
         user_repository: UserRepository,
         send_delay_seconds: float,
         batch_log_every: int,
+    ) -> tuple[int, int]:
+        """Send ``post`` to every confirmed user.
+
+        With a coordinator the broadcast holds a cluster-wide lock, so a
+        second tap on "send" (on this or another replica) raises
+        ``LockBusyError`` instead of sending the post twice.
+        """
+        post = self.as_draft(post)
+        if self._coordinator is None:
+            return await self._broadcast(
+                bot, post, user_repository, send_delay_seconds, batch_log_every, None
+            )
+        async with self._coordinator.exclusive(f"broadcast:{post.id}") as fencing_token:
+            return await self._broadcast(
+                bot, post, user_repository, send_delay_seconds, batch_log_every, fencing_token
+            )
+
+    async def _broadcast(
+        self,
+        bot: Bot,
+        post: PostDraft,
+        user_repository: UserRepository,
+        send_delay_seconds: float,
+        batch_log_every: int,
+        fencing_token: FencingToken | None,
     ) -> tuple[int, int]:
         async with self._session_maker() as session:
             user_ids = await user_repository.list_confirmed_user_ids(session)
@@ -366,8 +459,16 @@ class PostService:
             try:
                 await self._send_with_retry(bot, tg_id, post, send_delay_seconds)
                 success_count += 1
-            except (TelegramForbiddenError, TelegramNotFound, TelegramBadRequest, TelegramNetworkError):
+            except (
+                TelegramForbiddenError,
+                TelegramNotFound,
+                TelegramBadRequest,
+                TelegramNetworkError,
+                TelegramRetryAfter,
+            ) as exc:
+                # Retries are used up; skip this recipient, not the broadcast.
                 fail_count += 1
+                logger.warning("Broadcast failed for tg_id=%s: %s", tg_id, exc)
             if batch_log_every > 0 and index % batch_log_every == 0:
                 logger.info("Broadcast progress: post_id=%s sent=%s/%s", post.id, index, total)
             if send_delay_seconds > 0:
@@ -375,6 +476,8 @@ class PostService:
 
         async with self._session_maker() as session:
             async with session.begin():
+                if fencing_token is not None:
+                    await fencing_token.validate(session)
                 await self._post_repository.mark_sent(
                     session,
                     post.id,
@@ -391,7 +494,7 @@ class PostService:
         return success_count, fail_count
 
     async def _send_with_retry(
-        self, bot: Bot, tg_id: int, post: Post, send_delay_seconds: float
+        self, bot: Bot, tg_id: int, post: Post | PostDraft, send_delay_seconds: float
     ) -> None:
         attempts = 0
         while True:
@@ -411,12 +514,12 @@ class PostService:
                 await asyncio.sleep(send_delay_seconds or 0.1)
 
     # Backward compatibility for other modules.
-    async def create_draft_from_message(self, admin_id: int, message: Message) -> Post:
+    async def create_draft_from_message(self, admin_id: int, message: Message) -> PostDraft:
         result = await self.apply_message_to_draft(admin_id, message)
-        return result.post
+        return result.draft
 
-    def render_post(self, post: Post) -> PostRender:
-        main = self._resolve_main(post)
+    def render_post(self, post: Post | PostDraft) -> PostRender:
+        main = self._resolve_main(self.as_draft(post))
         if main.get("type") in {"photo", "video", "animation"}:
             return PostRender(
                 content_type=main["type"],
@@ -437,7 +540,7 @@ class PostService:
         post: Post,
         reply_markup=None,
     ) -> Message:
-        main = self._resolve_main(post)
+        main = self._resolve_main(self.as_draft(post))
         if main.get("type") == "photo":
             return await bot.send_photo(
                 chat_id=chat_id,
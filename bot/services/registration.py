@@ -6,12 +6,14 @@ from typing import Iterable
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from bot.models import RegistrationStatus, User
+from bot.models import RegistrationStatus
 from bot.services.token_verifier import TokenVerifier
 from bot.storage import UserRepository
 
 logger = logging.getLogger(__name__)
 
+_PROMOTABLE_STATUSES = (RegistrationStatus.NONE, RegistrationStatus.TOKEN_VERIFIED)
+
 
 @dataclass(frozen=True)
 class StartResult:
@@ -37,102 +39,46 @@ class RegistrationService:
     async def handle_start(
         self, tg_id: int, username: str | None, token: str | None
     ) -> StartResult:
+        if token is None:
+            # NOTE: Временно отключили обязательную токен-проверку для обычных
+            # пользователей: вход без токена продвигает статус так же, как у
+            # админов. Чтобы вернуть строгий вход по токену, для не-админов
+            # нужно снова сбрасывать статус в NONE:
+            #
+            # promote_from=tuple(RegistrationStatus), promote_to=RegistrationStatus.NONE
+            promote = True
+            token_valid = True
+        else:
+            token_valid = self._token_verifier.is_valid(token)
+            logger.info(
+                "Token validation for tg_id=%s token_valid=%s",
+                tg_id,
+                token_valid,
+            )
+            promote = token_valid
+
         async with self._session_maker() as session:
             async with session.begin():
-                user = await self._ensure_user(session, tg_id, username)
-                previous_status = user.status
-
-                if token is None:
-                    if tg_id in self._admin_ids:
-                        if user.status in {
-                            RegistrationStatus.NONE,
-                            RegistrationStatus.TOKEN_VERIFIED,
-                        }:
-                            await self._user_repository.set_status(
-                                session, user, RegistrationStatus.TOKEN_VERIFIED
-                            )
-                        current_status = user.status
-                        logger.info(
-                            "Admin start without token for tg_id=%s status=%s -> %s",
-                            tg_id,
-                            previous_status.value,
-                            current_status.value,
-                        )
-                        return StartResult(
-                            previous_status=previous_status,
-                            current_status=current_status,
-                            token_provided=True,
-                            token_valid=True,
-                        )
-
-                    # NOTE: Временно отключили обязательную токен-проверку для обычных
-                    # пользователей. Оставляем прежнюю реализацию ниже в комментарии,
-                    # чтобы можно было быстро вернуть строгий вход по токену.
-                    #
-                    # await self._user_repository.set_status(
-                    #     session, user, RegistrationStatus.NONE
-                    # )
-
-                    if user.status in {
-                        RegistrationStatus.NONE,
-                        RegistrationStatus.TOKEN_VERIFIED,
-                    }:
-                        await self._user_repository.set_status(
-                            session, user, RegistrationStatus.TOKEN_VERIFIED
-                        )
-                    current_status = user.status
-                    logger.info(
-                        "Start without token (user bypass enabled) for tg_id=%s status=%s -> %s",
-                        tg_id,
-                        previous_status.value,
-                        current_status.value,
-                    )
-                    return StartResult(
-                        previous_status=previous_status,
-                        current_status=current_status,
-                        token_provided=True,
-                        token_valid=True,
-                    )
-
-                token_valid = self._token_verifier.is_valid(token)
-                logger.info(
-                    "Token validation for tg_id=%s token_valid=%s",
+                user = await self._user_repository.upsert(
+                    session,
                     tg_id,
-                    token_valid,
+                    username,
+                    promote_from=_PROMOTABLE_STATUSES,
+                    promote_to=RegistrationStatus.TOKEN_VERIFIED if promote else None,
                 )
 
-                if token_valid:
-                    if user.status in {
-                        RegistrationStatus.NONE,
-                        RegistrationStatus.TOKEN_VERIFIED,
-                    }:
-                        await self._user_repository.set_status(
-                            session, user, RegistrationStatus.TOKEN_VERIFIED
-                        )
-                current_status = user.status
-
-                logger.info(
-                    "Start with token for tg_id=%s status=%s -> %s",
-                    tg_id,
-                    previous_status.value,
-                    current_status.value,
-                )
-                return StartResult(
-                    previous_status=previous_status,
-                    current_status=current_status,
-                    token_provided=True,
-                    token_valid=token_valid,
-                )
-
-    async def _ensure_user(
-        self, session: AsyncSession, tg_id: int, username: str | None
-    ) -> User:
-        user = await self._user_repository.get_by_tg_id(session, tg_id)
-        if user is None:
-            user = await self._user_repository.create(
-                session, tg_id, username, RegistrationStatus.NONE
-            )
-            return user
-
-        await self._user_repository.update_username(session, user, username)
-        return user
+        previous_status = user.previous_status or RegistrationStatus.NONE
+        if token is None:
+            if tg_id in self._admin_ids:
+                message = "Admin start without token for tg_id=%s status=%s -> %s"
+            else:
+                message = "Start without token (user bypass enabled) for tg_id=%s status=%s -> %s"
+        else:
+            message = "Start with token for tg_id=%s status=%s -> %s"
+        logger.info(message, tg_id, previous_status.value, user.status.value)
+        return StartResult(
+            previous_status=previous_status,
+            current_status=user.status,
+            token_provided=True,
+            token_valid=token_valid,
+        )
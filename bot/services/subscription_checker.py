@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import logging
-import time
 from dataclasses import dataclass
 
 from aiogram import Bot
@@ -12,12 +11,28 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from bot.config import RequiredChannel
 from bot.models import RegistrationStatus
 from bot.services.subscription_channels import get_required_channel_ids_for_check
-from bot.storage import UserRepository
+from bot.storage import EphemeralStore, UserRepository
 
 logger = logging.getLogger(__name__)
 
 _RATE_LIMIT_SECONDS = 3.0
-_last_check_by_user: dict[int, float] = {}
+
+CHANNEL_MEMBER_STATUSES = frozenset(
+    {
+        ChatMemberStatus.MEMBER,
+        ChatMemberStatus.ADMINISTRATOR,
+        ChatMemberStatus.CREATOR,
+    }
+)
+
+
+_ELIGIBLE_STATUSES = frozenset(
+    {
+        RegistrationStatus.TOKEN_VERIFIED,
+        RegistrationStatus.SUBSCRIPTION_VERIFIED,
+        RegistrationStatus.CONFIRMED,
+    }
+)
 
 
 @dataclass(frozen=True)
@@ -29,6 +44,12 @@ class SubscriptionCheckResult:
     error_message: str | None
 
 
+@dataclass(frozen=True)
+class JoinRequestResult:
+    approved: bool
+    confirmed_now: bool
+
+
 class SubscriptionCheckerService:
     def __init__(
         self,
@@ -36,9 +57,11 @@ class SubscriptionCheckerService:
         user_repository: UserRepository,
         required_channels: list[RequiredChannel],
         bot: Bot,
+        ephemeral_store: EphemeralStore,
     ) -> None:
         self._session_maker = session_maker
         self._user_repository = user_repository
+        self._ephemeral_store = ephemeral_store
         self._required_channel_ids = get_required_channel_ids_for_check(
             required_channels
         )
@@ -56,9 +79,9 @@ class SubscriptionCheckerService:
                 confirmed_now=False,
                 error_message="Регистрация временно недоступна. Попробуй позже.",
             )
-        now = time.monotonic()
-        last_check = _last_check_by_user.get(tg_id, 0.0)
-        if now - last_check < _RATE_LIMIT_SECONDS:
+        if not await self._ephemeral_store.set_if_absent(
+            f"subscription_check:{tg_id}", _RATE_LIMIT_SECONDS
+        ):
             logger.info("Rate limit hit for tg_id=%s", tg_id)
             return SubscriptionCheckResult(
                 rate_limited=True,
@@ -67,84 +90,118 @@ class SubscriptionCheckerService:
                 confirmed_now=False,
                 error_message=None,
             )
-        _last_check_by_user[tg_id] = now
 
+        current_status = await self._load_status(tg_id, username)
+        if current_status not in _ELIGIBLE_STATUSES:
+            logger.info(
+                "Subscription check denied for tg_id=%s status=%s",
+                tg_id,
+                current_status.value,
+            )
+            return SubscriptionCheckResult(
+                rate_limited=False,
+                eligible=False,
+                is_member=None,
+                confirmed_now=False,
+                error_message=None,
+            )
+
+        is_member = await self._fetch_membership(tg_id, self._required_channel_ids)
+        if is_member is None:
+            return SubscriptionCheckResult(
+                rate_limited=False,
+                eligible=True,
+                is_member=None,
+                confirmed_now=False,
+                error_message=(
+                    "Не могу проверить подписку. Боту нужны права администратора в канале."
+                ),
+            )
+
+        confirmed_now = False
+        if is_member and current_status != RegistrationStatus.CONFIRMED:
+            confirmed_now = await self._confirm(tg_id)
+
+        return SubscriptionCheckResult(
+            rate_limited=False,
+            eligible=True,
+            is_member=is_member,
+            confirmed_now=confirmed_now,
+            error_message=None,
+        )
+
+    async def handle_join_request(
+        self, tg_id: int, username: str | None, chat_id: int
+    ) -> JoinRequestResult:
+        if chat_id not in self._required_channel_ids:
+            logger.info("Join request ignored for tg_id=%s chat_id=%s: not required", tg_id, chat_id)
+            return JoinRequestResult(approved=False, confirmed_now=False)
+
+        current_status = await self._load_status(tg_id, username)
+        if current_status not in _ELIGIBLE_STATUSES:
+            logger.info(
+                "Join request left pending for tg_id=%s chat_id=%s status=%s",
+                tg_id,
+                chat_id,
+                current_status.value,
+            )
+            return JoinRequestResult(approved=False, confirmed_now=False)
+
+        try:
+            await self._bot.approve_chat_join_request(chat_id=chat_id, user_id=tg_id)
+        except (TelegramForbiddenError, TelegramBadRequest) as exc:
+            logger.error(
+                "Failed to approve join request for tg_id=%s chat_id=%s: %s",
+                tg_id,
+                chat_id,
+                exc,
+            )
+            return JoinRequestResult(approved=False, confirmed_now=False)
+        logger.info("Join request approved for tg_id=%s chat_id=%s", tg_id, chat_id)
+
+        other_channel_ids = [
+            channel_id for channel_id in self._required_channel_ids if channel_id != chat_id
+        ]
+        is_member = await self._fetch_membership(tg_id, other_channel_ids)
+        confirmed_now = False
+        if is_member and current_status != RegistrationStatus.CONFIRMED:
+            confirmed_now = await self._confirm(tg_id)
+        return JoinRequestResult(approved=True, confirmed_now=confirmed_now)
+
+    async def _load_status(self, tg_id: int, username: str | None) -> RegistrationStatus:
         async with self._session_maker() as session:
             async with session.begin():
-                user = await self._user_repository.get_by_tg_id(session, tg_id)
-                if user is None:
-                    user = await self._user_repository.create(
-                        session, tg_id, username, RegistrationStatus.NONE
-                    )
-
-                if user.status not in {
-                    RegistrationStatus.TOKEN_VERIFIED,
-                    RegistrationStatus.SUBSCRIPTION_VERIFIED,
-                    RegistrationStatus.CONFIRMED,
-                }:
-                    logger.info(
-                        "Subscription check denied for tg_id=%s status=%s",
-                        tg_id,
-                        user.status.value,
-                    )
-                    return SubscriptionCheckResult(
-                        rate_limited=False,
-                        eligible=False,
-                        is_member=None,
-                        confirmed_now=False,
-                        error_message=None,
-                    )
-
-                is_member = True
-                for channel_id in self._required_channel_ids:
-                    try:
-                        chat_member = await self._bot.get_chat_member(
-                            channel_id, tg_id
-                        )
-                    except (TelegramForbiddenError, TelegramBadRequest) as exc:
-                        logger.error(
-                            "Failed to check subscription for tg_id=%s channel_id=%s: %s",
-                            tg_id,
-                            channel_id,
-                            exc,
-                        )
-                        return SubscriptionCheckResult(
-                            rate_limited=False,
-                            eligible=True,
-                            is_member=None,
-                            confirmed_now=False,
-                            error_message=(
-                                "Не могу проверить подписку. Боту нужны права администратора в канале."
-                            ),
-                        )
-                    status = chat_member.status
-                    channel_member = status in {
-                        ChatMemberStatus.MEMBER,
-                        ChatMemberStatus.ADMINISTRATOR,
-                        ChatMemberStatus.CREATOR,
-                    }
-                    logger.info(
-                        "Subscription status for tg_id=%s channel_id=%s is_member=%s status=%s",
-                        tg_id,
-                        channel_id,
-                        channel_member,
-                        status,
-                    )
-                    if not channel_member:
-                        is_member = False
-                        break
-
-                confirmed_now = False
-                if is_member and user.status != RegistrationStatus.CONFIRMED:
-                    await self._user_repository.set_status(
-                        session, user, RegistrationStatus.CONFIRMED
-                    )
-                    confirmed_now = True
-
-                return SubscriptionCheckResult(
-                    rate_limited=False,
-                    eligible=True,
-                    is_member=is_member,
-                    confirmed_now=confirmed_now,
-                    error_message=None,
+                user = await self._user_repository.upsert(session, tg_id, username)
+                return user.status
+
+    async def _fetch_membership(self, tg_id: int, channel_ids: list[int]) -> bool | None:
+        # Telegram calls run outside of any DB session so a slow getChatMember
+        # never keeps a pooled connection checked out.
+        for channel_id in channel_ids:
+            try:
+                chat_member = await self._bot.get_chat_member(channel_id, tg_id)
+            except (TelegramForbiddenError, TelegramBadRequest) as exc:
+                logger.error(
+                    "Failed to check subscription for tg_id=%s channel_id=%s: %s",
+                    tg_id,
+                    channel_id,
+                    exc,
                 )
+                return None
+            status = chat_member.status
+            channel_member = status in CHANNEL_MEMBER_STATUSES
+            logger.info(
+                "Subscription status for tg_id=%s channel_id=%s is_member=%s status=%s",
+                tg_id,
+                channel_id,
+                channel_member,
+                status,
+            )
+            if not channel_member:
+                return False
+        return True
+
+    async def _confirm(self, tg_id: int) -> bool:
+        async with self._session_maker() as session:
+            async with session.begin():
+                return await self._user_repository.confirm(session, tg_id)
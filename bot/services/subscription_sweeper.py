@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+)
+from aiogram.types import ChatMember
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.config import RequiredChannel
+from bot.db.coordination import FencingToken
+from bot.services.subscription_channels import get_required_channel_ids_for_check
+from bot.services.subscription_checker import CHANNEL_MEMBER_STATUSES
+from bot.storage import JobStateRepository, UserRepository
+
+logger = logging.getLogger(__name__)
+
+SWEEP_JOB_NAME = "subscription_sweep"
+_RETRY_DELAY_SECONDS = 60.0
+
+
+@dataclass
+class SweepStats:
+    checked: int = 0
+    downgraded: int = 0
+    errors: int = 0
+    completed: bool = False
+
+
+class ApiCallBudget:
+    """Spaces calls evenly so the sweep never bursts above its rate."""
+
+    def __init__(self, calls_per_second: float) -> None:
+        self._interval = 1.0 / calls_per_second if calls_per_second > 0 else 0.0
+        self._next_call_at = 0.0
+
+    async def acquire(self) -> None:
+        now = time.monotonic()
+        scheduled = max(now, self._next_call_at)
+        self._next_call_at = scheduled + self._interval
+        if scheduled > now:
+            await asyncio.sleep(scheduled - now)
+
+
+class SubscriptionSweeper:
+    """Re-checks confirmed users and revokes confirmation for those who left.
+
+    Users are walked in ``tg_id`` order and the cursor is stored in
+    ``job_state`` after every batch, so an interrupted sweep resumes where it
+    stopped. A change of the required channel set restarts the sweep at once.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        user_repository: UserRepository,
+        job_state_repository: JobStateRepository,
+        required_channels: list[RequiredChannel],
+        bot: Bot,
+        *,
+        interval_seconds: float,
+        batch_size: int,
+        api_calls_per_second: float,
+    ) -> None:
+        self._session_maker = session_maker
+        self._user_repository = user_repository
+        self._job_state_repository = job_state_repository
+        self._channel_ids = get_required_channel_ids_for_check(required_channels)
+        self._fingerprint = ",".join(str(channel_id) for channel_id in sorted(self._channel_ids))
+        self._bot = bot
+        self._interval_seconds = interval_seconds
+        self._batch_size = batch_size
+        self._budget = ApiCallBudget(api_calls_per_second)
+        self.last_stats: SweepStats | None = None
+
+    async def run_forever(self, fencing_token: FencingToken | None = None) -> None:
+        if not self._channel_ids:
+            logger.warning("Subscription sweep disabled: required_channels is empty")
+            return
+        while True:
+            delay = await self._seconds_until_next_sweep()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.sweep(fencing_token)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Subscription sweep failed, retrying in %s s", _RETRY_DELAY_SECONDS)
+                await asyncio.sleep(_RETRY_DELAY_SECONDS)
+
+    async def sweep(self, fencing_token: FencingToken | None = None) -> SweepStats:
+        """Walk all confirmed users; ``fencing_token`` guards every cursor write."""
+        cursor = await self._load_cursor()
+        stats = SweepStats()
+        logger.info("Subscription sweep started cursor=%s", cursor)
+
+        while True:
+            async with self._session_maker() as session:
+                tg_ids = await self._user_repository.list_confirmed_user_ids_after(
+                    session, cursor, self._batch_size
+                )
+            if not tg_ids:
+                break
+
+            left_ids: list[int] = []
+            for tg_id in tg_ids:
+                is_member = await self._is_member(tg_id)
+                stats.checked += 1
+                if is_member is None:
+                    stats.errors += 1
+                elif not is_member:
+                    left_ids.append(tg_id)
+
+            cursor = tg_ids[-1]
+            async with self._session_maker() as session:
+                async with session.begin():
+                    if fencing_token is not None:
+                        await fencing_token.validate(session)
+                    stats.downgraded += await self._user_repository.revoke_confirmation(
+                        session, left_ids
+                    )
+                    await self._job_state_repository.save(
+                        session,
+                        SWEEP_JOB_NAME,
+                        cursor=cursor,
+                        fingerprint=self._fingerprint,
+                    )
+            logger.info(
+                "Subscription sweep progress cursor=%s checked=%s downgraded=%s errors=%s",
+                cursor,
+                stats.checked,
+                stats.downgraded,
+                stats.errors,
+            )
+
+        async with self._session_maker() as session:
+            async with session.begin():
+                if fencing_token is not None:
+                    await fencing_token.validate(session)
+                await self._job_state_repository.save(
+                    session,
+                    SWEEP_JOB_NAME,
+                    cursor=None,
+                    fingerprint=self._fingerprint,
+                )
+        stats.completed = True
+        self.last_stats = stats
+        logger.info(
+            "Subscription sweep finished checked=%s downgraded=%s errors=%s",
+            stats.checked,
+            stats.downgraded,
+            stats.errors,
+        )
+        return stats
+
+    async def _load_cursor(self) -> int | None:
+        async with self._session_maker() as session:
+            job_state = await self._job_state_repository.get(session, SWEEP_JOB_NAME)
+        if job_state is None or job_state.fingerprint != self._fingerprint:
+            return None
+        return job_state.cursor
+
+    async def _seconds_until_next_sweep(self) -> float:
+        async with self._session_maker() as session:
+            job_state = await self._job_state_repository.get(session, SWEEP_JOB_NAME)
+        if job_state is None:
+            return 0.0
+        if job_state.fingerprint != self._fingerprint:
+            logger.info("Required channels changed, starting subscription sweep now")
+            return 0.0
+        if job_state.cursor is not None:
+            return 0.0
+        updated_at = job_state.updated_at
+        if updated_at.tzinfo is not None:
+            updated_at = updated_at.astimezone(timezone.utc).replace(tzinfo=None)
+        elapsed = (datetime.utcnow() - updated_at).total_seconds()
+        return max(0.0, self._interval_seconds - elapsed)
+
+    async def _is_member(self, tg_id: int) -> bool | None:
+        for channel_id in self._channel_ids:
+            chat_member = await self._get_chat_member(channel_id, tg_id)
+            if chat_member is None:
+                return None
+            if chat_member.status not in CHANNEL_MEMBER_STATUSES:
+                logger.info(
+                    "Subscription sweep: tg_id=%s left channel_id=%s status=%s",
+                    tg_id,
+                    channel_id,
+                    chat_member.status,
+                )
+                return False
+        return True
+
+    async def _get_chat_member(self, channel_id: int, tg_id: int) -> ChatMember | None:
+        while True:
+            await self._budget.acquire()
+            try:
+                return await self._bot.get_chat_member(channel_id, tg_id)
+            except TelegramRetryAfter as exc:
+                logger.warning("Subscription sweep throttled, sleeping %s s", exc.retry_after)
+                await asyncio.sleep(exc.retry_after)
+            except (TelegramForbiddenError, TelegramBadRequest, TelegramNetworkError) as exc:
+                logger.error(
+                    "Subscription sweep failed for tg_id=%s channel_id=%s: %s",
+                    tg_id,
+                    channel_id,
+                    exc,
+                )
+                return None
@@ -1,5 +1,43 @@
+from bot.storage.ephemeral_store import (
+    EphemeralStore,
+    MemoryEphemeralStore,
+    PostgresEphemeralStore,
+    create_ephemeral_store,
+)
+from bot.storage.event_isolation import UpdateOrderingIsolation
+from bot.storage.fsm_storage import PostgresStorage
+from bot.storage.job_state_repository import JobStateRepository
+from bot.storage.page_draft_repository import PageDraftRepository
 from bot.storage.page_repository import PageRepository
+from bot.storage.post_draft_store import (
+    PostDocument,
+    PostDraft,
+    PostDraftStore,
+    PostMedia,
+    PostText,
+)
 from bot.storage.post_repository import PostRepository
-from bot.storage.user_repository import UserRepository
+from bot.storage.user_repository import UserRepository, UserUpsertResult
+from bot.storage.user_status_cache import CachedUserStatus, UserStatusCache
 
-__all__ = ["PageRepository", "PostRepository", "UserRepository"]
+__all__ = [
+    "CachedUserStatus",
+    "EphemeralStore",
+    "JobStateRepository",
+    "MemoryEphemeralStore",
+    "PageDraftRepository",
+    "PageRepository",
+    "PostDocument",
+    "PostDraft",
+    "PostDraftStore",
+    "PostMedia",
+    "PostText",
+    "PostgresEphemeralStore",
+    "PostgresStorage",
+    "PostRepository",
+    "UpdateOrderingIsolation",
+    "UserRepository",
+    "UserStatusCache",
+    "UserUpsertResult",
+    "create_ephemeral_store",
+]
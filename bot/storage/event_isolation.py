@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncGenerator
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+from bot.utils.metrics import Gauge, Histogram
+
+UPDATES_WAITING = Gauge(
+    "bot_updates_waiting",
+    "Updates waiting for the same user's previous update or for a free handler slot.",
+)
+UPDATES_IN_FLIGHT = Gauge("bot_updates_in_flight", "Updates currently inside handlers.")
+UPDATE_WAIT_SECONDS = Histogram(
+    "bot_update_wait_seconds", "Time an update waited before its handler started."
+)
+
+
+@dataclass
+class _UserSlot:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    updates: int = 0
+
+
+class UpdateOrderingIsolation(BaseEventIsolation):
+    """Handles one user's updates one at a time, in arrival order.
+
+    Without it a double-tapped button or a text and a photo sent back to back
+    run concurrently and interleave their read-modify-write on drafts. Updates
+    of different users still run in parallel, at most ``max_concurrent``
+    at once.
+
+    Passed to the dispatcher as ``events_isolation``: aiogram's FSM
+    middleware takes this lock before it reads the FSM state, so an update
+    is routed by the state its user's previous update left behind. Everything
+    registered after that middleware (throttling, the unit of work, the
+    handlers) runs inside the lock. An update takes its global slot only
+    after its user's lock, so a waiting update does not hold a handler slot.
+    It does hold whatever called the dispatcher, though: with polling that is
+    a task of its own, and :class:`~bot.webhook.WebhookIngress` keeps a
+    user's updates on one worker so that none of its workers waits here.
+    Updates without a user and chat get no FSM context and bypass both the
+    lock and the limit.
+    """
+
+    def __init__(self, max_concurrent: int) -> None:
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._slots: dict[int, _UserSlot] = {}
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        user_id = key.user_id
+        slot = self._enter(user_id)
+        started = time.perf_counter()
+        waiting = True
+        UPDATES_WAITING.inc()
+        try:
+            async with slot.lock:
+                async with self._semaphore:
+                    waiting = False
+                    UPDATES_WAITING.dec()
+                    UPDATE_WAIT_SECONDS.observe(time.perf_counter() - started)
+                    UPDATES_IN_FLIGHT.inc()
+                    try:
+                        yield
+                    finally:
+                        UPDATES_IN_FLIGHT.dec()
+        finally:
+            if waiting:
+                UPDATES_WAITING.dec()
+            self._leave(user_id, slot)
+
+    async def close(self) -> None:
+        pass
+
+    def _enter(self, key: int) -> _UserSlot:
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = _UserSlot()
+        slot.updates += 1
+        return slot
+
+    def _leave(self, key: int, slot: _UserSlot) -> None:
+        slot.updates -= 1
+        if slot.updates == 0:
+            del self._slots[key]
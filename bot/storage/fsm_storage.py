@@ -0,0 +1,196 @@
+"""aiogram FSM storage on the ``fsm_states`` table.
+
+Admin editing flows survive restarts and every replica sees the same state.
+Reads go through a small in-process cache; ``FSM_STORAGE_CACHE_TTL_SECONDS``
+bounds how long another replica's write can stay unseen (``0`` disables the
+cache). Every row carries a ``version``: ``update_data`` merges against the
+version it read and retries when another writer got there first, so two
+concurrent partial updates never drop each other's keys. Rows nobody wrote to
+for ``FSM_STATE_TTL_SECONDS`` are removed by ``run_cleanup_forever``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from sqlalchemy import and_, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.models import FsmState
+from bot.utils.expiring_cache import ExpiringCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FSM_CACHE_MAX_SIZE = 10_000
+DEFAULT_FSM_CACHE_TTL_SECONDS = 60.0
+DEFAULT_FSM_STATE_TTL_SECONDS = 7 * 24 * 3600.0
+_MAX_UPDATE_ATTEMPTS = 5
+
+_RowKey = tuple[int, int, int, int, str, str]
+
+
+@dataclass(frozen=True)
+class _Record:
+    state: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+    # 0 means there is no row yet.
+    version: int = 0
+
+
+def _row_key(key: StorageKey) -> _RowKey:
+    return (
+        key.bot_id,
+        key.chat_id,
+        key.user_id,
+        key.thread_id or 0,
+        key.business_connection_id or "",
+        key.destiny,
+    )
+
+
+def _key_columns(row_key: _RowKey) -> dict[str, Any]:
+    bot_id, chat_id, user_id, thread_id, business_connection_id, destiny = row_key
+    return {
+        "bot_id": bot_id,
+        "chat_id": chat_id,
+        "user_id": user_id,
+        "thread_id": thread_id,
+        "business_connection_id": business_connection_id,
+        "destiny": destiny,
+    }
+
+
+def _key_filter(row_key: _RowKey):
+    return and_(
+        *(getattr(FsmState, column) == value for column, value in _key_columns(row_key).items())
+    )
+
+
+_RETURNING = (FsmState.state, FsmState.data, FsmState.version)
+
+
+class PostgresStorage(BaseStorage):
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        *,
+        cache_max_size: int = DEFAULT_FSM_CACHE_MAX_SIZE,
+        cache_ttl_seconds: float = DEFAULT_FSM_CACHE_TTL_SECONDS,
+        state_ttl_seconds: float = DEFAULT_FSM_STATE_TTL_SECONDS,
+    ) -> None:
+        self._session_maker = session_maker
+        self._cache: ExpiringCache[_RowKey, _Record] = ExpiringCache(
+            cache_max_size, cache_ttl_seconds
+        )
+        self._state_ttl_seconds = state_ttl_seconds
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._load(_row_key(key))).state
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return dict((await self._load(_row_key(key))).data)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        await self._upsert(_row_key(key), state=value)
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        await self._upsert(_row_key(key), data=dict(data))
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        row_key = _row_key(key)
+        record = await self._load(row_key)
+        for _ in range(_MAX_UPDATE_ATTEMPTS):
+            merged = {**record.data, **data}
+            written = await self._write_if_version(row_key, record.version, merged)
+            if written is not None:
+                return dict(written.data)
+            logger.debug("FSM data changed concurrently, retrying key=%s", row_key)
+            record = await self._load(row_key, use_cache=False)
+        raise RuntimeError(f"FSM data for {row_key} keeps changing concurrently")
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+    async def purge_expired(self) -> int:
+        idle_since = func.now() - timedelta(seconds=self._state_ttl_seconds)
+        async with self._session_maker() as session:
+            async with session.begin():
+                result = await session.execute(
+                    delete(FsmState).where(FsmState.updated_at < idle_since)
+                )
+        return result.rowcount
+
+    async def run_cleanup_forever(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                removed = await self.purge_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("FSM storage cleanup failed")
+                continue
+            logger.debug("FSM storage cleanup removed=%s", removed)
+
+    async def _load(self, row_key: _RowKey, *, use_cache: bool = True) -> _Record:
+        if use_cache:
+            cached = self._cache.get(row_key)
+            if cached is not None:
+                return cached
+        async with self._session_maker() as session:
+            result = await session.execute(select(*_RETURNING).where(_key_filter(row_key)))
+            row = result.one_or_none()
+        record = _Record(*row) if row is not None else _Record()
+        self._cache.set(row_key, record)
+        return record
+
+    async def _upsert(self, row_key: _RowKey, **values: Any) -> None:
+        """Replace ``state`` or ``data`` without looking at the current version."""
+        statement = insert(FsmState).values(**_key_columns(row_key), version=1, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(_key_columns(row_key)),
+            set_={
+                **{column: getattr(statement.excluded, column) for column in values},
+                "version": FsmState.version + 1,
+                "updated_at": func.now(),
+            },
+        ).returning(*_RETURNING)
+        async with self._session_maker() as session:
+            async with session.begin():
+                row = (await session.execute(statement)).one()
+        self._cache.set(row_key, _Record(*row))
+
+    async def _write_if_version(
+        self, row_key: _RowKey, version: int, data: dict[str, Any]
+    ) -> _Record | None:
+        if version == 0:
+            statement = (
+                insert(FsmState)
+                .values(**_key_columns(row_key), data=data, version=1)
+                .on_conflict_do_nothing()
+                .returning(*_RETURNING)
+            )
+        else:
+            statement = (
+                update(FsmState)
+                .where(_key_filter(row_key), FsmState.version == version)
+                .values(data=data, version=FsmState.version + 1, updated_at=func.now())
+                .returning(*_RETURNING)
+            )
+        async with self._session_maker() as session:
+            async with session.begin():
+                row = (await session.execute(statement)).one_or_none()
+        if row is None:
+            self._cache.pop(row_key)
+            return None
+        record = _Record(*row)
+        self._cache.set(row_key, record)
+        return record
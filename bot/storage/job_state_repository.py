@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.models import JobState
+
+
+class JobStateRepository:
+    async def get(self, session: AsyncSession, name: str) -> JobState | None:
+        result = await session.execute(select(JobState).where(JobState.name == name))
+        return result.scalar_one_or_none()
+
+    async def save(
+        self,
+        session: AsyncSession,
+        name: str,
+        *,
+        cursor: int | None,
+        fingerprint: str | None,
+    ) -> JobState:
+        job_state = await self.get(session, name)
+        if job_state is None:
+            job_state = JobState(name=name)
+        job_state.cursor = cursor
+        job_state.fingerprint = fingerprint
+        job_state.updated_at = datetime.utcnow()
+        session.add(job_state)
+        return job_state
+
+    async def advance_fencing_token(self, session: AsyncSession, name: str) -> int:
+        """Increment the counter kept in ``cursor`` and return the new value."""
+        statement = insert(JobState).values(name=name, cursor=1, updated_at=func.now())
+        statement = statement.on_conflict_do_update(
+            index_elements=[JobState.name],
+            set_={"cursor": func.coalesce(JobState.cursor, 0) + 1, "updated_at": func.now()},
+        ).returning(JobState.cursor)
+        result = await session.execute(statement)
+        return result.scalar_one()
+
+    async def get_fencing_token(self, session: AsyncSession, name: str) -> int | None:
+        result = await session.execute(
+            select(JobState.cursor).where(JobState.name == name).with_for_update(read=True)
+        )
+        return result.scalar_one_or_none()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.models import Page, PageDraft
+
+_CONTENT_COLUMNS = (
+    "content",
+    "content_type",
+    "text",
+    "entities",
+    "file_id",
+    "caption",
+    "caption_entities",
+    "extra_document_file_id",
+    "extra_document_caption",
+    "extra_document_caption_entities",
+)
+
+
+class PageDraftRepository:
+    async def get(
+        self, session: AsyncSession, key: str, editor_tg_id: int, *, for_update: bool = False
+    ) -> PageDraft | None:
+        query = select(PageDraft).where(
+            PageDraft.key == key, PageDraft.editor_tg_id == editor_tg_id
+        )
+        if for_update:
+            query = query.with_for_update()
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def start_from_page(
+        self, session: AsyncSession, key: str, page: Page | None, editor_tg_id: int
+    ) -> PageDraft:
+        """Replace the editor's draft of ``key`` with a copy of the live page.
+
+        Drafts of other admins are left alone: each admin edits a copy of
+        their own.
+        """
+        draft = await self.get(session, key, editor_tg_id)
+        if draft is None:
+            draft = PageDraft(key=key, editor_tg_id=editor_tg_id)
+        draft.base_version = page.version if page is not None else 0
+        for column in _CONTENT_COLUMNS:
+            setattr(draft, column, getattr(page, column) if page is not None else None)
+        if draft.content is None:
+            draft.content = ""
+        if draft.content_type is None:
+            draft.content_type = "text"
+        draft.updated_at = datetime.utcnow()
+        session.add(draft)
+        return draft
+
+    async def update(
+        self, session: AsyncSession, key: str, editor_tg_id: int, **values: Any
+    ) -> PageDraft | None:
+        """Change draft columns in one statement and return the updated draft."""
+        result = await session.scalars(
+            update(PageDraft)
+            .where(PageDraft.key == key, PageDraft.editor_tg_id == editor_tg_id)
+            .values(updated_at=datetime.utcnow(), **values)
+            .returning(PageDraft)
+            .execution_options(populate_existing=True)
+        )
+        return result.one_or_none()
+
+    async def delete(self, session: AsyncSession, key: str, editor_tg_id: int) -> None:
+        await session.execute(
+            delete(PageDraft).where(PageDraft.key == key, PageDraft.editor_tg_id == editor_tg_id)
+        )
+
+    def apply_to_page(self, draft: PageDraft, page: Page) -> None:
+        for column in _CONTENT_COLUMNS:
+            setattr(page, column, getattr(draft, column))
@@ -1,16 +1,27 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from bot.models import Page
 
+PAGE_CHANGED_CHANNEL = "page_changed"
+
 
 class PageRepository:
-    async def get_by_key(self, session: AsyncSession, key: str) -> Page | None:
-        result = await session.execute(select(Page).where(Page.key == key))
+    async def get_by_key(
+        self, session: AsyncSession, key: str, *, for_update: bool = False
+    ) -> Page | None:
+        query = select(Page).where(Page.key == key)
+        if for_update:
+            query = query.with_for_update()
+        result = await session.execute(query)
         return result.scalar_one_or_none()
 
+    async def list_by_keys(self, session: AsyncSession, keys: list[str]) -> list[Page]:
+        result = await session.execute(select(Page).where(Page.key.in_(keys)))
+        return list(result.scalars().all())
+
     async def create(self, session: AsyncSession, key: str, content: str) -> Page:
         page = Page(key=key, content=content)
         session.add(page)
@@ -23,10 +34,18 @@ class PageRepository:
         text: str,
         entities: list[dict] | None,
     ) -> Page:
-        page = await self.get_by_key(session, key)
+        page = await self.get_by_key(session, key, for_update=True)
         if page is None:
-            page = Page(key=key, content=text, content_type="text", text=text, entities=entities)
+            page = Page(
+                key=key,
+                content=text,
+                content_type="text",
+                text=text,
+                entities=entities,
+                version=1,
+            )
         else:
+            page.version += 1
             page.content_type = "text"
             page.content = text
             page.text = text
@@ -45,7 +64,7 @@ class PageRepository:
         caption: str | None,
         caption_entities: list[dict] | None,
     ) -> Page:
-        page = await self.get_by_key(session, key)
+        page = await self.get_by_key(session, key, for_update=True)
         safe_caption = caption or ""
         if page is None:
             page = Page(
@@ -55,8 +74,10 @@ class PageRepository:
                 file_id=file_id,
                 caption=safe_caption,
                 caption_entities=caption_entities,
+                version=1,
             )
         else:
+            page.version += 1
             page.content_type = "photo"
             page.content = safe_caption
             page.text = None
@@ -75,7 +96,7 @@ class PageRepository:
         caption: str | None,
         caption_entities: list[dict] | None,
     ) -> Page:
-        page = await self.get_by_key(session, key)
+        page = await self.get_by_key(session, key, for_update=True)
         safe_caption = caption or ""
         if page is None:
             page = Page(
@@ -86,10 +107,17 @@ class PageRepository:
                 extra_document_file_id=file_id,
                 extra_document_caption=safe_caption,
                 extra_document_caption_entities=caption_entities,
+                version=1,
             )
         else:
+            page.version += 1
             page.extra_document_file_id = file_id
             page.extra_document_caption = safe_caption
             page.extra_document_caption_entities = caption_entities
         session.add(page)
         return page
+
+    async def notify_changed(self, session: AsyncSession, page: Page) -> None:
+        """Queue a ``key:version`` notification, delivered when the transaction commits."""
+        payload = f"{page.key}:{page.version}"
+        await session.execute(select(func.pg_notify(PAGE_CHANGED_CHANNEL, payload)))
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram.types import MessageEntity
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.storage.post_repository import PostRepository
+from bot.utils import deserialize_entities
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POST_DRAFT_FLUSH_DELAY_SECONDS = 2.0
+
+_DRAFT_PARTS = ("main_text", "main_media", "extra_document")
+
+
+@dataclass(frozen=True, slots=True)
+class PostText:
+    text: str
+    entities: list[dict] | None = None
+    message_entities: list[MessageEntity] | None = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def parse(cls, text: str, entities: list[dict] | None) -> PostText:
+        return cls(text, entities, deserialize_entities(entities))
+
+
+@dataclass(frozen=True, slots=True)
+class PostMedia:
+    type: str
+    file_id: str
+    caption: str | None = None
+    caption_entities: list[dict] | None = None
+    message_caption_entities: list[MessageEntity] | None = field(
+        default=None, compare=False, repr=False
+    )
+
+    @classmethod
+    def parse(cls, raw: dict[str, Any]) -> PostMedia:
+        caption_entities = raw.get("caption_entities")
+        return cls(
+            raw.get("type") or "photo",
+            raw.get("file_id") or "",
+            raw.get("caption"),
+            caption_entities,
+            deserialize_entities(caption_entities),
+        )
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "type": self.type,
+            "file_id": self.file_id,
+            "caption": self.caption,
+            "caption_entities": self.caption_entities,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class PostDocument:
+    file_id: str
+    file_name: str | None = None
+    caption: str | None = None
+    caption_entities: list[dict] | None = None
+    message_caption_entities: list[MessageEntity] | None = field(
+        default=None, compare=False, repr=False
+    )
+
+    @classmethod
+    def parse(cls, raw: dict[str, Any]) -> PostDocument:
+        caption_entities = raw.get("caption_entities")
+        return cls(
+            raw.get("file_id") or "",
+            raw.get("file_name"),
+            raw.get("caption"),
+            caption_entities,
+            deserialize_entities(caption_entities),
+        )
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "file_id": self.file_id,
+            "file_name": self.file_name,
+            "caption": self.caption,
+            "caption_entities": self.caption_entities,
+        }
+
+
+@dataclass(slots=True)
+class PostDraft:
+    """Parsed ``posts.entities`` payload of an admin's active draft.
+
+    ``id`` and ``created_by`` mirror the ``Post`` columns so the draft can be
+    rendered and broadcast like a loaded row. The parts are immutable and
+    keep their entities both as stored JSON and as ``MessageEntity`` objects,
+    so the JSONB payload is parsed once on load and serialized once per write;
+    edits replace a whole part. ``version`` is the ``posts.draft_version``
+    the parts were last synced with.
+    """
+
+    id: int
+    created_by: int
+    main_text: PostText | None = None
+    main_media: PostMedia | None = None
+    extra_document: PostDocument | None = None
+    version: int = 0
+
+    @classmethod
+    def from_payload(
+        cls, post_id: int, created_by: int, payload: Any, version: int = 0
+    ) -> PostDraft:
+        payload = payload if isinstance(payload, dict) else {}
+        text = payload.get("main_text")
+        media = payload.get("main_media")
+        document = payload.get("extra_document")
+        return cls(
+            id=post_id,
+            created_by=created_by,
+            main_text=PostText.parse(text, payload.get("main_entities")) if text else None,
+            main_media=PostMedia.parse(media) if media else None,
+            extra_document=PostDocument.parse(document) if document else None,
+            version=version,
+        )
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "main_text": self.main_text.text if self.main_text else None,
+            "main_entities": self.main_text.entities if self.main_text else None,
+            "main_media": self.main_media.to_payload() if self.main_media else None,
+            "extra_document": self.extra_document.to_payload() if self.extra_document else None,
+        }
+
+    def is_empty(self) -> bool:
+        return not (self.main_text or self.main_media or self.extra_document)
+
+    def clear(self) -> None:
+        self.main_text = None
+        self.main_media = None
+        self.extra_document = None
+
+
+class PostDraftStore:
+    """Admin post drafts kept in process memory and written behind to ``posts``.
+
+    Edits change the in-memory draft and schedule a flush after
+    ``flush_delay_seconds`` of quiet, so a burst of messages costs one
+    ``UPDATE``. Sending or cancelling flushes or drops the draft right away.
+    A draft missing from memory (after a restart) is loaded from its
+    ``posts`` row, which is at most one flush behind.
+
+    With several replicas an admin's messages may reach different processes,
+    each holding its own copy. Writes are compare-and-set on
+    ``posts.draft_version``. On a mismatch the row is reloaded, and the parts
+    this process changed since its last sync are applied on top before
+    retrying, so edits made elsewhere are kept. An explicit :meth:`flush`
+    (before sending) also picks up newer versions when nothing is pending.
+    Until then a process may show a preview without another replica's latest
+    edits.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        post_repository: PostRepository,
+        flush_delay_seconds: float = DEFAULT_POST_DRAFT_FLUSH_DELAY_SECONDS,
+    ) -> None:
+        self._session_maker = session_maker
+        self._post_repository = post_repository
+        self._flush_delay_seconds = flush_delay_seconds
+        self._drafts: dict[int, PostDraft] = {}
+        # Draft parts as of the last load or write, to tell local edits apart.
+        self._synced: dict[int, PostDraft] = {}
+        self._dirty: set[int] = set()
+        self._flush_tasks: dict[int, asyncio.Task] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+        self.flushes = 0
+
+    async def get(self, admin_id: int) -> PostDraft | None:
+        draft = self._drafts.get(admin_id)
+        if draft is not None:
+            return draft
+        async with self._session_maker() as session:
+            post = await self._post_repository.get_active_draft_by_admin(session, admin_id)
+            if post is None:
+                return None
+            draft = PostDraft.from_payload(
+                post.id, post.created_by, post.entities, post.draft_version
+            )
+        logger.info("Post draft loaded admin_id=%s post_id=%s", admin_id, draft.id)
+        return self._remember(admin_id, draft)
+
+    async def get_or_create(self, admin_id: int) -> PostDraft:
+        draft = await self.get(admin_id)
+        if draft is not None:
+            return draft
+        async with self._session_maker() as session:
+            async with session.begin():
+                post = await self._post_repository.create_draft(
+                    session,
+                    created_by=admin_id,
+                    content_type="draft_v2",
+                    text=None,
+                    entities=PostDraft(id=0, created_by=admin_id).to_payload(),
+                    file_id=None,
+                    caption=None,
+                    caption_entities=None,
+                )
+                await session.flush()
+                draft = PostDraft(id=post.id, created_by=admin_id)
+        return self._remember(admin_id, draft)
+
+    def mark_dirty(self, draft: PostDraft) -> None:
+        """Schedule a write of ``draft`` once edits have been quiet for the flush delay."""
+        admin_id = draft.created_by
+        self._dirty.add(admin_id)
+        task = self._flush_tasks.pop(admin_id, None)
+        if task is not None:
+            task.cancel()
+        self._flush_tasks[admin_id] = asyncio.create_task(self._flush_later(admin_id))
+
+    async def flush(self, admin_id: int) -> PostDraft | None:
+        """Write any pending edits now, or pick up a newer version, and return the draft."""
+        task = self._flush_tasks.pop(admin_id, None)
+        if task is not None:
+            task.cancel()
+        if admin_id in self._dirty:
+            await self._write(admin_id)
+        else:
+            await self._refresh(admin_id)
+        return self._drafts.get(admin_id)
+
+    async def flush_all(self) -> None:
+        for admin_id in list(self._dirty):
+            try:
+                await self.flush(admin_id)
+            except Exception:
+                logger.exception("Failed to flush post draft admin_id=%s", admin_id)
+
+    def discard(self, admin_id: int) -> None:
+        """Forget the in-memory draft without writing pending edits."""
+        task = self._flush_tasks.pop(admin_id, None)
+        if task is not None:
+            task.cancel()
+        self._dirty.discard(admin_id)
+        self._drafts.pop(admin_id, None)
+        self._synced.pop(admin_id, None)
+
+    def _remember(self, admin_id: int, draft: PostDraft) -> PostDraft:
+        draft = self._drafts.setdefault(admin_id, draft)
+        self._synced.setdefault(admin_id, dataclasses.replace(draft))
+        return draft
+
+    async def _flush_later(self, admin_id: int) -> None:
+        await asyncio.sleep(self._flush_delay_seconds)
+        self._flush_tasks.pop(admin_id, None)
+        try:
+            await self._write(admin_id)
+        except Exception:
+            logger.exception("Failed to flush post draft admin_id=%s", admin_id)
+
+    async def _write(self, admin_id: int) -> None:
+        lock = self._locks.setdefault(admin_id, asyncio.Lock())
+        async with lock:
+            draft = self._drafts.get(admin_id)
+            if admin_id not in self._dirty or draft is None:
+                return
+            self._dirty.discard(admin_id)
+            try:
+                while True:
+                    snapshot = dataclasses.replace(draft)
+                    async with self._session_maker() as session:
+                        async with session.begin():
+                            version = await self._post_repository.update_draft_payload(
+                                session, draft.id, snapshot.to_payload(), snapshot.version
+                            )
+                    if version is not None:
+                        draft.version = snapshot.version = version
+                        self._synced[admin_id] = snapshot
+                        break
+                    if not await self._merge_latest(admin_id, draft):
+                        return
+            except Exception:
+                self._dirty.add(admin_id)
+                raise
+            self.flushes += 1
+
+    async def _refresh(self, admin_id: int) -> None:
+        lock = self._locks.setdefault(admin_id, asyncio.Lock())
+        async with lock:
+            draft = self._drafts.get(admin_id)
+            if draft is not None and admin_id not in self._dirty:
+                await self._merge_latest(admin_id, draft)
+
+    async def _merge_latest(self, admin_id: int, draft: PostDraft) -> bool:
+        """Reload the row into ``draft``, keeping parts changed here since the last sync.
+
+        Returns False, and forgets the draft, when it was sent or cancelled
+        elsewhere.
+        """
+        async with self._session_maker() as session:
+            post = await self._post_repository.get_active_draft_by_admin(session, admin_id)
+        if post is None or post.id != draft.id:
+            logger.warning(
+                "Post draft admin_id=%s post_id=%s was closed in another process, "
+                "dropping local edits",
+                admin_id,
+                draft.id,
+            )
+            self.discard(admin_id)
+            return False
+        if post.draft_version == draft.version:
+            return True
+        latest = PostDraft.from_payload(
+            post.id, post.created_by, post.entities, post.draft_version
+        )
+        synced = self._synced.get(admin_id)
+        for part in _DRAFT_PARTS:
+            if synced is None or getattr(draft, part) == getattr(synced, part):
+                setattr(draft, part, getattr(latest, part))
+        draft.version = latest.version
+        self._synced[admin_id] = latest
+        logger.info(
+            "Post draft admin_id=%s post_id=%s changed in another process, merged version=%s",
+            admin_id,
+            draft.id,
+            latest.version,
+        )
+        return True
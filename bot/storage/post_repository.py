@@ -54,6 +54,44 @@ class PostRepository:
         )
         return result.scalar_one_or_none()
 
+    async def update_draft_payload(
+        self, session: AsyncSession, post_id: int, payload: dict, expected_version: int
+    ) -> int | None:
+        """Write ``payload`` if the draft is still at ``expected_version``.
+
+        Returns the new version, or None when the row was changed by another
+        process or is no longer a draft.
+        """
+        result = await session.execute(
+            update(Post)
+            .where(
+                Post.id == post_id,
+                Post.status == "draft",
+                Post.draft_version == expected_version,
+            )
+            .values(
+                content_type="draft_v2",
+                entities=payload,
+                draft_version=Post.draft_version + 1,
+            )
+            .returning(Post.draft_version)
+        )
+        return result.scalar_one_or_none()
+
+    async def mark_sending(self, session: AsyncSession, post_id: int) -> bool:
+        """Take a draft out of editing for its broadcast.
+
+        Returns False when the post is no longer a draft: it was canceled, or
+        another tap (on any replica) already started sending it.
+        """
+        result = await session.execute(
+            update(Post)
+            .where(Post.id == post_id, Post.status == "draft")
+            .values(status="sending")
+            .returning(Post.id)
+        )
+        return result.scalar_one_or_none() is not None
+
     async def mark_sent(
         self,
         session: AsyncSession,
@@ -74,6 +112,14 @@ class PostRepository:
             )
         )
 
+    async def mark_failed(self, session: AsyncSession, post_id: int) -> None:
+        """Close a post whose broadcast broke off; it may have reached some users."""
+        await session.execute(
+            update(Post)
+            .where(Post.id == post_id, Post.status == "sending")
+            .values(status="failed", sent_at=datetime.utcnow())
+        )
+
     async def mark_canceled(self, session: AsyncSession, post_id: int) -> None:
         await session.execute(
             update(Post)
@@ -1,12 +1,55 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import case, event, func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from bot.models import RegistrationStatus, User
+from bot.storage.user_status_cache import USER_STATUS_CHANNEL, CachedUserStatus, UserStatusCache
+
+_PENDING_INVALIDATIONS = "pending_user_status_invalidations"
+
+
+@dataclass(frozen=True)
+class UserUpsertResult:
+    previous_status: RegistrationStatus | None
+    status: RegistrationStatus
+    editing_page_key: str | None
+
+    @property
+    def created(self) -> bool:
+        return self.previous_status is None
 
 
 class UserRepository:
+    def __init__(self, status_cache: UserStatusCache | None = None) -> None:
+        self._status_cache = status_cache
+
+    def get_cached_status(self, tg_id: int) -> tuple[bool, CachedUserStatus | None]:
+        if self._status_cache is None:
+            return False, None
+        return self._status_cache.lookup(tg_id)
+
+    async def get_status(self, session: AsyncSession, tg_id: int) -> CachedUserStatus | None:
+        """Read ``(status, editing_page_key)``, going to the database only on a cache miss."""
+        hit, cached = self.get_cached_status(tg_id)
+        if hit:
+            return cached
+        generation = self._status_cache.generation if self._status_cache is not None else 0
+        result = await session.execute(
+            select(User.status, User.editing_page_key).where(User.tg_id == tg_id)
+        )
+        row = result.one_or_none()
+        value = None if row is None else CachedUserStatus(status=row[0], editing_page_key=row[1])
+        if self._status_cache is not None:
+            self._status_cache.store(tg_id, value, generation)
+        return value
+
     async def get_by_tg_id(self, session: AsyncSession, tg_id: int) -> User | None:
         result = await session.execute(select(User).where(User.tg_id == tg_id))
         return result.scalar_one_or_none()
@@ -20,8 +63,64 @@ class UserRepository:
     ) -> User:
         user = User(tg_id=tg_id, username=username, status=status)
         session.add(user)
+        await self._invalidate(session, [tg_id])
         return user
 
+    async def upsert(
+        self,
+        session: AsyncSession,
+        tg_id: int,
+        username: str | None,
+        *,
+        promote_from: Iterable[RegistrationStatus] = (),
+        promote_to: RegistrationStatus | None = None,
+        editing_page_key: str | None = None,
+    ) -> UserUpsertResult:
+        """Create or refresh the user in a single ``INSERT ... ON CONFLICT`` statement.
+
+        The username is always refreshed. If ``promote_to`` is given, a new user
+        starts with that status and an existing one is moved to it only when
+        its current status is in ``promote_from``. A non-empty
+        ``editing_page_key`` is stored as well. ``previous_status`` is read by
+        a sub-select that sees the row as it was before the statement, and is
+        ``None`` for a freshly inserted user.
+        """
+        promote_from = list(promote_from)
+        now = datetime.utcnow()
+        values = {
+            "tg_id": tg_id,
+            "username": username,
+            "status": promote_to or RegistrationStatus.NONE,
+            "created_at": now,
+            "updated_at": now,
+        }
+        set_ = {"username": username, "updated_at": now}
+        if promote_to is not None and promote_from:
+            set_["status"] = case(
+                (User.status.in_(promote_from), promote_to),
+                else_=User.status,
+            )
+        if editing_page_key is not None:
+            values["editing_page_key"] = editing_page_key
+            set_["editing_page_key"] = editing_page_key
+
+        previous = aliased(User)
+        previous_status = (
+            select(previous.status).where(previous.tg_id == tg_id).scalar_subquery()
+        )
+        statement = insert(User).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[User.tg_id],
+            set_=set_,
+        ).returning(User.status, User.editing_page_key, previous_status)
+        row = (await session.execute(statement)).one()
+        await self._invalidate(session, [tg_id])
+        return UserUpsertResult(
+            previous_status=row[2],
+            status=row[0],
+            editing_page_key=row[1],
+        )
+
     async def update_username(
         self, session: AsyncSession, user: User, username: str | None
     ) -> None:
@@ -35,6 +134,7 @@ class UserRepository:
         if user.status != status:
             user.status = status
             session.add(user)
+            await self._invalidate(session, [user.tg_id])
 
     async def set_editing_page_key(
         self, session: AsyncSession, user: User, key: str | None
@@ -42,9 +142,69 @@ class UserRepository:
         if user.editing_page_key != key:
             user.editing_page_key = key
             session.add(user)
+            await self._invalidate(session, [user.tg_id])
+
+    async def confirm(self, session: AsyncSession, tg_id: int) -> bool:
+        result = await session.execute(
+            update(User)
+            .where(User.tg_id == tg_id, User.status != RegistrationStatus.CONFIRMED)
+            .values(status=RegistrationStatus.CONFIRMED)
+        )
+        if result.rowcount == 0:
+            return False
+        await self._invalidate(session, [tg_id])
+        return True
 
     async def list_confirmed_user_ids(self, session: AsyncSession) -> list[int]:
         result = await session.execute(
             select(User.tg_id).where(User.status == RegistrationStatus.CONFIRMED)
         )
         return list(result.scalars().all())
+
+    async def list_confirmed_user_ids_after(
+        self, session: AsyncSession, after_tg_id: int | None, limit: int
+    ) -> list[int]:
+        query = select(User.tg_id).where(User.status == RegistrationStatus.CONFIRMED)
+        if after_tg_id is not None:
+            query = query.where(User.tg_id > after_tg_id)
+        result = await session.execute(query.order_by(User.tg_id).limit(limit))
+        return list(result.scalars().all())
+
+    async def revoke_confirmation(self, session: AsyncSession, tg_ids: list[int]) -> int:
+        if not tg_ids:
+            return 0
+        result = await session.execute(
+            update(User)
+            .where(User.tg_id.in_(tg_ids), User.status == RegistrationStatus.CONFIRMED)
+            .values(status=RegistrationStatus.TOKEN_VERIFIED)
+        )
+        if result.rowcount:
+            await self._invalidate(session, tg_ids)
+        return result.rowcount
+
+    async def _invalidate(self, session: AsyncSession, tg_ids: list[int]) -> None:
+        # Local entries are dropped right away and again after the commit:
+        # a concurrent reader may have cached the old row in between, and
+        # the generation bump stops readers still in flight from storing it.
+        # The NOTIFY is delivered to every listening instance, this one
+        # included, once the transaction commits.
+        if self._status_cache is None:
+            return
+        self._status_cache.invalidate(tg_ids)
+        self._invalidate_after_commit(session, tg_ids)
+        if self._status_cache.publish_invalidations:
+            payload = ",".join(str(tg_id) for tg_id in tg_ids)
+            await session.execute(select(func.pg_notify(USER_STATUS_CHANNEL, payload)))
+
+    def _invalidate_after_commit(self, session: AsyncSession, tg_ids: list[int]) -> None:
+        sync_session = session.sync_session
+        pending = sync_session.info.get(_PENDING_INVALIDATIONS)
+        if pending is None:
+            pending = sync_session.info[_PENDING_INVALIDATIONS] = set()
+            event.listen(sync_session, "after_commit", self._after_commit, once=True)
+        pending.update(tg_ids)
+
+    def _after_commit(self, sync_session) -> None:
+        pending = sync_session.info.pop(_PENDING_INVALIDATIONS, None)
+        if pending and self._status_cache is not None:
+            self._status_cache.invalidate(pending)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable
+
+from bot.models import RegistrationStatus
+from bot.utils.expiring_cache import ExpiringCache
+
+logger = logging.getLogger(__name__)
+
+USER_STATUS_CHANNEL = "user_status_changed"
+DEFAULT_USER_STATUS_CACHE_MAX_SIZE = 10_000
+DEFAULT_USER_STATUS_CACHE_TTL_SECONDS = 300.0
+
+_NOT_CACHED = object()
+
+
+@dataclass(frozen=True)
+class CachedUserStatus:
+    status: RegistrationStatus
+    editing_page_key: str | None
+
+
+class UserStatusCache:
+    """Per-process cache of ``(status, editing_page_key)`` keyed by ``tg_id``.
+
+    Unknown users are cached too, so repeated messages from people who never
+    pressed /start do not reach the database either. ``UserRepository`` drops
+    entries on every write, and again once the write commits. With
+    ``publish_invalidations`` it also sends a ``NOTIFY`` in the writing
+    transaction so other instances drop theirs. The TTL limits how stale an
+    entry can get if a notification is lost.
+
+    Every invalidation bumps a generation number. A value loaded before an
+    invalidation is only stored if the generation is still the one seen
+    before the load, so a reader racing a commit cannot cache the old row.
+    The counter is shared by all keys, which keeps it O(1) in memory at the
+    cost of skipping a few stores while writes are in flight.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_USER_STATUS_CACHE_MAX_SIZE,
+        ttl_seconds: float = DEFAULT_USER_STATUS_CACHE_TTL_SECONDS,
+        *,
+        publish_invalidations: bool = False,
+    ) -> None:
+        self._entries: ExpiringCache[int, CachedUserStatus | None] = ExpiringCache(
+            max_size, ttl_seconds
+        )
+        self.publish_invalidations = publish_invalidations
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, tg_id: int) -> tuple[bool, CachedUserStatus | None]:
+        """Return ``(True, value)`` on a hit, where ``value`` is None for unknown users."""
+        value = self._entries.get(tg_id, _NOT_CACHED)
+        if value is _NOT_CACHED:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, value
+
+    def store(
+        self, tg_id: int, value: CachedUserStatus | None, generation: int | None = None
+    ) -> None:
+        """Cache ``value`` unless something was invalidated since ``generation`` was read."""
+        if generation is None or generation == self.generation:
+            self._entries.set(tg_id, value)
+
+    def invalidate(self, tg_ids: Iterable[int]) -> None:
+        self.generation += 1
+        for tg_id in tg_ids:
+            self._entries.pop(tg_id)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def handle_notification(self, payload: str) -> None:
+        try:
+            tg_ids = [int(part) for part in payload.split(",") if part]
+        except ValueError:
+            logger.warning("Malformed user status notification payload=%r, clearing cache", payload)
+            self.clear()
+            return
+        self.invalidate(tg_ids)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from bot.utils.metrics import Counter, Histogram
+
+API_REQUEST_SECONDS = Histogram(
+    "bot_telegram_api_request_seconds", "Bot API request latency, by method."
+)
+API_ERRORS = Counter(
+    "bot_telegram_api_errors_total", "Failed Bot API requests, by method and exception class."
+)
+
+
+class InstrumentedAiohttpSession(AiohttpSession):
+    """aiogram's aiohttp session that records latency and errors of every API call.
+
+    Errors are labelled with the aiogram exception class
+    (``TelegramRetryAfter``, ``TelegramForbiddenError``, ``TelegramNetworkError``
+    and so on), so flood waits and blocked users can be told apart from
+    network trouble.
+    """
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: Optional[int] = None
+    ) -> TelegramType:
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await super().make_request(bot, method, timeout)
+        except Exception as exc:
+            API_ERRORS.inc(method=api_method, error=type(exc).__name__)
+            raise
+        finally:
+            API_REQUEST_SECONDS.observe(time.perf_counter() - started, method=api_method)
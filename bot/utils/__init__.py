@@ -1,7 +1,11 @@
 from bot.utils.dedupe import should_notify_album, should_notify_document_update
+from bot.utils.expiring_cache import ExpiringCache
 from bot.utils.telegram_entities import deserialize_entities, serialize_entities
+from bot.utils.throttling import TokenBucketLimiter
 
 __all__ = [
+    "ExpiringCache",
+    "TokenBucketLimiter",
     "deserialize_entities",
     "serialize_entities",
     "should_notify_album",
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+# Stale heap items tolerated before a rebuild, so tiny caches don't rebuild on every write.
+_MIN_HEAP_SLACK = 64
+
+
+class ExpiringCache(Generic[K, V]):
+    """TTL cache with a hard size limit and least-recently-used eviction.
+
+    Entries live in an ordered dict that is re-ordered on every read and
+    write, so the front is always the least recently used entry. Expiry is
+    tracked separately in a heap keyed by expiry time, because TTLs may
+    differ per call and recency says nothing about which entry expires
+    first. Writes pop expired entries off the heap (O(log n) each); reads
+    drop an expired entry lazily. Heap items left behind by overwritten or
+    popped keys are skipped when they surface, and the heap is rebuilt once
+    they outnumber the live entries. When the cache is full, the least
+    recently used entry is evicted.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._expiry_heap: list[tuple[float, int, K]] = []
+        self._sequence = itertools.count()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl_seconds: float | None = None) -> None:
+        now = self._clock()
+        self._purge_expired(now)
+        ttl = self._ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = now + ttl
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        heapq.heappush(self._expiry_heap, (expires_at, next(self._sequence), key))
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        if len(self._expiry_heap) > 2 * len(self._entries) + _MIN_HEAP_SLACK:
+            self._rebuild_heap()
+
+    def add(self, key: K, value: V, ttl_seconds: float | None = None) -> bool:
+        """Store ``value`` only if ``key`` has no live entry; return True if stored."""
+        if key in self:
+            return False
+        self.set(key, value, ttl_seconds)
+        return True
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[1] <= self._clock():
+            return default
+        return entry[0]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._expiry_heap.clear()
+
+    def _purge_expired(self, now: float) -> None:
+        heap = self._expiry_heap
+        entries = self._entries
+        while heap and heap[0][0] <= now:
+            expires_at, _, key = heapq.heappop(heap)
+            entry = entries.get(key)
+            # Skip heap items of keys that were overwritten or popped since.
+            if entry is not None and entry[1] == expires_at:
+                del entries[key]
+
+    def _rebuild_heap(self) -> None:
+        self._expiry_heap = [
+            (expires_at, next(self._sequence), key)
+            for key, (_, expires_at) in self._entries.items()
+        ]
+        heapq.heapify(self._expiry_heap)
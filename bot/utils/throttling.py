@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+from bot.utils.expiring_cache import ExpiringCache
+
+
+@dataclass
+class _Bucket:
+    tokens: float
+    updated_at: float
+    notified: bool = False
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets: ``burst`` tokens, refilled at ``rate_per_second``.
+
+    Buckets live in an :class:`ExpiringCache`, so memory stays bounded by
+    ``max_keys``. An entry expires once its bucket would have refilled
+    completely, which is the same as never having seen the key. Evicting a
+    busy key early only hands it a fresh bucket.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: int,
+        *,
+        max_keys: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate_per_second <= 0 or burst <= 0:
+            raise ValueError("rate_per_second and burst must be positive")
+        self._rate = rate_per_second
+        self._burst = float(burst)
+        self._clock = clock
+        self._buckets: ExpiringCache[Hashable, _Bucket] = ExpiringCache(
+            max_keys, ttl_seconds=self._burst / rate_per_second, clock=clock
+        )
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: Hashable) -> bool:
+        """Take one token for ``key``; return False if its bucket is empty."""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = _Bucket(tokens=self._burst, updated_at=now)
+        else:
+            elapsed = now - bucket.updated_at
+            bucket.tokens = min(self._burst, bucket.tokens + elapsed * self._rate)
+            bucket.updated_at = now
+
+        allowed = bucket.tokens >= 1.0
+        if allowed:
+            bucket.tokens -= 1.0
+            bucket.notified = False
+        self._buckets.set(key, bucket)
+        return allowed
+
+    def should_notify(self, key: Hashable) -> bool:
+        """True for the first rejection after an allowed call, False until the next one."""
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.notified:
+            return False
+        bucket.notified = True
+        return True
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+import logging
+import time
+from collections import deque
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.middlewares.user_context import UserContextMiddleware
+from aiogram.types import Update
+from aiohttp import web
+from pydantic import ValidationError
+
+from bot.config import Settings
+from bot.utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+_DRAIN_TIMEOUT_SECONDS = 10.0
+
+UPDATES_RECEIVED = Counter(
+    "bot_webhook_updates_received_total", "Updates accepted into the ingress queue."
+)
+UPDATES_REJECTED = Counter(
+    "bot_webhook_updates_rejected_total", "Webhook requests not queued, by reason."
+)
+UPDATES_FAILED = Counter(
+    "bot_webhook_updates_failed_total", "Queued updates whose handler raised."
+)
+QUEUE_DEPTH = Gauge("bot_webhook_queue_depth", "Updates waiting for a dispatcher worker.")
+UPDATES_PARKED = Gauge(
+    "bot_webhook_updates_parked",
+    "Queued updates set aside until the worker busy with the same user gets to them.",
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "bot_webhook_queue_wait_seconds", "Time an update spent queued before a worker started it."
+)
+PROCESSING_SECONDS = Histogram(
+    "bot_webhook_update_processing_seconds", "Time a worker spent dispatching one update."
+)
+
+
+class WebhookIngress:
+    """Acks Telegram as soon as an update is queued; workers dispatch it later.
+
+    The queue is bounded. When it is full the request gets ``503`` and
+    Telegram redelivers the update later, so a surge slows intake instead of
+    growing memory without limit.
+
+    Updates of one user are handled in order by the worker that took the
+    first of them: a worker that picks up an update of a user another worker
+    is busy with parks it on that worker and moves on. No worker sits idle
+    waiting for :class:`~bot.storage.UpdateOrderingIsolation` to let a
+    user's next update through, so one slow user (an admin publishing a page, say) never stalls
+    the updates of everybody else. Parked updates count against the queue
+    size.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        *,
+        secret_token: str,
+        queue_size: int,
+        workers: int,
+    ) -> None:
+        self._dispatcher = dispatcher
+        self._bot = bot
+        self._secret_token = secret_token
+        self._queue: asyncio.Queue[tuple[Update, float]] = asyncio.Queue(maxsize=queue_size)
+        self._queue_size = queue_size
+        # Users a worker is busy with, and their updates that arrived meanwhile.
+        self._parked: dict[int, deque[tuple[Update, float]]] = {}
+        self._parked_count = 0
+        self._worker_count = workers
+        self._workers: list[asyncio.Task] = []
+        QUEUE_DEPTH.set_function(self._queue.qsize)
+        UPDATES_PARKED.set_function(lambda: self._parked_count)
+
+    def create_app(self, path: str) -> web.Application:
+        """The public app Telegram posts to; metrics are served elsewhere."""
+        app = web.Application()
+        app.router.add_post(path, self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_TOKEN_HEADER, "")
+        if not hmac.compare_digest(token, self._secret_token):
+            UPDATES_REJECTED.inc(reason="unauthorized")
+            return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self._bot})
+        except (ValueError, ValidationError):
+            UPDATES_REJECTED.inc(reason="malformed")
+            return web.Response(status=400)
+        if self._queue.qsize() + self._parked_count >= self._queue_size:
+            UPDATES_REJECTED.inc(reason="queue_full")
+            logger.warning("Webhook queue is full, asking Telegram to retry update_id=%s", update.update_id)
+            return web.Response(status=503)
+        self._queue.put_nowait((update, time.monotonic()))
+        UPDATES_RECEIVED.inc()
+        return web.Response()
+
+    def start(self) -> None:
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"webhook-worker-{index}")
+            for index in range(self._worker_count)
+        ]
+
+    async def stop(self) -> None:
+        """Let the workers finish what is already queued, then cancel them."""
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=_DRAIN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Dropping %s queued updates on shutdown", self._queue.qsize() + self._parked_count
+            )
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def _work(self) -> None:
+        while True:
+            update, queued_at = await self._queue.get()
+            key = _ordering_key(update)
+            if key is None:
+                await self._process(update, queued_at)
+                continue
+            parked = self._parked.get(key)
+            if parked is not None:
+                parked.append((update, queued_at))
+                self._parked_count += 1
+                continue
+            parked = self._parked[key] = deque()
+            try:
+                await self._process(update, queued_at)
+                while parked:
+                    update, queued_at = parked.popleft()
+                    self._parked_count -= 1
+                    await self._process(update, queued_at)
+            finally:
+                # Only cancellation gets here with updates still parked;
+                # ``stop`` has already given up on them.
+                self._parked_count -= len(parked)
+                del self._parked[key]
+
+    async def _process(self, update: Update, queued_at: float) -> None:
+        started = time.monotonic()
+        QUEUE_WAIT_SECONDS.observe(started - queued_at)
+        try:
+            await self._dispatcher.feed_update(self._bot, update)
+        except Exception:
+            UPDATES_FAILED.inc()
+            logger.exception("Failed to process update_id=%s", update.update_id)
+        finally:
+            PROCESSING_SECONDS.observe(time.monotonic() - started)
+            self._queue.task_done()
+
+
+def _ordering_key(update: Update) -> int | None:
+    """The key ``UpdateOrderingIsolation`` serialises on: the user, else the chat."""
+    context = UserContextMiddleware.resolve_event_context(update)
+    if context.user is not None:
+        return context.user.id
+    return context.chat.id if context.chat is not None else None
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, settings: Settings) -> None:
+    if not settings.webhook_url or not settings.webhook_secret:
+        raise RuntimeError("WEBHOOK_URL and WEBHOOK_SECRET are required in webhook mode")
+
+    ingress = WebhookIngress(
+        dispatcher,
+        bot,
+        secret_token=settings.webhook_secret,
+        queue_size=settings.webhook_queue_size,
+        workers=settings.webhook_workers,
+    )
+    runner = web.AppRunner(ingress.create_app(settings.webhook_path))
+    await runner.setup()
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port)
+
+    await dispatcher.emit_startup(bot=bot, **dispatcher.workflow_data)
+    ingress.start()
+    await site.start()
+    await bot.set_webhook(
+        url=settings.webhook_url.rstrip("/") + settings.webhook_path,
+        secret_token=settings.webhook_secret,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+        max_connections=settings.webhook_max_connections,
+    )
+    logger.info(
+        "Webhook server listening on %s:%s%s with %s workers",
+        settings.webhook_host,
+        settings.webhook_port,
+        settings.webhook_path,
+        settings.webhook_workers,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await site.stop()
+        await ingress.stop()
+        await runner.cleanup()
+        await dispatcher.emit_shutdown(bot=bot, **dispatcher.workflow_data)
+        await bot.session.close()
@@ -13,6 +13,7 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 from bot.models import RegistrationStatus
 from bot.services.registration import RegistrationService
 from bot.services.token_verifier import get_token_verifier
+from bot.storage import UserUpsertResult
 
 
 def b64url(data: bytes) -> str:
@@ -35,19 +36,29 @@ class FakeUserRepository:
     def __init__(self) -> None:
         self._users: dict[int, FakeUser] = {}
 
-    async def get_by_tg_id(self, session, tg_id: int):
-        return self._users.get(tg_id)
-
-    async def create(self, session, tg_id: int, username: str | None, status: RegistrationStatus):
-        user = FakeUser(tg_id=tg_id, username=username, status=status)
-        self._users[tg_id] = user
-        return user
-
-    async def update_username(self, session, user: FakeUser, username: str | None) -> None:
+    async def upsert(
+        self,
+        session,
+        tg_id: int,
+        username: str | None,
+        *,
+        promote_from=(),
+        promote_to: RegistrationStatus | None = None,
+        editing_page_key: str | None = None,
+    ) -> UserUpsertResult:
+        user = self._users.get(tg_id)
+        previous_status = user.status if user is not None else None
+        if user is None:
+            user = FakeUser(tg_id, username, promote_to or RegistrationStatus.NONE)
+            self._users[tg_id] = user
+        elif promote_to is not None and user.status in promote_from:
+            user.status = promote_to
         user.username = username
-
-    async def set_status(self, session, user: FakeUser, status: RegistrationStatus) -> None:
-        user.status = status
+        return UserUpsertResult(
+            previous_status=previous_status,
+            status=user.status,
+            editing_page_key=editing_page_key,
+        )
 
 
 class _Ctx:
@@ -255,3 +266,18 @@ class TestRegistrationAdminBypass(unittest.IsolatedAsyncioTestCase):
         self.assertTrue(result.token_provided)
         self.assertTrue(result.token_valid)
         self.assertEqual(result.current_status, RegistrationStatus.TOKEN_VERIFIED)
+
+    async def test_invalid_token_keeps_existing_status(self) -> None:
+        repository = FakeUserRepository()
+        repository._users[100] = FakeUser(100, "old", RegistrationStatus.CONFIRMED)
+        service = RegistrationService(
+            session_maker=FakeSessionMaker(),
+            user_repository=repository,
+            token_verifier=get_token_verifier(self.factory.public_key_pem()),
+            admin_ids=[42],
+        )
+        result = await service.handle_start(tg_id=100, username="new", token="garbage")
+        self.assertFalse(result.token_valid)
+        self.assertEqual(result.previous_status, RegistrationStatus.CONFIRMED)
+        self.assertEqual(result.current_status, RegistrationStatus.CONFIRMED)
+        self.assertEqual(repository._users[100].username, "new")
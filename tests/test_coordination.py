@@ -0,0 +1,179 @@
+import asyncio
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from bot.db.coordination import (
+    ClusterCoordinator,
+    LeaderElector,
+    LockBusyError,
+    StaleFencingTokenError,
+    advisory_lock_key,
+)
+from bot.storage import JobStateRepository
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+JOB_PREFIX = "test_coordination"
+
+# One bot replica reduced to the part under test.
+REPLICA_SCRIPT = f"""
+import asyncio, os, sys
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from bot.db.coordination import ClusterCoordinator
+from bot.storage import JobStateRepository
+
+async def main():
+    engine = create_async_engine(os.environ["TEST_DATABASE_URL"])
+    coordinator = ClusterCoordinator(
+        engine, async_sessionmaker(engine, expire_on_commit=False), JobStateRepository()
+    )
+
+    @coordinator.run_once("{JOB_PREFIX}_startup")
+    async def startup():
+        await asyncio.sleep(0.3)
+        return "ran"
+
+    print(await startup() or "skipped")
+    await engine.dispose()
+
+asyncio.run(main())
+"""
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestCoordination(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from bot.models import JobState
+
+        self.engine = create_async_engine(TEST_DATABASE_URL)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(JobState.__table__.create, checkfirst=True)
+        await self._cleanup()
+        self.coordinator = ClusterCoordinator(
+            self.engine, self.session_maker, JobStateRepository()
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self._cleanup()
+        await self.engine.dispose()
+
+    async def _cleanup(self) -> None:
+        from sqlalchemy import delete
+
+        from bot.models import JobState
+
+        async with self.session_maker() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(JobState).where(JobState.name.like(f"%{JOB_PREFIX}%"))
+                )
+
+    def test_lock_key_is_stable_64_bit(self) -> None:
+        key = advisory_lock_key("leader:singleton_jobs")
+
+        self.assertEqual(key, advisory_lock_key("leader:singleton_jobs"))
+        self.assertTrue(-(2**63) <= key < 2**63)
+
+    async def test_startup_task_runs_once_across_processes(self) -> None:
+        env = {**os.environ, "PYTHONPATH": str(ROOT)}
+        replicas = [
+            await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-c",
+                REPLICA_SCRIPT,
+                env=env,
+                cwd=ROOT,
+                stdout=subprocess.PIPE,
+            )
+            for _ in range(3)
+        ]
+        outputs = [(await replica.communicate())[0].decode().strip() for replica in replicas]
+
+        self.assertEqual(sorted(outputs), ["ran", "skipped", "skipped"])
+
+    async def test_exclusive_rejects_a_second_holder(self) -> None:
+        async with self.coordinator.exclusive(f"{JOB_PREFIX}_broadcast") as first:
+            with self.assertRaises(LockBusyError):
+                async with self.coordinator.exclusive(f"{JOB_PREFIX}_broadcast"):
+                    pass
+
+        async with self.coordinator.exclusive(f"{JOB_PREFIX}_broadcast") as second:
+            self.assertGreater(second.value, first.value)
+
+    async def test_leadership_moves_and_fences_the_old_leader(self) -> None:
+        terms = []
+
+        async def job(token) -> None:
+            terms.append(token)
+            await asyncio.Event().wait()
+
+        electors = [
+            LeaderElector(
+                self.coordinator,
+                JOB_PREFIX,
+                [job],
+                lease_seconds=1.0,
+                renew_interval_seconds=0.05,
+            )
+            for _ in range(2)
+        ]
+        tasks = [asyncio.create_task(elector.run_forever()) for elector in electors]
+        try:
+            await asyncio.sleep(0.3)
+            leaders = [elector for elector in electors if elector.is_leader]
+            self.assertEqual(len(leaders), 1)
+
+            tasks[electors.index(leaders[0])].cancel()
+            await asyncio.sleep(0.3)
+            self.assertEqual([elector.is_leader for elector in electors].count(True), 1)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        old, new = terms
+        self.assertEqual(new.value, old.value + 1)
+        async with self.session_maker() as session:
+            async with session.begin():
+                await new.validate(session)
+                with self.assertRaises(StaleFencingTokenError):
+                    await old.validate(session)
+
+    async def test_crashed_leader_job_is_restarted_within_the_term(self) -> None:
+        calls = []
+
+        async def flaky_job(token) -> None:
+            calls.append(token)
+            if len(calls) == 1:
+                raise RuntimeError("transient database error")
+            await asyncio.Event().wait()
+
+        elector = LeaderElector(
+            self.coordinator,
+            JOB_PREFIX,
+            [flaky_job],
+            lease_seconds=1.0,
+            renew_interval_seconds=0.05,
+        )
+        task = asyncio.create_task(elector.run_forever())
+        try:
+            for _ in range(40):
+                if len(calls) >= 2:
+                    break
+                await asyncio.sleep(0.05)
+            self.assertTrue(elector.is_leader)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        # Restarted in the same term, not after leadership changed hands.
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[0], calls[1])
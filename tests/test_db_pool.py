@@ -0,0 +1,93 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from bot.config import Settings
+from bot.db.pool import (
+    POOL_CHECKED_OUT,
+    POOL_CHECKOUT_TIMEOUTS,
+    POOL_CHECKOUT_WAIT_SECONDS,
+    POOL_CONNECT_SECONDS,
+    InstrumentedQueuePool,
+    warm_up_pool,
+)
+from bot.db.session import create_engine
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+def make_settings(**overrides) -> Settings:
+    return Settings(
+        bot_token="token",
+        database_url=TEST_DATABASE_URL or "postgresql+asyncpg://user@localhost/db",
+        jwt_public_key="key",
+        admin_ids=[],
+        **overrides,
+    )
+
+
+class TestEngineConfiguration(unittest.TestCase):
+    def test_pool_settings_reach_the_engine(self) -> None:
+        engine = create_engine(
+            make_settings(DB_POOL_SIZE=3, DB_MAX_OVERFLOW=1, DB_POOL_TIMEOUT_SECONDS=0.5)
+        )
+
+        self.assertIsInstance(engine.pool, InstrumentedQueuePool)
+        self.assertEqual(engine.pool.size(), 3)
+        self.assertEqual(engine.pool._max_overflow, 1)
+        self.assertEqual(engine.pool.timeout(), 0.5)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestInstrumentedPool(unittest.IsolatedAsyncioTestCase):
+    async def test_warm_up_opens_connections(self) -> None:
+        engine = create_engine(make_settings(DB_POOL_SIZE=4))
+        try:
+            await warm_up_pool(engine, 3)
+
+            self.assertEqual(engine.pool.checkedin(), 3)
+        finally:
+            await engine.dispose()
+
+    async def test_exhausted_pool_is_measured(self) -> None:
+        engine = create_engine(
+            make_settings(DB_POOL_SIZE=1, DB_MAX_OVERFLOW=0, DB_POOL_TIMEOUT_SECONDS=0.2)
+        )
+        timeouts = POOL_CHECKOUT_TIMEOUTS.value()
+        waits = POOL_CHECKOUT_WAIT_SECONDS.count()
+        try:
+            async with engine.connect():
+                self.assertEqual(POOL_CHECKED_OUT.value(), 1)
+                with self.assertRaises(PoolTimeoutError):
+                    async with engine.connect():
+                        pass
+        finally:
+            await engine.dispose()
+
+        self.assertEqual(POOL_CHECKOUT_TIMEOUTS.value(), timeouts + 1)
+        self.assertEqual(POOL_CHECKOUT_WAIT_SECONDS.count(), waits + 2)
+
+    async def test_opening_a_connection_is_not_counted_as_waiting(self) -> None:
+        engine = create_engine(make_settings(DB_POOL_SIZE=1, DB_MAX_OVERFLOW=0))
+        connects = POOL_CONNECT_SECONDS.count()
+        connect_seconds = POOL_CONNECT_SECONDS.sum()
+        wait_seconds = POOL_CHECKOUT_WAIT_SECONDS.sum()
+        try:
+            async with engine.connect():
+                pass
+            async with engine.connect():
+                pass
+        finally:
+            await engine.dispose()
+
+        # Only the first checkout opened a connection; the second reused it.
+        self.assertEqual(POOL_CONNECT_SECONDS.count(), connects + 1)
+        self.assertLess(
+            POOL_CHECKOUT_WAIT_SECONDS.sum() - wait_seconds,
+            POOL_CONNECT_SECONDS.sum() - connect_seconds,
+        )
@@ -0,0 +1,130 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.services.draft_preview import DraftPreviewer, PreviewContent
+from bot.storage import MemoryEphemeralStore
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self._next_id = 0
+
+    def _sent(self, method: str):
+        self.calls.append(method)
+        self._next_id += 1
+        return SimpleNamespace(message_id=self._next_id)
+
+    async def send_message(self, **kwargs):
+        return self._sent("send_message")
+
+    async def send_photo(self, **kwargs):
+        return self._sent("send_photo")
+
+    async def send_document(self, **kwargs):
+        return self._sent("send_document")
+
+    async def edit_message_text(self, **kwargs):
+        self.calls.append("edit_message_text")
+
+    async def edit_message_caption(self, **kwargs):
+        self.calls.append("edit_message_caption")
+
+    async def edit_message_media(self, **kwargs):
+        self.calls.append("edit_message_media")
+
+    async def delete_message(self, **kwargs):
+        self.calls.append("delete_message")
+
+
+def slots(main: PreviewContent, document: PreviewContent | None = None):
+    return {
+        "main": main,
+        "document": document,
+        "status": PreviewContent("text", text="Черновик обновлён."),
+    }
+
+
+class TestDraftPreviewer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.bot = FakeBot()
+        self.previewer = DraftPreviewer(debounce_seconds=0.05)
+
+    async def test_burst_is_sent_once(self) -> None:
+        for index in range(5):
+            self.previewer.schedule(
+                self.bot, 1, "post", slots(PreviewContent("text", text=f"v{index}"))
+            )
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.bot.calls, ["send_message", "send_message"])
+
+    async def test_changed_content_is_edited_in_place(self) -> None:
+        self.previewer.schedule(self.bot, 1, "post", slots(PreviewContent("text", text="v1")))
+        await self.previewer.flush(1, "post")
+        self.bot.calls.clear()
+
+        self.previewer.schedule(self.bot, 1, "post", slots(PreviewContent("text", text="v2")))
+        await self.previewer.flush(1, "post")
+        self.previewer.schedule(
+            self.bot,
+            1,
+            "post",
+            slots(
+                PreviewContent("text", text="v2"),
+                PreviewContent("document", file_id="doc"),
+            ),
+        )
+        await self.previewer.flush(1, "post")
+
+        self.assertEqual(
+            self.bot.calls,
+            ["edit_message_text", "send_document", "delete_message", "send_message"],
+        )
+
+    async def test_switch_between_text_and_media_sends_new_message(self) -> None:
+        self.previewer.schedule(self.bot, 1, "page", slots(PreviewContent("text", text="v1")))
+        await self.previewer.flush(1, "page")
+        self.previewer.schedule(
+            self.bot, 1, "page", slots(PreviewContent("photo", file_id="a", text="c"))
+        )
+        await self.previewer.flush(1, "page")
+        self.bot.calls.clear()
+
+        self.previewer.schedule(
+            self.bot, 1, "page", slots(PreviewContent("photo", file_id="a", text="new"))
+        )
+        await self.previewer.flush(1, "page")
+        self.previewer.schedule(
+            self.bot, 1, "page", slots(PreviewContent("photo", file_id="b", text="new"))
+        )
+        await self.previewer.flush(1, "page")
+
+        self.assertEqual(self.bot.calls, ["edit_message_caption", "edit_message_media"])
+
+    async def test_forget_starts_a_new_preview(self) -> None:
+        self.previewer.schedule(self.bot, 1, "post", slots(PreviewContent("text", text="v1")))
+        await self.previewer.flush(1, "post")
+        self.previewer.schedule(self.bot, 1, "post", slots(PreviewContent("text", text="v2")))
+        await self.previewer.forget(1, "post")
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.bot.calls, ["send_message", "send_message"])
+
+    async def test_preview_sent_by_another_process_is_edited(self) -> None:
+        store = MemoryEphemeralStore()
+        first = DraftPreviewer(debounce_seconds=0.05, store=store)
+        second = DraftPreviewer(debounce_seconds=0.05, store=store)
+        first.schedule(self.bot, 1, "post", slots(PreviewContent("text", text="v1")))
+        await first.flush(1, "post")
+        self.bot.calls.clear()
+
+        second.schedule(self.bot, 1, "post", slots(PreviewContent("text", text="v2")))
+        await second.flush(1, "post")
+
+        self.assertEqual(self.bot.calls, ["edit_message_text"])
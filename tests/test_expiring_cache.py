@@ -0,0 +1,96 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.utils.expiring_cache import ExpiringCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestExpiringCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+
+    def test_entry_expires_after_ttl(self) -> None:
+        cache = ExpiringCache(max_size=10, ttl_seconds=5.0, clock=self.clock)
+        cache.set("a", 1)
+        self.clock.now = 4.9
+        self.assertEqual(cache.get("a"), 1)
+        self.clock.now = 5.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_writes_drop_expired_entries(self) -> None:
+        cache = ExpiringCache(max_size=10, ttl_seconds=1.0, clock=self.clock)
+        for key in range(5):
+            cache.set(key, key)
+        self.clock.now = 2.0
+        cache.set("fresh", 0)
+        self.assertEqual(len(cache), 1)
+
+    def test_size_is_capped_with_lru_eviction(self) -> None:
+        cache = ExpiringCache(max_size=3, ttl_seconds=60.0, clock=self.clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        cache.get("a")
+        cache.set("d", 4)
+        self.assertEqual(len(cache), 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_add_only_stores_missing_or_expired_keys(self) -> None:
+        cache = ExpiringCache(max_size=10, ttl_seconds=3.0, clock=self.clock)
+        self.assertTrue(cache.add("k", "first"))
+        self.assertFalse(cache.add("k", "second"))
+        self.clock.now = 3.0
+        self.assertTrue(cache.add("k", "third"))
+        self.assertEqual(cache.get("k"), "third")
+
+    def test_per_call_ttl_overrides_default(self) -> None:
+        cache = ExpiringCache(max_size=10, ttl_seconds=100.0, clock=self.clock)
+        cache.set("short", 1, ttl_seconds=1.0)
+        self.clock.now = 1.0
+        self.assertIsNone(cache.get("short"))
+
+    def test_expired_entries_behind_live_ones_are_purged(self) -> None:
+        cache = ExpiringCache(max_size=10, ttl_seconds=10.0, clock=self.clock)
+        cache.set("long", 1, ttl_seconds=10.0)
+        cache.set("short", 2, ttl_seconds=3.0)
+        cache.get("long")
+        self.clock.now = 5.0
+        cache.set("fresh", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("long"), 1)
+
+    def test_overwritten_key_keeps_its_new_expiry(self) -> None:
+        cache = ExpiringCache(max_size=10, ttl_seconds=3.0, clock=self.clock)
+        cache.set("k", 1)
+        self.clock.now = 2.0
+        cache.set("k", 2)
+        self.clock.now = 4.0
+        cache.set("other", 0)
+        self.assertEqual(cache.get("k"), 2)
+
+    def test_heap_stays_bounded_under_rewrites(self) -> None:
+        cache = ExpiringCache(max_size=10, ttl_seconds=60.0, clock=self.clock)
+        for index in range(10_000):
+            cache.set(index % 5, index)
+        self.assertLessEqual(len(cache._expiry_heap), 2 * len(cache) + 64)
+
+    def test_stored_none_is_a_live_entry(self) -> None:
+        cache = ExpiringCache(max_size=10, ttl_seconds=3.0, clock=self.clock)
+        cache.set("unknown", None)
+        self.assertIn("unknown", cache)
+        self.assertFalse(cache.add("unknown", "value"))
+        self.clock.now = 3.0
+        self.assertNotIn("unknown", cache)
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from aiogram.fsm.storage.base import StorageKey
+
+from bot.handlers.admin import PostCreationStates
+from bot.storage import PostgresStorage
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+BOT_ID = -42
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestPostgresStorage(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from bot.models import FsmState
+
+        self.engine = create_async_engine(TEST_DATABASE_URL)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(FsmState.__table__.create, checkfirst=True)
+        await self._cleanup()
+        self.key = StorageKey(bot_id=BOT_ID, chat_id=1, user_id=1)
+
+    async def asyncTearDown(self) -> None:
+        await self._cleanup()
+        await self.engine.dispose()
+
+    async def _cleanup(self) -> None:
+        from sqlalchemy import delete
+
+        from bot.models import FsmState
+
+        async with self.session_maker() as session:
+            async with session.begin():
+                await session.execute(delete(FsmState).where(FsmState.bot_id == BOT_ID))
+
+    async def test_state_and_data_survive_a_restart(self) -> None:
+        storage = PostgresStorage(self.session_maker)
+        await storage.set_state(self.key, PostCreationStates.waiting_for_content)
+        await storage.update_data(self.key, {"page": "faq"})
+
+        restarted = PostgresStorage(self.session_maker)
+
+        self.assertEqual(
+            await restarted.get_state(self.key), PostCreationStates.waiting_for_content.state
+        )
+        self.assertEqual(await restarted.get_data(self.key), {"page": "faq"})
+
+    async def test_concurrent_updates_from_replicas_keep_all_keys(self) -> None:
+        replicas = [PostgresStorage(self.session_maker) for _ in range(4)]
+        for replica in replicas:
+            # Every replica caches the same, soon stale, version.
+            await replica.get_data(self.key)
+
+        await asyncio.gather(
+            *(
+                replica.update_data(self.key, {f"k{index}": index})
+                for index, replica in enumerate(replicas)
+            )
+        )
+
+        fresh = PostgresStorage(self.session_maker)
+        self.assertEqual(await fresh.get_data(self.key), {"k0": 0, "k1": 1, "k2": 2, "k3": 3})
+
+    async def test_purge_removes_idle_states(self) -> None:
+        storage = PostgresStorage(self.session_maker, cache_ttl_seconds=0.0, state_ttl_seconds=0.0)
+        await storage.set_state(self.key, "idle")
+
+        self.assertGreaterEqual(await storage.purge_expired(), 1)
+        self.assertIsNone(await storage.get_state(self.key))
@@ -0,0 +1,102 @@
+import sys
+import unittest
+from pathlib import Path
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.types import Message, Update
+
+from bot.middlewares import HandlerTimingMiddleware
+from bot.middlewares.timing import HANDLER_ERRORS, HANDLER_SECONDS
+from bot.telegram_session import API_ERRORS, API_REQUEST_SECONDS, InstrumentedAiohttpSession
+from bot.utils.metrics import REGISTRY
+
+TOKEN = "42:TEST"
+
+
+def _message_update(text: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": 1, "type": "private"},
+                "from": {"id": 1, "is_bot": False, "first_name": "U"},
+                "text": text,
+            },
+        }
+    )
+
+
+async def timed_handler(message: Message) -> None:
+    if message.text == "fail":
+        raise LookupError("boom")
+
+
+class TestHandlerTiming(unittest.IsolatedAsyncioTestCase):
+    async def test_handlers_are_timed_by_name(self) -> None:
+        router = Router()
+        router.message()(timed_handler)
+        dispatcher = Dispatcher()
+        dispatcher.message.middleware(HandlerTimingMiddleware())
+        dispatcher.include_router(router)
+        bot = Bot(token=TOKEN)
+        name = f"{__name__}.timed_handler"
+        calls_before = HANDLER_SECONDS.count(handler=name)
+
+        await dispatcher.feed_update(bot, _message_update("hi"))
+        with self.assertRaises(LookupError):
+            await dispatcher.feed_update(bot, _message_update("fail"))
+        await bot.session.close()
+
+        self.assertEqual(HANDLER_SECONDS.count(handler=name) - calls_before, 2)
+        self.assertEqual(HANDLER_ERRORS.value(handler=name, error="LookupError"), 1)
+
+
+class TestInstrumentedSession(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        async def api(request: web.Request) -> web.Response:
+            if request.match_info["method"] == "getMe":
+                return web.json_response(
+                    {"ok": True, "result": {"id": 42, "is_bot": True, "first_name": "Bot"}}
+                )
+            return web.json_response(
+                {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"},
+                status=403,
+            )
+
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", api)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        session = InstrumentedAiohttpSession(
+            api=TelegramAPIServer.from_base(str(self.server.make_url("")).rstrip("/"))
+        )
+        self.bot = Bot(token=TOKEN, session=session)
+
+    async def asyncTearDown(self) -> None:
+        await self.bot.session.close()
+        await self.server.close()
+
+    async def test_latency_and_errors_are_recorded_per_method(self) -> None:
+        get_me_before = API_REQUEST_SECONDS.count(method="getMe")
+        forbidden_before = API_ERRORS.value(method="sendMessage", error="TelegramForbiddenError")
+
+        await self.bot.get_me()
+        with self.assertRaises(TelegramForbiddenError):
+            await self.bot.send_message(1, "hi")
+
+        self.assertEqual(API_REQUEST_SECONDS.count(method="getMe") - get_me_before, 1)
+        self.assertEqual(
+            API_ERRORS.value(method="sendMessage", error="TelegramForbiddenError") - forbidden_before,
+            1,
+        )
+        rendered = REGISTRY.render()
+        self.assertIn('bot_telegram_api_request_seconds_count{method="getMe"}', rendered)
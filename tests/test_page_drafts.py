@@ -0,0 +1,97 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.services.pages import PageRenderCache, PageService
+from bot.storage import PageRepository
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+PAGE_KEY = "test_draft_page"
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestPageDrafts(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from bot.models import Page, PageDraft
+
+        self.engine = create_async_engine(TEST_DATABASE_URL)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Page.__table__.create, checkfirst=True)
+            await connection.run_sync(PageDraft.__table__.create, checkfirst=True)
+        await self._cleanup()
+        self.cache = PageRenderCache()
+        self.service = PageService(self.session_maker, PageRepository(), self.cache)
+        await self.service.update_page_text(PAGE_KEY, "live", None)
+
+    async def asyncTearDown(self) -> None:
+        await self._cleanup()
+        await self.engine.dispose()
+
+    async def _cleanup(self) -> None:
+        from sqlalchemy import delete
+
+        from bot.models import Page, PageDraft
+
+        async with self.session_maker() as session:
+            async with session.begin():
+                await session.execute(delete(PageDraft).where(PageDraft.key == PAGE_KEY))
+                await session.execute(delete(Page).where(Page.key == PAGE_KEY))
+
+    async def test_draft_edits_do_not_touch_live_page(self) -> None:
+        live = await self.service.render_page(PAGE_KEY)
+        await self.service.start_draft(PAGE_KEY, editor_tg_id=1)
+
+        draft = await self.service.update_draft_text(PAGE_KEY, 1, "draft", None)
+        await self.service.update_draft_document(PAGE_KEY, 1, "doc-id", "file", None)
+
+        self.assertEqual(draft.main_text, "draft")
+        self.assertIs(self.cache.get(PAGE_KEY), live)
+        self.assertEqual((await self.service.reload_page(PAGE_KEY)).main_text, "live")
+
+    async def test_publish_swaps_draft_in_with_one_version_bump(self) -> None:
+        before = await self.service.render_page(PAGE_KEY)
+        await self.service.start_draft(PAGE_KEY, editor_tg_id=1)
+        await self.service.update_draft_text(PAGE_KEY, 1, "first", None)
+        await self.service.update_draft_text(PAGE_KEY, 1, "second", None)
+
+        result = await self.service.publish_draft(PAGE_KEY, 1)
+        after = await self.service.render_page(PAGE_KEY)
+
+        self.assertTrue(result.published)
+        self.assertIsNone(result.overwritten_version)
+        self.assertEqual(after.main_text, "second")
+        self.assertEqual(after.version, before.version + 1)
+        self.assertFalse((await self.service.publish_draft(PAGE_KEY, 1)).published)
+
+    async def test_discarded_draft_leaves_page_unchanged(self) -> None:
+        before = await self.service.render_page(PAGE_KEY)
+        await self.service.start_draft(PAGE_KEY, editor_tg_id=1)
+        await self.service.update_draft_text(PAGE_KEY, 1, "draft", None)
+
+        await self.service.discard_draft(PAGE_KEY, 1)
+
+        self.assertIsNone(await self.service.update_draft_text(PAGE_KEY, 1, "late", None))
+        self.assertEqual(await self.service.reload_page(PAGE_KEY), before)
+
+    async def test_two_admins_edit_separate_drafts(self) -> None:
+        await self.service.start_draft(PAGE_KEY, editor_tg_id=1)
+        await self.service.update_draft_text(PAGE_KEY, 1, "from first", None)
+        await self.service.start_draft(PAGE_KEY, editor_tg_id=2)
+        second = await self.service.update_draft_text(PAGE_KEY, 2, "from second", None)
+        first = await self.service.update_draft_document(PAGE_KEY, 1, "doc-id", "file", None)
+
+        self.assertEqual(first.main_text, "from first")
+        self.assertIsNone(second.extra_document_file_id)
+
+        self.assertIsNone((await self.service.publish_draft(PAGE_KEY, 2)).overwritten_version)
+        result = await self.service.publish_draft(PAGE_KEY, 1)
+
+        self.assertTrue(result.published)
+        self.assertIsNotNone(result.overwritten_version)
+        self.assertEqual((await self.service.render_page(PAGE_KEY)).main_text, "from first")
@@ -0,0 +1,110 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.services.pages import PAGE_KEY_FAQ, PageRenderCache, PageService
+
+
+def make_page(key: str, text: str, version: int = 1):
+    return SimpleNamespace(
+        key=key,
+        version=version,
+        content=text,
+        content_type="text",
+        text=text,
+        entities=[{"type": "bold", "offset": 0, "length": 1}],
+        file_id=None,
+        caption=None,
+        caption_entities=None,
+        extra_document_file_id=None,
+        extra_document_caption=None,
+        extra_document_caption_entities=None,
+        updated_at=None,
+    )
+
+
+class FakePageRepository:
+    def __init__(self) -> None:
+        self.pages = {PAGE_KEY_FAQ: make_page(PAGE_KEY_FAQ, "FAQ v1")}
+        self.reads = 0
+
+    async def get_by_key(self, session, key: str):
+        self.reads += 1
+        return self.pages.get(key)
+
+    async def list_by_keys(self, session, keys: list[str]):
+        self.reads += 1
+        return [self.pages[key] for key in keys if key in self.pages]
+
+    async def update_content_text(self, session, key: str, text: str, entities):
+        page = make_page(key, text, self.pages[key].version + 1 if key in self.pages else 1)
+        self.pages[key] = page
+        return page
+
+
+class _Ctx:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def begin(self):
+        return _Ctx()
+
+
+class TestPageRenderCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.repository = FakePageRepository()
+        self.service = PageService(
+            session_maker=_Ctx,
+            page_repository=self.repository,
+            render_cache=PageRenderCache(),
+        )
+
+    async def test_warmed_pages_render_without_queries(self) -> None:
+        await self.service.warm_up()
+        reads_after_warm_up = self.repository.reads
+
+        faq = await self.service.render_page(PAGE_KEY_FAQ)
+        missing = await self.service.render_page("schedule")
+
+        self.assertEqual(faq.main_text, "FAQ v1")
+        self.assertEqual(faq.main_entities[0].type, "bold")
+        self.assertIsNone(missing.main_text)
+        self.assertEqual(reads_after_warm_up, 1)
+        self.assertEqual(self.repository.reads, 1)
+
+    async def test_update_invalidates_cached_render(self) -> None:
+        await self.service.render_page(PAGE_KEY_FAQ)
+        await self.service.update_page_text(PAGE_KEY_FAQ, text="FAQ v2", entities=None)
+
+        render = await self.service.render_page(PAGE_KEY_FAQ)
+
+        self.assertEqual(render.main_text, "FAQ v2")
+
+    async def test_change_notification_reloads_only_stale_page(self) -> None:
+        await self.service.warm_up()
+        self.repository.pages[PAGE_KEY_FAQ] = make_page(PAGE_KEY_FAQ, "FAQ from replica", version=2)
+
+        await self.service.handle_change_notification(f"{PAGE_KEY_FAQ}:1")
+        unchanged = await self.service.render_page(PAGE_KEY_FAQ)
+        await self.service.handle_change_notification(f"{PAGE_KEY_FAQ}:2")
+        reloaded = await self.service.render_page(PAGE_KEY_FAQ)
+
+        self.assertEqual(unchanged.main_text, "FAQ v1")
+        self.assertEqual(reloaded.main_text, "FAQ from replica")
+        self.assertEqual(reloaded.version, 2)
+        self.assertEqual(self.repository.reads, 2)
+
+    def test_render_loaded_before_invalidation_is_not_stored(self) -> None:
+        cache = PageRenderCache()
+        generation = cache.generation(PAGE_KEY_FAQ)
+        cache.invalidate(PAGE_KEY_FAQ)
+
+        cache.store(PAGE_KEY_FAQ, object(), generation)
+
+        self.assertIsNone(cache.get(PAGE_KEY_FAQ))
@@ -0,0 +1,333 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from bot.services.post_service import PostService
+from bot.storage import PostDocument, PostDraft, PostDraftStore
+
+
+class _Ctx:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def begin(self):
+        return _Ctx()
+
+    async def flush(self):
+        return None
+
+
+class FakePostRepository:
+    def __init__(self) -> None:
+        self.rows: dict[int, SimpleNamespace] = {}
+        self.reads = 0
+        self.writes = 0
+
+    async def create_draft(self, session, *, created_by, entities, **kwargs):
+        post = SimpleNamespace(
+            id=len(self.rows) + 1,
+            created_by=created_by,
+            entities=entities,
+            status="draft",
+            draft_version=0,
+        )
+        self.rows[post.id] = post
+        return post
+
+    async def get_active_draft_by_admin(self, session, created_by):
+        self.reads += 1
+        return next(
+            (
+                row
+                for row in self.rows.values()
+                if row.created_by == created_by and row.status == "draft"
+            ),
+            None,
+        )
+
+    async def update_draft_payload(self, session, post_id, payload, expected_version):
+        row = self.rows[post_id]
+        if row.status != "draft" or row.draft_version != expected_version:
+            return None
+        self.writes += 1
+        row.entities = payload
+        row.draft_version += 1
+        return row.draft_version
+
+    async def mark_sending(self, session, post_id):
+        row = self.rows[post_id]
+        if row.status != "draft":
+            return False
+        row.status = "sending"
+        return True
+
+    async def mark_sent(self, session, post_id, *, success_count, fail_count, **kwargs):
+        self.rows[post_id].status = "sent"
+
+    async def mark_failed(self, session, post_id):
+        row = self.rows[post_id]
+        if row.status == "sending":
+            row.status = "failed"
+
+
+class FakeUserRepository:
+    def __init__(self, user_ids: list[int]) -> None:
+        self.user_ids = user_ids
+
+    async def list_confirmed_user_ids(self, session):
+        return self.user_ids
+
+
+def text_message(text: str):
+    return SimpleNamespace(
+        media_group_id=None,
+        text=text,
+        entities=None,
+        photo=None,
+        video=None,
+        animation=None,
+        document=None,
+    )
+
+
+class TestPostDraftStore(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.repository = FakePostRepository()
+        self.store = PostDraftStore(lambda: _Ctx(), self.repository, flush_delay_seconds=0.05)
+        self.service = PostService(
+            session_maker=lambda: _Ctx(),
+            post_repository=self.repository,
+            draft_store=self.store,
+        )
+
+    async def test_burst_of_edits_is_written_once_after_delay(self) -> None:
+        await self.service.ensure_draft(1)
+        reads = self.repository.reads
+        for index in range(5):
+            result = await self.service.apply_message_to_draft(1, text_message(f"v{index}"))
+
+        self.assertEqual(result.draft.main_text.text, "v4")
+        self.assertEqual(self.repository.writes, 0)
+        self.assertEqual(self.repository.reads, reads)
+
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(self.repository.writes, 1)
+        self.assertEqual(self.repository.rows[1].entities["main_text"], "v4")
+
+    async def test_flush_writes_pending_edits_immediately(self) -> None:
+        await self.service.apply_message_to_draft(1, text_message("hello"))
+
+        draft = await self.service.flush_draft(1)
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(draft.main_text.text, "hello")
+        self.assertEqual(self.repository.writes, 1)
+
+    async def test_draft_is_reloaded_from_posts_row(self) -> None:
+        await self.service.apply_message_to_draft(1, text_message("hello"))
+        await self.store.flush(1)
+
+        restarted = PostDraftStore(lambda: _Ctx(), self.repository)
+        draft = await restarted.get(1)
+
+        self.assertEqual(draft.id, 1)
+        self.assertEqual(draft.main_text.text, "hello")
+        self.assertFalse(self.service.is_draft_empty(draft))
+
+
+class TestPostDraftStoreReplicas(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.repository = FakePostRepository()
+        self.first = PostDraftStore(lambda: _Ctx(), self.repository, flush_delay_seconds=10)
+        self.second = PostDraftStore(lambda: _Ctx(), self.repository, flush_delay_seconds=10)
+
+    def service(self, store: PostDraftStore) -> PostService:
+        return PostService(
+            session_maker=lambda: _Ctx(), post_repository=self.repository, draft_store=store
+        )
+
+    async def test_conflicting_flush_merges_edits_from_the_other_process(self) -> None:
+        await self.service(self.first).apply_message_to_draft(1, text_message("first"))
+        await self.first.flush(1)
+        await self.service(self.second).apply_message_to_draft(1, text_message("ignored"))
+        draft = await self.second.get(1)
+        draft.main_text = None
+        draft.extra_document = PostDocument(file_id="doc-id")
+        self.second.mark_dirty(draft)
+        await self.second.flush(1)
+
+        await self.service(self.first).apply_message_to_draft(1, text_message("edited"))
+        merged = await self.first.flush(1)
+
+        self.assertEqual(merged.main_text.text, "edited")
+        self.assertEqual(merged.extra_document.file_id, "doc-id")
+        self.assertEqual(self.repository.rows[1].entities, merged.to_payload())
+        self.assertEqual(self.repository.rows[1].draft_version, merged.version)
+
+    async def test_flush_without_local_edits_picks_up_newer_version(self) -> None:
+        await self.service(self.first).apply_message_to_draft(1, text_message("old"))
+        await self.first.flush(1)
+        await self.service(self.second).apply_message_to_draft(1, text_message("new"))
+        await self.second.flush(1)
+
+        draft = await self.first.flush(1)
+
+        self.assertEqual(draft.main_text.text, "new")
+
+    async def test_draft_closed_elsewhere_is_dropped(self) -> None:
+        await self.service(self.first).apply_message_to_draft(1, text_message("hello"))
+        await self.first.flush(1)
+        await self.service(self.first).apply_message_to_draft(1, text_message("late"))
+        self.repository.rows[1].status = "sent"
+
+        self.assertIsNone(await self.first.flush(1))
+        self.assertEqual(self.repository.rows[1].entities["main_text"], "hello")
+
+
+class TestBackgroundBroadcast(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.repository = FakePostRepository()
+        self.store = PostDraftStore(lambda: _Ctx(), self.repository, flush_delay_seconds=10)
+        self.service = PostService(
+            session_maker=lambda: _Ctx(), post_repository=self.repository, draft_store=self.store
+        )
+        self.release = asyncio.Event()
+
+        async def broadcast_draft(bot, draft, **kwargs):
+            await self.release.wait()
+            return 3, 1
+
+        self.service.broadcast_draft = broadcast_draft
+
+    async def start(self, draft, on_finished) -> bool:
+        async def on_failed(error):
+            self.fail(f"unexpected broadcast failure: {error!r}")
+
+        return await self.service.start_broadcast(
+            None,
+            draft,
+            user_repository=None,
+            send_delay_seconds=0,
+            batch_log_every=0,
+            on_finished=on_finished,
+            on_failed=on_failed,
+        )
+
+    async def test_broadcast_runs_after_the_handler_returns(self) -> None:
+        await self.service.apply_message_to_draft(1, text_message("hello"))
+        draft = await self.service.flush_draft(1)
+        finished = asyncio.Future()
+
+        async def on_finished(success_count, fail_count):
+            finished.set_result((success_count, fail_count))
+
+        self.assertTrue(await self.start(draft, on_finished))
+        self.assertFalse(finished.done())
+        # A second tap while the first broadcast is running does not start another.
+        self.assertFalse(await self.start(draft, on_finished))
+        # The admin can start the next post meanwhile.
+        self.assertNotEqual((await self.service.ensure_draft(1)).id, draft.id)
+
+        self.release.set()
+        self.assertEqual(await asyncio.wait_for(finished, timeout=1), (3, 1))
+
+    async def test_shutdown_cancels_running_broadcasts(self) -> None:
+        await self.service.apply_message_to_draft(1, text_message("hello"))
+        draft = await self.service.flush_draft(1)
+
+        async def on_finished(success_count, fail_count):
+            self.fail("a canceled broadcast must not report")
+
+        await self.start(draft, on_finished)
+        await self.service.stop_broadcasts()
+
+        self.assertEqual(self.repository.rows[draft.id].status, "sending")
+
+
+class TestBroadcastFailures(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.repository = FakePostRepository()
+        self.store = PostDraftStore(lambda: _Ctx(), self.repository, flush_delay_seconds=10)
+        self.service = PostService(
+            session_maker=lambda: _Ctx(), post_repository=self.repository, draft_store=self.store
+        )
+        await self.service.apply_message_to_draft(1, text_message("hello"))
+        self.draft = await self.service.flush_draft(1)
+
+    async def run_broadcast(self, send_post_to_chat):
+        self.service.send_post_to_chat = send_post_to_chat
+        outcome = asyncio.Future()
+
+        async def on_finished(success_count, fail_count):
+            outcome.set_result((success_count, fail_count))
+
+        async def on_failed(error):
+            outcome.set_result(error)
+
+        started = await self.service.start_broadcast(
+            None,
+            self.draft,
+            user_repository=FakeUserRepository([10, 20, 30]),
+            send_delay_seconds=0,
+            batch_log_every=0,
+            on_finished=on_finished,
+            on_failed=on_failed,
+        )
+        self.assertTrue(started)
+        return await asyncio.wait_for(outcome, timeout=1)
+
+    async def test_error_is_reported_and_the_post_is_marked_failed(self) -> None:
+        async def send_post_to_chat(bot, chat_id, post):
+            raise RuntimeError("database is gone")
+
+        error = await self.run_broadcast(send_post_to_chat)
+
+        self.assertIsInstance(error, RuntimeError)
+        self.assertEqual(self.repository.rows[self.draft.id].status, "failed")
+
+    async def test_retry_after_skips_only_that_recipient(self) -> None:
+        async def send_post_to_chat(bot, chat_id, post):
+            if chat_id == 20:
+                method = SendMessage(chat_id=chat_id, text="hello")
+                raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=0)
+
+        self.assertEqual(await self.run_broadcast(send_post_to_chat), (2, 1))
+        self.assertEqual(self.repository.rows[self.draft.id].status, "sent")
+
+
+class TestPostDraftPayload(unittest.TestCase):
+    def test_payload_round_trip_parses_entities_once(self) -> None:
+        payload = {
+            "main_text": "hello",
+            "main_entities": [{"type": "bold", "offset": 0, "length": 5}],
+            "main_media": {
+                "type": "video",
+                "file_id": "video-id",
+                "caption": None,
+                "caption_entities": None,
+            },
+            "extra_document": {
+                "file_id": "doc-id",
+                "file_name": "rules.pdf",
+                "caption": "Rules",
+                "caption_entities": None,
+            },
+        }
+
+        draft = PostDraft.from_payload(1, 7, payload)
+
+        self.assertEqual(draft.to_payload(), payload)
+        self.assertEqual(draft.main_text.message_entities[0].type, "bold")
+        with self.assertRaises(AttributeError):
+            draft.main_media.file_id = "other"
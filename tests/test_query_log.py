@@ -0,0 +1,105 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.db.query_log import (
+    REPEATED_STATEMENTS,
+    QueryLog,
+    describe_parameters,
+    expect_queries,
+    normalize_statement,
+    record_statement,
+)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class TestQueryLog(unittest.TestCase):
+    def test_normalized_statement_hides_values(self) -> None:
+        self.assertEqual(
+            normalize_statement(
+                "SELECT users.id FROM users\n WHERE users.tg_id = $1::BIGINT AND name = 'x'\n LIMIT 10"
+            ),
+            "SELECT users.id FROM users WHERE users.tg_id = ? AND name = ? LIMIT ?",
+        )
+        self.assertEqual(
+            normalize_statement("DELETE FROM posts WHERE id IN ($1::INTEGER, $2::INTEGER, $3::INTEGER)"),
+            normalize_statement("DELETE FROM posts WHERE id IN ($1::INTEGER)"),
+        )
+
+    def test_parameters_are_reduced_to_types(self) -> None:
+        self.assertEqual(describe_parameters((123456, "secret", None)), "(int, str, NoneType)")
+        self.assertEqual(describe_parameters([(1,), (2,)], executemany=True), "<2 rows>")
+
+    def test_slow_statement_is_logged_without_values(self) -> None:
+        query_log = QueryLog(slow_query_seconds=0.1, repeated_statement_limit=0)
+
+        with self.assertLogs("bot.db.query_log", "WARNING") as logs:
+            query_log.observe(
+                "SELECT * FROM users WHERE tg_id = $1::BIGINT", (777001,), False, 0.25, None
+            )
+            query_log.observe("SELECT 1", (), False, 0.05, None)
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("250.0 ms", logs.output[0])
+        self.assertIn("params=(int)", logs.output[0])
+        self.assertNotIn("777001", logs.output[0])
+
+    def test_repeated_statement_is_flagged_once_per_update(self) -> None:
+        query_log = QueryLog(slow_query_seconds=0, repeated_statement_limit=2)
+        flagged_before = REPEATED_STATEMENTS.value()
+        unit_of_work = SimpleNamespace(statement_counts={})
+
+        with self.assertLogs("bot.db.query_log", "WARNING") as logs:
+            for tg_id in range(5):
+                query_log.observe(
+                    "SELECT * FROM users WHERE tg_id = $1::BIGINT", (tg_id,), False, 0.001, unit_of_work
+                )
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("possible N+1", logs.output[0])
+        self.assertEqual(REPEATED_STATEMENTS.value() - flagged_before, 1)
+
+    def test_expect_queries_reports_the_statements(self) -> None:
+        with expect_queries(1):
+            record_statement("SELECT 1")
+
+        with self.assertRaisesRegex(AssertionError, "expected 1 queries, got 2"):
+            with expect_queries(1):
+                record_statement("SELECT 1")
+                record_statement("SELECT 2")
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestQueryLogOnEngine(unittest.IsolatedAsyncioTestCase):
+    async def test_lookup_loop_in_one_update_is_flagged(self) -> None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from bot.db.unit_of_work import UnitOfWork, install_query_counter
+        from bot.models import User
+        from bot.storage import UserRepository
+
+        engine = create_async_engine(TEST_DATABASE_URL)
+        install_query_counter(engine, QueryLog(slow_query_seconds=0, repeated_statement_limit=3))
+        async with engine.begin() as connection:
+            await connection.run_sync(User.__table__.create, checkfirst=True)
+        repository = UserRepository()
+        unit_of_work = UnitOfWork(async_sessionmaker(engine), repository, tg_id=None)
+        token = unit_of_work.bind()
+        try:
+            with self.assertLogs("bot.db.query_log", "WARNING") as logs, expect_queries(4):
+                async with unit_of_work.session_maker() as session:
+                    for tg_id in range(990_100_000, 990_100_004):
+                        await repository.get_by_tg_id(session, tg_id)
+        finally:
+            UnitOfWork.unbind(token)
+            await unit_of_work.close()
+            await engine.dispose()
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("WHERE users.tg_id = ?", logs.output[0])
+        self.assertNotIn("990100003", logs.output[0])
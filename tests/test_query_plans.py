@@ -0,0 +1,316 @@
+import json
+import os
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+SEED_USERS = 100_000
+SEED_POSTS = 50_000
+SEED_ADMINS = 50
+SEED_PAGES = 2_000
+SEED_PAGE_EDITORS = 10
+SEED_JOBS = 10_000
+SEED_FSM_STATES = 100_000
+SEED_EPHEMERAL_ENTRIES = 100_000
+FIRST_TG_ID = 1_000_000
+BOT_ID = 42
+# Plans are checked by shape rather than by timing: at this data size a
+# missing or unusable index turns into a sequential scan of a seeded table,
+# which EXPLAIN reports the same way on any machine.
+SEEDED_TABLES = {
+    "users",
+    "posts",
+    "pages",
+    "page_drafts",
+    "job_state",
+    "fsm_states",
+    "ephemeral_state",
+}
+EXPECTED_INDEXES = {
+    "get_active_draft_by_admin": "ix_posts_active_draft",
+    "create_draft": "ix_posts_active_draft",
+    "list_confirmed_user_ids": "ix_users_confirmed_tg_id",
+    "list_confirmed_user_ids_after": "ix_users_confirmed_tg_id",
+    "page_get_by_key": "pages_key_key",
+    "page_list_by_keys": "pages_key_key",
+    "page_draft_get": "page_drafts_pkey",
+    "page_draft_update": "page_drafts_pkey",
+    "page_draft_delete": "page_drafts_pkey",
+    "job_state_get": "job_state_pkey",
+    "job_state_advance_fencing_token": "job_state_pkey",
+    "job_state_get_fencing_token": "job_state_pkey",
+    "fsm_load": "fsm_states_pkey",
+    "fsm_upsert": "fsm_states_pkey",
+    "fsm_write_if_version": "fsm_states_pkey",
+    "fsm_purge_expired": "ix_fsm_states_updated_at",
+    "ephemeral_set_if_absent": "ephemeral_state_pkey",
+    "ephemeral_set": "ephemeral_state_pkey",
+    "ephemeral_get": "ephemeral_state_pkey",
+    "ephemeral_delete": "ephemeral_state_pkey",
+    "ephemeral_incr": "ephemeral_state_pkey",
+    "ephemeral_purge_expired": "ix_ephemeral_state_expires_at",
+}
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestQueryPlans(unittest.IsolatedAsyncioTestCase):
+    """Seeds an isolated schema and checks the plan of every hot repository query."""
+
+    async def asyncSetUp(self) -> None:
+        from sqlalchemy import text
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        import bot.models  # noqa: F401 - registers every table on the metadata
+        from bot.db.base import Base
+
+        self.schema = f"query_plans_{os.getpid()}"
+        self.admin_engine = create_async_engine(TEST_DATABASE_URL, isolation_level="AUTOCOMMIT")
+        async with self.admin_engine.connect() as connection:
+            await connection.execute(text(f"DROP SCHEMA IF EXISTS {self.schema} CASCADE"))
+            await connection.execute(text(f"CREATE SCHEMA {self.schema}"))
+
+        self.engine = create_async_engine(
+            TEST_DATABASE_URL,
+            connect_args={"server_settings": {"search_path": self.schema}},
+        )
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+            await connection.execute(
+                text(
+                    "INSERT INTO users (tg_id, username, status, created_at, updated_at) "
+                    "SELECT :first + g, 'user' || g, (CASE "
+                    "WHEN g % 10 < 6 THEN 'CONFIRMED' "
+                    "WHEN g % 10 < 8 THEN 'TOKEN_VERIFIED' "
+                    "ELSE 'NONE' END)::registrationstatus, now(), now() "
+                    "FROM generate_series(1, :users) AS g"
+                ),
+                {"first": FIRST_TG_ID, "users": SEED_USERS},
+            )
+            await connection.execute(
+                text(
+                    "INSERT INTO posts (created_at, created_by, content_type, status, "
+                    "sent_count_success, sent_count_failed) "
+                    "SELECT now() - g * interval '1 minute', g % :admins, 'draft_v2', "
+                    "CASE WHEN g <= :admins THEN 'draft' "
+                    "WHEN g % 5 = 0 THEN 'canceled' ELSE 'sent' END, 0, 0 "
+                    "FROM generate_series(1, :posts) AS g"
+                ),
+                {"admins": SEED_ADMINS, "posts": SEED_POSTS},
+            )
+            await connection.execute(
+                text(
+                    "INSERT INTO pages (key, content, content_type, text, version, updated_at) "
+                    "SELECT 'page' || g, 'text ' || g, 'text', 'text ' || g, 1, now() "
+                    "FROM generate_series(1, :pages) AS g"
+                ),
+                {"pages": SEED_PAGES},
+            )
+            await connection.execute(
+                text(
+                    "INSERT INTO page_drafts (key, editor_tg_id, base_version, content, "
+                    "content_type, text, updated_at) "
+                    "SELECT 'page' || p, :first + e, 1, 'draft', 'text', 'draft', now() "
+                    "FROM generate_series(1, :pages) AS p, generate_series(1, :editors) AS e"
+                ),
+                {"first": FIRST_TG_ID, "pages": SEED_PAGES, "editors": SEED_PAGE_EDITORS},
+            )
+            await connection.execute(
+                text(
+                    "INSERT INTO job_state (name, cursor, updated_at) "
+                    "SELECT 'job' || g, g, now() FROM generate_series(1, :jobs) AS g"
+                ),
+                {"jobs": SEED_JOBS},
+            )
+            # One row in a hundred is past its TTL, like a store that is
+            # cleaned up regularly.
+            await connection.execute(
+                text(
+                    "INSERT INTO fsm_states (bot_id, chat_id, user_id, thread_id, "
+                    "business_connection_id, destiny, state, data, version, updated_at) "
+                    "SELECT :bot, :first + g, :first + g, 0, '', 'default', 'Editing:text', "
+                    "'{}'::jsonb, 1, CASE WHEN g % 100 = 0 THEN now() - interval '30 days' "
+                    "ELSE now() - (g % 1000) * interval '1 minute' END "
+                    "FROM generate_series(1, :states) AS g"
+                ),
+                {"bot": BOT_ID, "first": FIRST_TG_ID, "states": SEED_FSM_STATES},
+            )
+            await connection.execute(
+                text(
+                    "INSERT INTO ephemeral_state (key, value, counter, expires_at) "
+                    "SELECT 'key' || g, '', g % 10, CASE WHEN g % 100 = 0 "
+                    "THEN now() - interval '1 minute' "
+                    "ELSE now() + (g % 100) * interval '1 second' END "
+                    "FROM generate_series(1, :entries) AS g"
+                ),
+                {"entries": SEED_EPHEMERAL_ENTRIES},
+            )
+        async with self.engine.connect() as connection:
+            await connection.execution_options(isolation_level="AUTOCOMMIT")
+            for table in sorted(SEEDED_TABLES):
+                await connection.execute(text(f"VACUUM ANALYZE {table}"))
+
+    async def asyncTearDown(self) -> None:
+        from sqlalchemy import text
+
+        await self.engine.dispose()
+        async with self.admin_engine.connect() as connection:
+            await connection.execute(text(f"DROP SCHEMA IF EXISTS {self.schema} CASCADE"))
+        await self.admin_engine.dispose()
+
+    async def explain(self, run) -> dict:
+        """Run ``run(session)``, then EXPLAIN ANALYZE the first statement it sent.
+
+        Stores that open their own sessions ignore the argument; their
+        statements go through the same engine and are captured all the same.
+        """
+        from sqlalchemy import event
+
+        captured: list[tuple[str, object]] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany) -> None:
+            captured.append((statement, parameters))
+
+        event.listen(self.engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            async with self.session_maker() as session:
+                await run(session)
+                await session.rollback()
+        finally:
+            event.remove(self.engine.sync_engine, "before_cursor_execute", capture)
+
+        statement, parameters = captured[0]
+        async with self.engine.connect() as connection:
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN (ANALYZE, FORMAT JSON) {statement}", parameters
+            )
+            raw = result.scalar_one()
+            await connection.rollback()
+        return (json.loads(raw) if isinstance(raw, str) else raw)[0]
+
+    def build_queries(self) -> dict:
+        from aiogram.fsm.storage.base import StorageKey
+
+        from bot.models import RegistrationStatus
+        from bot.storage import (
+            JobStateRepository,
+            PageDraftRepository,
+            PageRepository,
+            PostgresEphemeralStore,
+            PostgresStorage,
+            PostRepository,
+            UserRepository,
+        )
+        from bot.storage.fsm_storage import _row_key
+
+        posts = PostRepository()
+        users = UserRepository()
+        pages = PageRepository()
+        page_drafts = PageDraftRepository()
+        job_states = JobStateRepository()
+        ephemeral = PostgresEphemeralStore(self.session_maker)
+        admin_id = 7
+        tg_id = FIRST_TG_ID + SEED_USERS // 2
+        page_key = f"page{SEED_PAGES // 2}"
+        editor_id = FIRST_TG_ID + SEED_PAGE_EDITORS // 2
+        job_name = f"job{SEED_JOBS // 2}"
+        ephemeral_key = f"key{SEED_EPHEMERAL_ENTRIES // 2 + 1}"
+        fsm_user_id = FIRST_TG_ID + SEED_FSM_STATES // 2 + 1
+        fsm_key = StorageKey(bot_id=BOT_ID, chat_id=fsm_user_id, user_id=fsm_user_id)
+        missing_fsm_key = StorageKey(bot_id=BOT_ID, chat_id=1, user_id=1)
+
+        def fsm_storage():
+            # A fresh storage per query, so reads are not served from its cache.
+            return PostgresStorage(self.session_maker)
+
+        return {
+            "get_active_draft_by_admin": lambda s: posts.get_active_draft_by_admin(s, admin_id),
+            "create_draft": lambda s: posts.create_draft(
+                s,
+                created_by=admin_id,
+                content_type="draft_v2",
+                text=None,
+                entities=None,
+                file_id=None,
+                caption=None,
+                caption_entities=None,
+            ),
+            "get_post": lambda s: posts.get(s, SEED_POSTS // 2),
+            "update_draft_payload": lambda s: posts.update_draft_payload(
+                s, SEED_POSTS // 2, {"text": None}, expected_version=0
+            ),
+            "list_recent": lambda s: posts.list_recent(s),
+            "get_by_tg_id": lambda s: users.get_by_tg_id(s, tg_id),
+            "get_status": lambda s: users.get_status(s, tg_id),
+            "upsert": lambda s: users.upsert(
+                s,
+                tg_id,
+                "user",
+                promote_from=[RegistrationStatus.NONE],
+                promote_to=RegistrationStatus.TOKEN_VERIFIED,
+            ),
+            "list_confirmed_user_ids": lambda s: users.list_confirmed_user_ids(s),
+            "list_confirmed_user_ids_after": lambda s: users.list_confirmed_user_ids_after(
+                s, tg_id, 200
+            ),
+            "revoke_confirmation": lambda s: users.revoke_confirmation(
+                s, [tg_id + offset for offset in range(50)]
+            ),
+            "page_get_by_key": lambda s: pages.get_by_key(s, page_key, for_update=True),
+            "page_list_by_keys": lambda s: pages.list_by_keys(
+                s, [f"page{index}" for index in range(1, 6)]
+            ),
+            "page_draft_get": lambda s: page_drafts.get(s, page_key, editor_id, for_update=True),
+            "page_draft_update": lambda s: page_drafts.update(
+                s, page_key, editor_id, text="changed"
+            ),
+            "page_draft_delete": lambda s: page_drafts.delete(s, page_key, editor_id),
+            "job_state_get": lambda s: job_states.get(s, job_name),
+            "job_state_advance_fencing_token": lambda s: job_states.advance_fencing_token(
+                s, job_name
+            ),
+            "job_state_get_fencing_token": lambda s: job_states.get_fencing_token(s, job_name),
+            "fsm_load": lambda s: fsm_storage().get_state(fsm_key),
+            "fsm_upsert": lambda s: fsm_storage().set_state(fsm_key, "Editing:photo"),
+            "fsm_write_if_version": lambda s: fsm_storage()._write_if_version(
+                _row_key(fsm_key), 1, {"page": "rules"}
+            ),
+            "fsm_insert_if_absent": lambda s: fsm_storage()._write_if_version(
+                _row_key(missing_fsm_key), 0, {"page": "rules"}
+            ),
+            "fsm_purge_expired": lambda s: fsm_storage().purge_expired(),
+            "ephemeral_set_if_absent": lambda s: ephemeral.set_if_absent(ephemeral_key, 60),
+            "ephemeral_set": lambda s: ephemeral.set(ephemeral_key, "value", 60),
+            "ephemeral_get": lambda s: ephemeral.get(ephemeral_key),
+            "ephemeral_delete": lambda s: ephemeral.delete(ephemeral_key),
+            "ephemeral_incr": lambda s: ephemeral.incr(ephemeral_key, 60),
+            "ephemeral_purge_expired": lambda s: ephemeral.purge_expired(),
+        }
+
+    async def test_hot_queries_use_indexes(self) -> None:
+        for name, run in self.build_queries().items():
+            with self.subTest(query=name):
+                explained = await self.explain(run)
+                nodes = list(_walk(explained["Plan"]))
+                plan_dump = json.dumps(explained["Plan"], indent=2)
+                seq_scans = [
+                    node["Relation Name"]
+                    for node in nodes
+                    if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in SEEDED_TABLES
+                ]
+                self.assertEqual(seq_scans, [], plan_dump)
+                if name in EXPECTED_INDEXES:
+                    used_indexes = {node.get("Index Name") for node in nodes}
+                    for node in nodes:
+                        used_indexes.update(node.get("Conflict Arbiter Indexes", []))
+                    self.assertIn(EXPECTED_INDEXES[name], used_indexes, plan_dump)
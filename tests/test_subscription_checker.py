@@ -0,0 +1,220 @@
+import asyncio
+import sys
+import time
+import unittest
+from pathlib import Path
+
+from aiogram.enums import ChatMemberStatus
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.config import RequiredChannel
+from bot.models import RegistrationStatus
+from bot.services.subscription_checker import SubscriptionCheckerService
+from bot.storage import MemoryEphemeralStore
+
+POOL_SIZE = 5
+CONCURRENT_CHECKS = 500
+TELEGRAM_LATENCY_SECONDS = 0.05
+
+
+class FakeUser:
+    def __init__(self, tg_id: int, status: RegistrationStatus) -> None:
+        self.tg_id = tg_id
+        self.status = status
+
+
+class FakeUserRepository:
+    def __init__(self) -> None:
+        self._users: dict[int, FakeUser] = {}
+
+    async def upsert(self, session, tg_id: int, username: str | None, **kwargs):
+        await asyncio.sleep(0)
+        user = self._users.setdefault(tg_id, FakeUser(tg_id=tg_id, status=RegistrationStatus.NONE))
+        return user
+
+    async def confirm(self, session, tg_id: int) -> bool:
+        await asyncio.sleep(0)
+        user = self._users[tg_id]
+        if user.status == RegistrationStatus.CONFIRMED:
+            return False
+        user.status = RegistrationStatus.CONFIRMED
+        return True
+
+
+class FakePool:
+    """Mimics a fixed-size connection pool: every session holds one slot."""
+
+    def __init__(self, size: int) -> None:
+        self._slots = asyncio.Semaphore(size)
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.holders: set[asyncio.Task] = set()
+
+    def __call__(self):
+        return _PooledSession(self)
+
+
+class _PooledSession:
+    def __init__(self, pool: FakePool) -> None:
+        self._pool = pool
+
+    async def __aenter__(self):
+        await self._pool._slots.acquire()
+        self._pool.checked_out += 1
+        self._pool.holders.add(asyncio.current_task())
+        self._pool.peak_checked_out = max(self._pool.peak_checked_out, self._pool.checked_out)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._pool.checked_out -= 1
+        self._pool.holders.discard(asyncio.current_task())
+        self._pool._slots.release()
+        return False
+
+    def begin(self):
+        return _Transaction()
+
+
+class _Transaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class FakeChatMember:
+    status = ChatMemberStatus.MEMBER
+
+
+class SlowBot:
+    def __init__(self, pool: FakePool) -> None:
+        self._pool = pool
+        self.calls_holding_connection = 0
+        self.calls = 0
+        self.approved: list[tuple[int, int]] = []
+
+    async def approve_chat_join_request(self, chat_id: int, user_id: int) -> bool:
+        self.approved.append((chat_id, user_id))
+        return True
+
+    async def get_chat_member(self, chat_id: int, user_id: int):
+        self.calls += 1
+        if asyncio.current_task() in self._pool.holders:
+            self.calls_holding_connection += 1
+        await asyncio.sleep(TELEGRAM_LATENCY_SECONDS)
+        return FakeChatMember()
+
+
+class TestSubscriptionCheckPoolOccupancy(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_checks_do_not_hold_connections_during_api_calls(self) -> None:
+        pool = FakePool(POOL_SIZE)
+        bot = SlowBot(pool)
+        repository = FakeUserRepository()
+        tg_ids = range(1_000_000, 1_000_000 + CONCURRENT_CHECKS)
+        for tg_id in tg_ids:
+            repository._users[tg_id] = FakeUser(tg_id, RegistrationStatus.TOKEN_VERIFIED)
+
+        service = SubscriptionCheckerService(
+            session_maker=pool,
+            user_repository=repository,
+            required_channels=[
+                RequiredChannel(id=-1001, title="Новости", url="https://t.me/channel1")
+            ],
+            bot=bot,
+            ephemeral_store=MemoryEphemeralStore(),
+        )
+
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(service.check_subscription(tg_id=tg_id, username=None) for tg_id in tg_ids)
+        )
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(all(result.confirmed_now for result in results))
+        self.assertEqual(bot.calls, CONCURRENT_CHECKS)
+        self.assertEqual(bot.calls_holding_connection, 0)
+        self.assertLessEqual(pool.peak_checked_out, POOL_SIZE)
+        # Serialising the API latency behind a 5-slot pool would take
+        # CONCURRENT_CHECKS * latency / POOL_SIZE = 5 seconds.
+        self.assertLess(elapsed, CONCURRENT_CHECKS * TELEGRAM_LATENCY_SECONDS / POOL_SIZE / 2)
+
+    async def test_repeated_check_within_window_is_rate_limited(self) -> None:
+        pool = FakePool(POOL_SIZE)
+        repository = FakeUserRepository()
+        repository._users[43] = FakeUser(43, RegistrationStatus.TOKEN_VERIFIED)
+        service = SubscriptionCheckerService(
+            session_maker=pool,
+            user_repository=repository,
+            required_channels=[
+                RequiredChannel(id=-1001, title="Новости", url="https://t.me/channel1")
+            ],
+            bot=SlowBot(pool),
+            ephemeral_store=MemoryEphemeralStore(),
+        )
+
+        first = await service.check_subscription(tg_id=43, username=None)
+        second = await service.check_subscription(tg_id=43, username=None)
+
+        self.assertFalse(first.rate_limited)
+        self.assertTrue(second.rate_limited)
+
+    async def test_already_confirmed_user_is_not_written_again(self) -> None:
+        pool = FakePool(POOL_SIZE)
+        repository = FakeUserRepository()
+        repository._users[42] = FakeUser(42, RegistrationStatus.CONFIRMED)
+        service = SubscriptionCheckerService(
+            session_maker=pool,
+            user_repository=repository,
+            required_channels=[
+                RequiredChannel(id=-1001, title="Новости", url="https://t.me/channel1")
+            ],
+            bot=SlowBot(pool),
+            ephemeral_store=MemoryEphemeralStore(),
+        )
+
+        result = await service.check_subscription(tg_id=42, username=None)
+
+        self.assertTrue(result.is_member)
+        self.assertFalse(result.confirmed_now)
+
+
+class TestChatJoinRequest(unittest.IsolatedAsyncioTestCase):
+    def make_service(self, repository: FakeUserRepository, bot: SlowBot) -> SubscriptionCheckerService:
+        return SubscriptionCheckerService(
+            session_maker=bot._pool,
+            user_repository=repository,
+            required_channels=[
+                RequiredChannel(id=-1001, title="Новости", url="https://t.me/channel1")
+            ],
+            bot=bot,
+            ephemeral_store=MemoryEphemeralStore(),
+        )
+
+    async def test_token_verified_user_is_approved_and_confirmed_without_polling(self) -> None:
+        bot = SlowBot(FakePool(POOL_SIZE))
+        repository = FakeUserRepository()
+        repository._users[7] = FakeUser(7, RegistrationStatus.TOKEN_VERIFIED)
+
+        result = await self.make_service(repository, bot).handle_join_request(
+            tg_id=7, username=None, chat_id=-1001
+        )
+
+        self.assertTrue(result.approved)
+        self.assertTrue(result.confirmed_now)
+        self.assertEqual(bot.approved, [(-1001, 7)])
+        self.assertEqual(bot.calls, 0)
+        self.assertEqual(repository._users[7].status, RegistrationStatus.CONFIRMED)
+
+    async def test_unregistered_user_request_stays_pending(self) -> None:
+        bot = SlowBot(FakePool(POOL_SIZE))
+        repository = FakeUserRepository()
+
+        result = await self.make_service(repository, bot).handle_join_request(
+            tg_id=8, username=None, chat_id=-1001
+        )
+
+        self.assertFalse(result.approved)
+        self.assertEqual(bot.approved, [])
+        self.assertEqual(repository._users[8].status, RegistrationStatus.NONE)
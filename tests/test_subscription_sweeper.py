@@ -0,0 +1,197 @@
+import asyncio
+import sys
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+from aiogram.enums import ChatMemberStatus
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import GetChatMember
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.config import RequiredChannel
+from bot.models import RegistrationStatus
+from bot.services.subscription_sweeper import SWEEP_JOB_NAME, ApiCallBudget, SubscriptionSweeper
+
+CHANNELS = [RequiredChannel(id=-1001, title="Новости", url="https://t.me/channel1")]
+FINGERPRINT = "-1001"
+
+
+class FakeSessionMaker:
+    def __call__(self):
+        return _FakeSession()
+
+
+class _FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def begin(self):
+        return self
+
+
+class FakeUserRepository:
+    def __init__(self, statuses: dict[int, RegistrationStatus]) -> None:
+        self.statuses = statuses
+
+    async def list_confirmed_user_ids_after(self, session, after_tg_id, limit):
+        confirmed = sorted(
+            tg_id
+            for tg_id, status in self.statuses.items()
+            if status == RegistrationStatus.CONFIRMED
+            and (after_tg_id is None or tg_id > after_tg_id)
+        )
+        return confirmed[:limit]
+
+    async def revoke_confirmation(self, session, tg_ids):
+        revoked = 0
+        for tg_id in tg_ids:
+            if self.statuses.get(tg_id) == RegistrationStatus.CONFIRMED:
+                self.statuses[tg_id] = RegistrationStatus.TOKEN_VERIFIED
+                revoked += 1
+        return revoked
+
+
+class FakeJobStateRepository:
+    def __init__(self, cursor: int | None = None, fingerprint: str | None = None) -> None:
+        self.job_state = None
+        if fingerprint is not None:
+            self.job_state = SimpleNamespace(
+                cursor=cursor, fingerprint=fingerprint, updated_at=datetime.utcnow()
+            )
+        self.saved_cursors: list[int | None] = []
+
+    async def get(self, session, name):
+        assert name == SWEEP_JOB_NAME
+        return self.job_state
+
+    async def save(self, session, name, *, cursor, fingerprint):
+        self.job_state = SimpleNamespace(
+            cursor=cursor, fingerprint=fingerprint, updated_at=datetime.utcnow()
+        )
+        self.saved_cursors.append(cursor)
+        return self.job_state
+
+
+class FakeBot:
+    def __init__(self, left: set[int] = frozenset(), failing: set[int] = frozenset()) -> None:
+        self.left = left
+        self.failing = failing
+        self.checked: list[int] = []
+
+    async def get_chat_member(self, chat_id: int, user_id: int):
+        self.checked.append(user_id)
+        if user_id in self.failing:
+            raise TelegramBadRequest(
+                method=GetChatMember(chat_id=chat_id, user_id=user_id), message="user not found"
+            )
+        status = ChatMemberStatus.LEFT if user_id in self.left else ChatMemberStatus.MEMBER
+        return SimpleNamespace(status=status)
+
+
+def confirmed(*tg_ids: int) -> dict[int, RegistrationStatus]:
+    return {tg_id: RegistrationStatus.CONFIRMED for tg_id in tg_ids}
+
+
+def make_sweeper(users, job_states, bot, batch_size: int = 2) -> SubscriptionSweeper:
+    return SubscriptionSweeper(
+        FakeSessionMaker(),
+        users,
+        job_states,
+        CHANNELS,
+        bot,
+        interval_seconds=3600,
+        batch_size=batch_size,
+        api_calls_per_second=0,
+    )
+
+
+class TestSubscriptionSweeper(unittest.IsolatedAsyncioTestCase):
+    async def test_sweep_resumes_after_saved_cursor(self) -> None:
+        users = FakeUserRepository(confirmed(10, 20, 30, 40))
+        job_states = FakeJobStateRepository(cursor=20, fingerprint=FINGERPRINT)
+        bot = FakeBot()
+
+        stats = await make_sweeper(users, job_states, bot).sweep()
+
+        self.assertEqual(bot.checked, [30, 40])
+        self.assertEqual(stats.checked, 2)
+        self.assertTrue(stats.completed)
+
+    async def test_changed_channel_fingerprint_restarts_from_the_beginning(self) -> None:
+        users = FakeUserRepository(confirmed(10, 20, 30))
+        job_states = FakeJobStateRepository(cursor=20, fingerprint="-1001,-1002")
+        bot = FakeBot()
+
+        await make_sweeper(users, job_states, bot).sweep()
+
+        self.assertEqual(bot.checked, [10, 20, 30])
+        self.assertEqual(job_states.job_state.fingerprint, FINGERPRINT)
+
+    async def test_users_who_left_are_downgraded_and_counted(self) -> None:
+        users = FakeUserRepository(confirmed(1, 2, 3, 4, 5))
+        job_states = FakeJobStateRepository()
+        bot = FakeBot(left={2, 5}, failing={3})
+
+        stats = await make_sweeper(users, job_states, bot).sweep()
+
+        self.assertEqual((stats.checked, stats.downgraded, stats.errors), (5, 2, 1))
+        self.assertEqual(users.statuses[2], RegistrationStatus.TOKEN_VERIFIED)
+        self.assertEqual(users.statuses[5], RegistrationStatus.TOKEN_VERIFIED)
+        # A failed lookup never downgrades the user.
+        self.assertEqual(users.statuses[3], RegistrationStatus.CONFIRMED)
+        self.assertEqual(job_states.saved_cursors, [2, 4, 5, None])
+
+    async def test_interrupted_sweep_keeps_cursor_of_last_finished_batch(self) -> None:
+        users = FakeUserRepository(confirmed(1, 2, 3, 4))
+        job_states = FakeJobStateRepository()
+
+        class CrashingBot(FakeBot):
+            async def get_chat_member(self, chat_id, user_id):
+                if user_id == 3:
+                    raise RuntimeError("connection lost")
+                return await super().get_chat_member(chat_id, user_id)
+
+        with self.assertRaises(RuntimeError):
+            await make_sweeper(users, job_states, CrashingBot()).sweep()
+
+        self.assertEqual(job_states.job_state.cursor, 2)
+
+        bot = FakeBot()
+        await make_sweeper(users, job_states, bot).sweep()
+        self.assertEqual(bot.checked, [3, 4])
+
+
+class TestApiCallBudget(unittest.IsolatedAsyncioTestCase):
+    async def test_calls_are_spaced_by_the_rate(self) -> None:
+        budget = ApiCallBudget(calls_per_second=50)
+        started = time.monotonic()
+        moments = []
+        for _ in range(5):
+            await budget.acquire()
+            moments.append(time.monotonic() - started)
+
+        self.assertLess(moments[0], 0.01)
+        gaps = [later - earlier for earlier, later in zip(moments, moments[1:])]
+        self.assertTrue(all(gap >= 0.015 for gap in gaps), gaps)
+
+    async def test_concurrent_callers_share_one_budget(self) -> None:
+        budget = ApiCallBudget(calls_per_second=50)
+        started = time.monotonic()
+        await asyncio.gather(*(budget.acquire() for _ in range(5)))
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.075)
+
+    async def test_zero_rate_does_not_wait(self) -> None:
+        budget = ApiCallBudget(calls_per_second=0)
+        started = time.monotonic()
+        for _ in range(100):
+            await budget.acquire()
+
+        self.assertLess(time.monotonic() - started, 0.05)
@@ -0,0 +1,136 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from aiogram.types import CallbackQuery, Message, Update
+
+from bot.middlewares import ThrottlingMiddleware
+from bot.middlewares.throttling import (
+    KIND_CALLBACK,
+    KIND_COMMAND,
+    KIND_MESSAGE,
+    THROTTLED_CALLBACK_TEXT,
+    UPDATES_THROTTLED,
+)
+from bot.utils import TokenBucketLimiter
+
+USER = {"id": 1, "is_bot": False, "first_name": "Test"}
+CHAT = {"id": 1, "type": "private"}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _message_update(text: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "message": {"message_id": 1, "date": 0, "chat": CHAT, "from": USER, "text": text},
+        }
+    )
+
+
+def _callback_update() -> Update:
+    return Update.model_validate(
+        {
+            "update_id": 1,
+            "callback_query": {"id": "1", "from": USER, "chat_instance": "1", "data": "x"},
+        }
+    )
+
+
+class TestTokenBucketLimiter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.limiter = TokenBucketLimiter(1.0, 3, max_keys=10, clock=self.clock)
+
+    def test_burst_then_refill(self) -> None:
+        self.assertEqual([self.limiter.acquire(1) for _ in range(4)], [True, True, True, False])
+        self.assertTrue(self.limiter.acquire(2))
+
+        self.clock.now = 1.0
+        self.assertTrue(self.limiter.acquire(1))
+        self.assertFalse(self.limiter.acquire(1))
+
+    def test_notifies_once_per_throttled_streak(self) -> None:
+        for _ in range(4):
+            self.limiter.acquire(1)
+
+        self.assertTrue(self.limiter.should_notify(1))
+        self.assertFalse(self.limiter.should_notify(1))
+
+        self.clock.now = 1.0
+        self.limiter.acquire(1)
+        self.limiter.acquire(1)
+        self.assertTrue(self.limiter.should_notify(1))
+
+    def test_state_is_bounded(self) -> None:
+        for key in range(100):
+            self.limiter.acquire(key)
+        self.assertEqual(len(self.limiter), 10)
+
+        # A bucket that has refilled completely is forgotten.
+        self.clock.now = 3.0
+        self.limiter.acquire("new")
+        self.assertEqual(len(self.limiter), 1)
+
+
+class TestThrottlingMiddleware(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.limiters = {
+            kind: TokenBucketLimiter(0.001, 2, max_keys=10)
+            for kind in (KIND_COMMAND, KIND_CALLBACK, KIND_MESSAGE)
+        }
+        self.handled: list[Update] = []
+
+    async def handler(self, event, data):
+        self.handled.append(event)
+
+    async def feed(self, middleware, update, user_id=1):
+        data = {"event_from_user": SimpleNamespace(id=user_id)}
+        return await middleware(self.handler, update, data)
+
+    async def test_budgets_are_separate_per_kind(self) -> None:
+        middleware = ThrottlingMiddleware(self.limiters, admin_ids=(), notify=False)
+        dropped_before = UPDATES_THROTTLED.value(kind=KIND_COMMAND)
+
+        for _ in range(3):
+            await self.feed(middleware, _message_update("/start"))
+        await self.feed(middleware, _message_update("hello"))
+
+        self.assertEqual(len(self.handled), 3)
+        self.assertEqual(UPDATES_THROTTLED.value(kind=KIND_COMMAND) - dropped_before, 1)
+
+    async def test_admins_are_exempt(self) -> None:
+        middleware = ThrottlingMiddleware(self.limiters, admin_ids={1}, notify=False)
+
+        for _ in range(5):
+            await self.feed(middleware, _message_update("/start"))
+
+        self.assertEqual(len(self.handled), 5)
+
+    async def test_first_rejection_is_answered_once(self) -> None:
+        middleware = ThrottlingMiddleware(self.limiters, admin_ids=())
+
+        with patch.object(Message, "answer", new_callable=AsyncMock) as message_answer:
+            for _ in range(4):
+                await self.feed(middleware, _message_update("hello"))
+        with patch.object(CallbackQuery, "answer", new_callable=AsyncMock) as callback_answer:
+            for _ in range(4):
+                await self.feed(middleware, _callback_update())
+
+        self.assertEqual(len(self.handled), 4)
+        self.assertEqual(message_answer.await_count, 1)
+        # Every dropped button press is acknowledged, only the first with text.
+        self.assertEqual(callback_answer.await_count, 2)
+        self.assertEqual(callback_answer.await_args_list[0].args, (THROTTLED_CALLBACK_TEXT,))
+        self.assertEqual(callback_answer.await_args_list[1].args, ())
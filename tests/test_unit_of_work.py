@@ -0,0 +1,200 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.db.query_log import expect_queries
+from bot.db.unit_of_work import UnitOfWork, UpdateSessionMaker, install_query_counter
+from bot.middlewares import UnitOfWorkMiddleware
+from bot.models import RegistrationStatus
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def begin(self):
+        return _Transaction()
+
+    def in_transaction(self) -> bool:
+        return False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _Transaction:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class FakeSessionMaker:
+    def __init__(self) -> None:
+        self.sessions: list[FakeSession] = []
+
+    def __call__(self) -> FakeSession:
+        session = FakeSession()
+        self.sessions.append(session)
+        return session
+
+
+class FakeUserRepository:
+    def __init__(self) -> None:
+        self.loads = 0
+
+    def get_cached_status(self, tg_id: int):
+        return False, None
+
+    async def get_status(self, session, tg_id: int):
+        self.loads += 1
+        return SimpleNamespace(status=RegistrationStatus.CONFIRMED, editing_page_key=None)
+
+
+class TestUnitOfWork(unittest.IsolatedAsyncioTestCase):
+    async def test_user_status_is_loaded_once_and_session_is_shared(self) -> None:
+        session_maker = FakeSessionMaker()
+        repository = FakeUserRepository()
+        uow = UnitOfWork(session_maker, repository, tg_id=7)
+
+        first = await uow.get_user_status()
+        second = await uow.get_user_status()
+        async with uow.session_maker() as session:
+            async with session.begin():
+                pass
+        await uow.close()
+
+        self.assertIs(first, second)
+        self.assertEqual(repository.loads, 1)
+        self.assertEqual(len(session_maker.sessions), 1)
+        self.assertEqual(uow.sessions_opened, 1)
+        self.assertTrue(session_maker.sessions[0].closed)
+
+    async def test_middleware_opens_no_session_when_handler_does_not_need_one(self) -> None:
+        session_maker = FakeSessionMaker()
+        data = {
+            "container": SimpleNamespace(
+                session_maker=session_maker, user_repository=FakeUserRepository()
+            ),
+            "event_from_user": None,
+        }
+
+        async def handler(event, data):
+            return data["uow"]
+
+        uow = await UnitOfWorkMiddleware()(handler, object(), data)
+
+        self.assertIsNone(await uow.get_user_status())
+        self.assertEqual(session_maker.sessions, [])
+
+    async def test_startup_services_share_the_update_session(self) -> None:
+        session_maker = FakeSessionMaker()
+        service_session_maker = UpdateSessionMaker(session_maker)
+        uow = UnitOfWork(session_maker, FakeUserRepository(), tg_id=7)
+
+        token = uow.bind()
+        try:
+            await uow.get_user_status()
+            async with service_session_maker() as session:
+                self.assertIs(session, session_maker.sessions[0])
+        finally:
+            UnitOfWork.unbind(token)
+            await uow.close()
+
+        self.assertIsInstance(service_session_maker(), FakeSession)
+        self.assertEqual(len(session_maker.sessions), 2)
+
+
+@unittest.skipUnless(TEST_DATABASE_URL, "TEST_DATABASE_URL is not set")
+class TestUnitOfWorkQueryCount(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        from sqlalchemy import delete
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from bot.models import User
+        from bot.storage import UserRepository
+
+        self.engine = create_async_engine(TEST_DATABASE_URL)
+        install_query_counter(self.engine)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.tg_id = 990_000_001
+        async with self.engine.begin() as connection:
+            await connection.run_sync(User.__table__.create, checkfirst=True)
+        async with self.session_maker() as session:
+            async with session.begin():
+                await session.execute(delete(User).where(User.tg_id == self.tg_id))
+                await UserRepository().upsert(
+                    session,
+                    self.tg_id,
+                    None,
+                    promote_from=[RegistrationStatus.NONE],
+                    promote_to=RegistrationStatus.CONFIRMED,
+                )
+
+    async def asyncTearDown(self) -> None:
+        from sqlalchemy import delete
+
+        from bot.models import User
+
+        async with self.session_maker() as session:
+            async with session.begin():
+                await session.execute(delete(User).where(User.tg_id == self.tg_id))
+        await self.engine.dispose()
+
+    async def run_fallback(self, user_status_cache=None):
+        from bot.handlers.user import confirmed_user_fallback
+        from bot.storage import UserRepository
+
+        answers: list[str] = []
+
+        async def answer(text, **kwargs):
+            answers.append(text)
+
+        async def get_state():
+            return None
+
+        message = SimpleNamespace(
+            from_user=SimpleNamespace(id=self.tg_id),
+            text="hello",
+            answer=answer,
+        )
+        data = {
+            "container": SimpleNamespace(
+                session_maker=self.session_maker,
+                user_repository=UserRepository(status_cache=user_status_cache),
+            ),
+            "event_from_user": message.from_user,
+        }
+
+        async def handler(event, data):
+            await confirmed_user_fallback(event, SimpleNamespace(get_state=get_state), data["uow"])
+            return data["uow"]
+
+        uow = await UnitOfWorkMiddleware()(handler, message, data)
+        self.assertEqual(answers, ["Выберите пункт меню"])
+        return uow
+
+    async def test_confirmed_user_fallback_runs_one_query(self) -> None:
+        with expect_queries(1):
+            uow = await self.run_fallback()
+
+        self.assertEqual(uow.sessions_opened, 1)
+        self.assertEqual(uow.query_count, 1)
+        self.assertGreater(uow.query_seconds, 0)
+
+    async def test_cached_status_needs_no_query(self) -> None:
+        from bot.storage import UserStatusCache
+
+        cache = UserStatusCache()
+        await self.run_fallback(cache)
+        uow = await self.run_fallback(cache)
+
+        self.assertEqual(uow.sessions_opened, 0)
+        self.assertEqual(uow.query_count, 0)
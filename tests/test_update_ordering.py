@@ -0,0 +1,128 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.filters import Command, StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message, Update
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.storage import UpdateOrderingIsolation
+from bot.storage.event_isolation import UPDATE_WAIT_SECONDS, UPDATES_IN_FLIGHT, UPDATES_WAITING
+
+BOT = Bot(token="42:TEST")
+
+
+class DraftStates(StatesGroup):
+    waiting_for_content = State()
+
+
+def message_update(update_id: int, user_id: int, text: str) -> Update:
+    return Update.model_validate(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 0,
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+                "text": text,
+            },
+        }
+    )
+
+
+def make_dispatcher(isolation: UpdateOrderingIsolation, events: list[str]) -> Dispatcher:
+    router = Router()
+
+    @router.message(Command("post"))
+    async def start_post(message: Message, state: FSMContext) -> None:
+        # Slow enough for the next update to arrive before the state is set.
+        await asyncio.sleep(0.05)
+        await state.set_state(DraftStates.waiting_for_content)
+        events.append(f"post {message.from_user.id}")
+
+    @router.message(StateFilter(DraftStates.waiting_for_content), F.text)
+    async def draft_content(message: Message) -> None:
+        events.append(f"content {message.text}")
+
+    @router.message()
+    async def fallback(message: Message) -> None:
+        events.append(f"fallback {message.text}")
+
+    dispatcher = Dispatcher(storage=MemoryStorage(), events_isolation=isolation)
+    dispatcher.include_router(router)
+    return dispatcher
+
+
+class TestUpdateOrdering(unittest.IsolatedAsyncioTestCase):
+    async def test_next_update_is_routed_by_the_state_the_previous_one_set(self) -> None:
+        isolation = UpdateOrderingIsolation(max_concurrent=10)
+        events: list[str] = []
+        dispatcher = make_dispatcher(isolation, events)
+
+        await asyncio.gather(
+            dispatcher.feed_update(BOT, message_update(1, 7, "/post")),
+            dispatcher.feed_update(BOT, message_update(2, 7, "hello")),
+        )
+
+        self.assertEqual(events, ["post 7", "content hello"])
+        self.assertEqual(isolation._slots, {})
+
+    async def test_different_users_share_the_global_limit(self) -> None:
+        isolation = UpdateOrderingIsolation(max_concurrent=2)
+        waits_before = UPDATE_WAIT_SECONDS.count()
+        events: list[str] = []
+        dispatcher = make_dispatcher(isolation, events)
+        running = 0
+        peak = 0
+
+        async def track(handler, event, data):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return await handler(event, data)
+            finally:
+                running -= 1
+
+        dispatcher.message.middleware(track)
+        await asyncio.gather(
+            *(
+                dispatcher.feed_update(BOT, message_update(user_id, user_id, "/post"))
+                for user_id in range(1, 7)
+            )
+        )
+
+        self.assertEqual(peak, 2)
+        self.assertEqual(len(events), 6)
+        self.assertEqual(UPDATE_WAIT_SECONDS.count() - waits_before, 6)
+        self.assertEqual(UPDATES_WAITING.value(), 0)
+        self.assertEqual(UPDATES_IN_FLIGHT.value(), 0)
+
+    async def test_cancelled_waiter_releases_its_slot(self) -> None:
+        isolation = UpdateOrderingIsolation(max_concurrent=1)
+        key = StorageKey(bot_id=42, chat_id=1, user_id=1)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with isolation.lock(key):
+                await release.wait()
+
+        first = asyncio.create_task(hold())
+        second = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        second.cancel()
+        release.set()
+        await first
+        with self.assertRaises(asyncio.CancelledError):
+            await second
+
+        self.assertEqual(isolation._slots, {})
+        self.assertEqual(UPDATES_WAITING.value(), 0)
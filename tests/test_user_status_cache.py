@@ -0,0 +1,110 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from sqlalchemy.orm import Session
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.db.unit_of_work import UnitOfWork
+from bot.models import RegistrationStatus
+from bot.storage import CachedUserStatus, UserRepository, UserStatusCache
+
+
+class FakeResult:
+    def __init__(self, row) -> None:
+        self._row = row
+
+    def one_or_none(self):
+        return self._row
+
+
+class FakeSession:
+    def __init__(self, rows: dict[int, tuple]) -> None:
+        self._rows = rows
+        self.executed = 0
+        self.sync_session = Session()
+
+    async def execute(self, statement):
+        self.executed += 1
+        tg_id = statement.whereclause.right.value
+        return FakeResult(self._rows.get(tg_id))
+
+    def add(self, instance) -> None:
+        pass
+
+    def in_transaction(self) -> bool:
+        return False
+
+    async def close(self) -> None:
+        pass
+
+
+class TestUserStatusCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.session = FakeSession({7: (RegistrationStatus.CONFIRMED, None)})
+        self.cache = UserStatusCache(max_size=10, ttl_seconds=60)
+
+    def make_uow(self, tg_id: int) -> UnitOfWork:
+        return UnitOfWork(
+            session_maker=lambda: self.session,
+            user_repository=UserRepository(status_cache=self.cache),
+            tg_id=tg_id,
+        )
+
+    async def test_repeated_updates_read_status_without_queries(self) -> None:
+        first = await self.make_uow(7).get_user_status()
+        second = await self.make_uow(7).get_user_status()
+
+        self.assertEqual(first, CachedUserStatus(RegistrationStatus.CONFIRMED, None))
+        self.assertEqual(second, first)
+        self.assertEqual(self.session.executed, 1)
+
+    async def test_unknown_user_is_cached(self) -> None:
+        self.assertIsNone(await self.make_uow(8).get_user_status())
+        self.assertIsNone(await self.make_uow(8).get_user_status())
+        self.assertEqual(self.session.executed, 1)
+
+    async def test_write_invalidates_entry(self) -> None:
+        await self.make_uow(7).get_user_status()
+        user = SimpleNamespace(tg_id=7, status=RegistrationStatus.CONFIRMED, editing_page_key=None)
+        await UserRepository(status_cache=self.cache).set_editing_page_key(self.session, user, "faq")
+        self.session._rows[7] = (RegistrationStatus.CONFIRMED, "faq")
+
+        status = await self.make_uow(7).get_user_status()
+
+        self.assertEqual(status.editing_page_key, "faq")
+        self.assertEqual(self.session.executed, 2)
+
+    async def test_reader_cannot_cache_old_row_while_write_commits(self) -> None:
+        user = SimpleNamespace(tg_id=7, status=RegistrationStatus.CONFIRMED, editing_page_key=None)
+        repository = UserRepository(status_cache=self.cache)
+        await repository.set_status(self.session, user, RegistrationStatus.TOKEN_VERIFIED)
+
+        # Another update reads before the write commits and caches the old row.
+        await self.make_uow(7).get_user_status()
+        self.assertEqual(self.cache.lookup(7)[1].status, RegistrationStatus.CONFIRMED)
+
+        self.session._rows[7] = (RegistrationStatus.TOKEN_VERIFIED, None)
+        self.session.sync_session.commit()
+
+        status = await self.make_uow(7).get_user_status()
+        self.assertEqual(status.status, RegistrationStatus.TOKEN_VERIFIED)
+
+    def test_store_is_skipped_after_concurrent_invalidation(self) -> None:
+        generation = self.cache.generation
+        self.cache.invalidate([7])
+        self.cache.store(7, CachedUserStatus(RegistrationStatus.CONFIRMED, None), generation)
+
+        self.assertEqual(self.cache.lookup(7), (False, None))
+
+    def test_notification_payload_invalidates_listed_users(self) -> None:
+        for tg_id in (1, 2, 3):
+            self.cache.store(tg_id, None)
+
+        self.cache.handle_notification("1,3")
+
+        self.assertEqual(self.cache.lookup(1), (False, None))
+        self.assertEqual(self.cache.lookup(2), (True, None))
+        self.assertEqual(self.cache.lookup(3), (False, None))
@@ -0,0 +1,151 @@
+import asyncio
+import sys
+import unittest
+from pathlib import Path
+
+from aiohttp.test_utils import TestClient, TestServer
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from bot.utils.metrics import REGISTRY, Counter, Histogram, MetricsRegistry
+from bot.webhook import SECRET_TOKEN_HEADER, UPDATES_REJECTED, WebhookIngress
+
+SECRET = "s3cret"
+PATH = "/telegram/webhook"
+
+
+def update_payload(update_id: int, user_id: int = 1) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "U"},
+            "text": "hi",
+        },
+    }
+
+
+class FakeDispatcher:
+    def __init__(self) -> None:
+        self.update_ids: list[int] = []
+        self.release = asyncio.Event()
+        self.release.set()
+        # Updates of these users block until ``release`` is set.
+        self.slow_users: set[int] | None = None
+
+    async def feed_update(self, bot, update) -> None:
+        if self.slow_users is None or update.message.from_user.id in self.slow_users:
+            await self.release.wait()
+        self.update_ids.append(update.update_id)
+
+
+class TestWebhookIngress(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.dispatcher = FakeDispatcher()
+        self.ingress = WebhookIngress(
+            self.dispatcher, bot=None, secret_token=SECRET, queue_size=2, workers=1
+        )
+        self.client = TestClient(TestServer(self.ingress.create_app(PATH)))
+        await self.client.start_server()
+
+    async def asyncTearDown(self) -> None:
+        self.dispatcher.release.set()
+        await self.ingress.stop()
+        await self.client.close()
+
+    async def post(self, update_id: int, secret: str = SECRET, user_id: int = 1) -> int:
+        response = await self.client.post(
+            PATH, json=update_payload(update_id, user_id), headers={SECRET_TOKEN_HEADER: secret}
+        )
+        return response.status
+
+    async def test_wrong_secret_is_rejected(self) -> None:
+        before = UPDATES_REJECTED.value(reason="unauthorized")
+
+        self.assertEqual(await self.post(1, secret="wrong"), 401)
+        self.assertEqual(UPDATES_REJECTED.value(reason="unauthorized"), before + 1)
+
+    async def test_metrics_are_not_served_on_the_public_listener(self) -> None:
+        response = await self.client.get("/metrics")
+
+        self.assertEqual(response.status, 404)
+
+    async def test_updates_are_acked_then_processed(self) -> None:
+        self.ingress.start()
+
+        self.assertEqual(await self.post(1), 200)
+        self.assertEqual(await self.post(2), 200)
+        await asyncio.wait_for(self.ingress._queue.join(), timeout=1)
+
+        self.assertEqual(self.dispatcher.update_ids, [1, 2])
+
+    async def test_full_queue_asks_telegram_to_retry(self) -> None:
+        self.dispatcher.release.clear()
+        self.ingress.start()
+
+        statuses = [await self.post(update_id) for update_id in range(1, 5)]
+
+        # One update is held by the worker, two wait in the queue.
+        self.assertEqual(statuses, [200, 200, 200, 503])
+        metrics = REGISTRY.render()
+        self.assertIn("bot_webhook_queue_depth 2.0", metrics)
+        self.assertIn('bot_webhook_updates_rejected_total{reason="queue_full"}', metrics)
+
+    async def test_busy_user_does_not_hold_other_workers(self) -> None:
+        self.ingress = WebhookIngress(
+            self.dispatcher, bot=None, secret_token=SECRET, queue_size=10, workers=2
+        )
+        await self.client.close()
+        self.client = TestClient(TestServer(self.ingress.create_app(PATH)))
+        await self.client.start_server()
+        self.dispatcher.slow_users = {1}
+        self.dispatcher.release.clear()
+        self.ingress.start()
+
+        for update_id in (1, 2, 3):
+            self.assertEqual(await self.post(update_id, user_id=1), 200)
+        for update_id in (4, 5):
+            self.assertEqual(await self.post(update_id, user_id=2), 200)
+        for _ in range(20):
+            if self.dispatcher.update_ids == [4, 5]:
+                break
+            await asyncio.sleep(0.01)
+
+        # User 1's later updates wait behind the first one without taking
+        # the second worker, which gets on with user 2.
+        self.assertEqual(self.dispatcher.update_ids, [4, 5])
+        self.assertEqual(self.ingress._parked_count, 2)
+
+        self.dispatcher.release.set()
+        await asyncio.wait_for(self.ingress._queue.join(), timeout=1)
+        self.assertEqual(self.dispatcher.update_ids, [4, 5, 1, 2, 3])
+        self.assertEqual(self.ingress._parked, {})
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render_uses_prometheus_text_format(self) -> None:
+        registry = MetricsRegistry()
+        requests = Counter("requests_total", "Requests.", registry=registry)
+        latency = Histogram("latency_seconds", "Latency.", registry=registry, buckets=(0.1, 1.0))
+        requests.inc(kind='a"b')
+        latency.observe(0.5)
+
+        self.assertEqual(
+            registry.render().splitlines(),
+            [
+                "# HELP requests_total Requests.",
+                "# TYPE requests_total counter",
+                'requests_total{kind="a\\"b"} 1.0',
+                "# HELP latency_seconds Latency.",
+                "# TYPE latency_seconds histogram",
+                'latency_seconds_bucket{le="0.1"} 0.0',
+                'latency_seconds_bucket{le="1.0"} 1.0',
+                'latency_seconds_bucket{le="+Inf"} 1.0',
+                "latency_seconds_sum 0.5",
+                "latency_seconds_count 1.0",
+            ],
+        )
+        with self.assertRaises(ValueError):
+            Counter("requests_total", "Again.", registry=registry)